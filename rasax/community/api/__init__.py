@@ -21,6 +21,35 @@ _git_repository = {
 _git_repository_update = _git_repository.copy()
 _git_repository_update["required"] = []
 
+_training_example = {
+    "type": "object",
+    "required": ["text", "intent"],
+    "properties": {
+        "id": {"type": ["string", "integer"]},
+        "text": {"type": "string"},
+        "intent": {"type": "string"},
+        "entities": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["start", "end", "value", "entity"],
+                "properties": {
+                    "start": {"type": ["string", "integer"]},
+                    "end": {"type": ["string", "integer"]},
+                    "entity": {"type": ["string", "integer"]},
+                    "value": {"type": ["string", "integer"]},
+                },
+            },
+        },
+        "annotation": {
+            "type": "object",
+            "properties": {"user": {"type": "string"}, "time": {"type": "number"}},
+        },
+        "hash": {"type": "string"},
+        "intent_mapped_to": {"type": "string"},
+    },
+}
+
 json_schema = {
     "login": {
         "type": "object",
@@ -46,34 +75,8 @@ json_schema = {
         },
     },
     "log": {"type": "string"},
-    "data": {
-        "type": "object",
-        "required": ["text", "intent"],
-        "properties": {
-            "id": {"type": ["string", "integer"]},
-            "text": {"type": "string"},
-            "intent": {"type": "string"},
-            "entities": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "required": ["start", "end", "value", "entity"],
-                    "properties": {
-                        "start": {"type": ["string", "integer"]},
-                        "end": {"type": ["string", "integer"]},
-                        "entity": {"type": ["string", "integer"]},
-                        "value": {"type": ["string", "integer"]},
-                    },
-                },
-            },
-            "annotation": {
-                "type": "object",
-                "properties": {"user": {"type": "string"}, "time": {"type": "number"}},
-            },
-            "hash": {"type": "string"},
-            "intent_mapped_to": {"type": "string"},
-        },
-    },
+    "data": _training_example,
+    "data_batch": {"type": "array", "items": _training_example},
     "handoff": {
         "type": "object",
         "required": ["url"],
@@ -1,4 +1,5 @@
 import logging
+from asyncio import AbstractEventLoop  # pytype: disable=pyi-error
 from http import HTTPStatus
 from typing import Tuple, Dict, Text, Any, List, Optional, Union
 
@@ -16,6 +17,7 @@ from sanic_jwt import exceptions
 import rasax.community.constants as constants
 import rasax.community.config as rasa_x_config
 import rasax.community.utils.common as common_utils
+import rasax.community.utils.http as http_utils
 from rasax.community.api.blueprints import (
     stack,
     nlg,
@@ -225,6 +227,11 @@ def initialize_app(app: Sanic, class_views: Tuple = ()) -> None:
     )
 
 
+async def _close_http_client_session(_: Sanic, __: AbstractEventLoop) -> None:
+    """Close the connections of this worker to the Rasa Open Source instances."""
+    await http_utils.close_client_session()
+
+
 def configure_app(local_mode: Optional[bool] = None) -> Sanic:
     """Create the Sanic app with the endpoint blueprints.
 
@@ -251,7 +258,11 @@ def configure_app(local_mode: Optional[bool] = None) -> Sanic:
     # allow CORS and OPTIONS on every endpoint
     CORS(
         app,
-        expose_headers=["X-Total-Count"],
+        expose_headers=[
+            "X-Total-Count",
+            "X-Total-Count-Is-Lower-Bound",
+            "X-Next-Cursor",
+        ],
         automatic_options=True,
         max_age=rasa_x_config.SANIC_ACCESS_CONTROL_MAX_AGE,
     )
@@ -268,6 +279,8 @@ def configure_app(local_mode: Optional[bool] = None) -> Sanic:
     app.register_middleware(init_args_access_set, "request")
     app.register_middleware(process_accessed_args, "response")
 
+    app.register_listener(_close_http_client_session, "after_server_stop")
+
     # Set up Blueprints
     app.blueprint(interface.blueprint())
     app.blueprint(project.blueprint(), url_prefix=constants.API_URL_PREFIX)
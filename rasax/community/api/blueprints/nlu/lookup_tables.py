@@ -59,6 +59,40 @@ def blueprint():
                 details=e,
             )
 
+    @nlu_lookup_tables_endpoints.route(
+        "/projects/<project_id>/lookupTables/<lookup_table_id:int>/elements",
+        methods=["GET", "HEAD"],
+    )
+    @rasa_x_scoped("lookup_tables.get")
+    async def get_lookup_table_elements(
+        request: Request, project_id: Text, lookup_table_id: int
+    ) -> HTTPResponse:
+        """Returns a page of the elements of a lookup table.
+
+        The elements can be filtered by a text query `q`, and paged using `offset`
+        and `limit`.
+        """
+
+        limit = common_utils.int_arg(request, "limit")
+        offset = common_utils.int_arg(request, "offset", 0)
+        text_query = common_utils.default_arg(request, "q", None)
+
+        data_service = DataService.from_request(request)
+        try:
+            elements = data_service.get_lookup_table_elements(
+                lookup_table_id, text_query=text_query, offset=offset, limit=limit
+            )
+        except ValueError as e:
+            logger.error(e)
+            return common_utils.error(
+                HTTPStatus.NOT_FOUND,
+                "GettingLookupTableFailed",
+                f"Lookup table with id '{lookup_table_id}' does not exist.",
+                details=e,
+            )
+
+        return response.json(elements.result, headers={"X-Total-Count": elements.count})
+
     @nlu_lookup_tables_endpoints.route(
         "/projects/<project_id>/lookupTables", methods=["POST"]
     )
@@ -277,6 +277,28 @@ def blueprint():
         telemetry.track_message_annotated_from_referrer(request.headers.get("Referer"))
         return response.json(example)
 
+    @nlu_training_examples_endpoints.route(
+        "/projects/<project_id>/training_examples/batch", methods=["POST"]
+    )
+    @rasa_x_scoped("examples.create")
+    @inject_rasa_x_user()
+    @validate_schema("data_batch")
+    async def add_training_examples(
+        request: Request, project_id: Text, user: Optional[Dict] = None
+    ) -> HTTPResponse:
+        """Add multiple training examples to the project.
+
+        Examples which already exist are updated.
+        """
+
+        data_service = DataService.from_request(request)
+        examples = data_service.save_examples(
+            user[constants.USERNAME_KEY], project_id, request.json
+        )
+
+        telemetry.track_message_annotated_from_referrer(request.headers.get("Referer"))
+        return response.json(examples, headers={"X-Total-Count": len(examples)})
+
     @nlu_training_examples_endpoints.route(
         "/projects/<project_id>/data/<example_id:int>", methods=["PUT"]
     )
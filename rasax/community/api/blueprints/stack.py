@@ -1,5 +1,6 @@
+import json
 import logging
-from typing import Text, Dict, Any, List
+from typing import Text, Dict, Any, Iterator, List, Optional, Tuple
 
 import time
 import uuid
@@ -8,7 +9,7 @@ from aiohttp import ClientError
 from http import HTTPStatus
 from sanic import Blueprint, response
 from sanic.request import Request
-from sanic.response import HTTPResponse
+from sanic.response import HTTPResponse, StreamingHTTPResponse
 
 import rasax.community.jwt
 import rasax.community.constants as constants
@@ -28,7 +29,11 @@ from rasax.community.api.decorators import (
 )
 from rasax.community.services.data_service import DataService
 from rasax.community.services.domain_service import DomainService
-from rasax.community.services.event_service import EventService
+from rasax.community.services.event_service import (
+    EventService,
+    CONVERSATION_COUNT_EXACT,
+    CONVERSATION_COUNT_MODES,
+)
 from rasax.community.services.role_service import RoleService
 from rasax.community.services.role_service import (
     normalise_permissions,
@@ -46,6 +51,11 @@ logger = logging.getLogger(__name__)
 TAGS_ANY_REQUEST_PARAMETER = "tags_any"
 FULL_CONVERSATION_FORMAT_REQUEST_PARAMETER = "full_conversation"
 
+# number of serialized events which are written to a streamed response at once
+STREAMING_RESPONSE_EVENTS_PER_WRITE = 500
+# maximum number of serialized chunks which are read ahead of the streamed response
+STREAMING_RESPONSE_CHUNKS_READ_AHEAD = 4
+
 
 def _event_verbosity_from_request(request):
     if common_utils.bool_arg(request, "history", default=True):
@@ -83,6 +93,100 @@ def _role_service(request: Request) -> RoleService:
     return RoleService(request[constants.REQUEST_DB_SESSION_KEY])
 
 
+def _stream_conversations(
+    request: Request,
+    conversation_ids: Optional[List[Text]] = None,
+    until_time: Optional[float] = None,
+    since_time: Optional[float] = None,
+    rasa_environment_query: Optional[Text] = None,
+    created_by: Optional[Text] = None,
+    as_ndjson: bool = True,
+    headers: Optional[Dict[Text, Text]] = None,
+) -> StreamingHTTPResponse:
+    """Stream the stored events of conversations to the HTTP response.
+
+    Events are written while they are read from the database, so the memory usage
+    doesn't depend on the number of exported events. Every conversation is
+    serialized as `{"sender_id": ..., "events": [...]}`.
+
+    Args:
+        request: Incoming HTTP request.
+        conversation_ids: Conversations to export. Exports all conversations if
+            `None`.
+        until_time: Include only events until the given time.
+        since_time: Include only events after the given time.
+        rasa_environment_query: Include only events of this Rasa environment.
+        created_by: Only export conversations created by this user.
+        as_ndjson: If `True`, conversations are written as newline-delimited JSON.
+            Otherwise a single JSON object is written, which requires that exactly
+            one conversation is exported.
+        headers: Additional headers for the response.
+
+    Returns:
+        The streaming HTTP response.
+    """
+
+    def _serialized_chunks() -> Iterator[Text]:
+        # Runs in a separate thread. Besides, the session attached to the request is
+        # closed before the response is streamed, hence a separate session is
+        # required.
+        session = request.app.session_maker()
+        try:
+            event_service = EventService(session)
+            current_conversation_id = None
+            chunk = []
+
+            for conversation_id, event in event_service.stream_conversation_events(
+                conversation_ids,
+                until_time,
+                since_time,
+                rasa_environment_query,
+                created_by,
+            ):
+                if conversation_id != current_conversation_id:
+                    if current_conversation_id is not None:
+                        chunk.append("]}\n" if as_ndjson else "]}")
+                    chunk.append(
+                        f'{{"sender_id": {json.dumps(conversation_id)}, "events": ['
+                    )
+                    current_conversation_id = conversation_id
+                else:
+                    chunk.append(",")
+
+                chunk.append(json.dumps(event))
+
+                if len(chunk) >= STREAMING_RESPONSE_EVENTS_PER_WRITE:
+                    yield "".join(chunk)
+                    chunk = []
+
+            if current_conversation_id is not None:
+                chunk.append("]}\n" if as_ndjson else "]}")
+            elif not as_ndjson and conversation_ids:
+                # conversation without matching events
+                chunk.append(
+                    f'{{"sender_id": {json.dumps(conversation_ids[0])}, "events": []}}'
+                )
+
+            if chunk:
+                yield "".join(chunk)
+        finally:
+            session.close()
+
+    async def _write_conversations(streaming_response: StreamingHTTPResponse) -> None:
+        # reading the events from the database blocks, so it mustn't happen on the
+        # event loop
+        async for chunk in common_utils.iterate_in_thread(
+            _serialized_chunks, STREAMING_RESPONSE_CHUNKS_READ_AHEAD
+        ):
+            await streaming_response.write(chunk)
+
+    content_type = "application/x-ndjson" if as_ndjson else "application/json"
+
+    return response.stream(
+        _write_conversations, content_type=content_type, headers=headers
+    )
+
+
 def blueprint() -> Blueprint:
     stack_endpoints = Blueprint("stack_endpoints")
 
@@ -90,12 +194,28 @@ def blueprint() -> Blueprint:
     @rasa_x_scoped("metadata.get", allow_api_token=True)
     @inject_rasa_x_user()
     async def list_clients(request, user=None):
-        clients, number_clients = _get_clients(request, user)
-        return response.json(clients, headers={"X-Total-Count": number_clients})
+        try:
+            clients, headers = _get_clients(request, user)
+        except ValueError as e:
+            return common_utils.error(
+                HTTPStatus.BAD_REQUEST, "InvalidConversationQuery", details=e
+            )
+
+        return response.json(clients, headers=headers)
 
     def _get_clients(
         request: Request, user: Dict[Text, Any]
-    ) -> common_utils.QueryResult:
+    ) -> Tuple[List[Dict[Text, Any]], Dict[Text, Any]]:
+        """Get the conversations matching the request and the response headers.
+
+        The headers contain
+        - `X-Total-Count`: Total number of matching conversations unless counting
+          was disabled with `count=none`.
+        - `X-Total-Count-Is-Lower-Bound`: `true` if the conversations were counted
+          approximately and there are at least as many as the count says.
+        - `X-Next-Cursor`: Cursor which can be passed as `after` to fetch the next
+          page. Only set if the conversations are sorted by date.
+        """
         role_service = _role_service(request)
         event_service = _event_service(request)
 
@@ -137,6 +257,10 @@ def blueprint() -> Blueprint:
         flag_query = common_utils.bool_arg(request, "is_flagged", False)
         limit = common_utils.int_arg(request, "limit")
         offset = common_utils.int_arg(request, "offset", 0)
+        after = common_utils.default_arg(request, "after", None)
+        count_mode = common_utils.enum_arg(
+            request, "count", set(CONVERSATION_COUNT_MODES), CONVERSATION_COUNT_EXACT,
+        )
         slots = common_utils.list_arg(request, "slots")
         input_channels = common_utils.list_arg(request, "input_channels")
 
@@ -154,7 +278,10 @@ def blueprint() -> Blueprint:
         if not role_service.is_user_allowed_to_view_all_conversations(user):
             filter_created_by = user[constants.USERNAME_KEY]
 
-        return event_service.get_conversation_metadata_for_all_clients(
+        (
+            clients,
+            number_clients,
+        ) = event_service.get_conversation_metadata_for_all_clients(
             start=start,
             until=until,
             minimum_confidence=minimum_confidence,
@@ -181,8 +308,26 @@ def blueprint() -> Blueprint:
             slots=slots,
             input_channels=input_channels,
             created_by=filter_created_by,
+            after=after,
+            count_mode=count_mode,
         )
 
+        headers = {}
+        if number_clients is not None:
+            headers["X-Total-Count"] = number_clients
+            if EventService.is_approximate_count_lower_bound(
+                number_clients, count_mode
+            ):
+                headers["X-Total-Count-Is-Lower-Bound"] = "true"
+        if clients and EventService.supports_pagination_cursor(
+            sort_by_latest_event_time, sort_by_confidence, in_training_data
+        ):
+            headers["X-Next-Cursor"] = EventService.encode_pagination_cursor(
+                clients[-1]
+            )
+
+        return clients, headers
+
     @stack_endpoints.route("/conversations", methods=["POST"])
     @rasa_x_scoped("metadata.create", allow_api_token=True)
     @inject_rasa_x_user()
@@ -362,6 +507,49 @@ def blueprint() -> Blueprint:
         exclude_leading_action_session_start = common_utils.bool_arg(
             request, "exclude_leading_action_session_start", False
         )
+        requested_format = request.headers.get("Accept")
+
+        if (
+            common_utils.bool_arg(request, "stream", False)
+            and requested_format != "text/markdown"
+        ):
+            # Streamed trackers are `{"sender_id": ..., "events": [...]}` and contain
+            # the stored events of the conversation with their message flags. They
+            # aren't replayed, hence the tracker state (e.g. `slots`) is missing and
+            # filters which require replaying the events aren't supported.
+            if (
+                event_verbosity != EventVerbosity.ALL
+                or exclude_leading_action_session_start
+            ):
+                return common_utils.error(
+                    HTTPStatus.BAD_REQUEST,
+                    "UnsupportedStreamingQuery",
+                    "Streamed trackers always contain the whole history of the "
+                    "conversation. The query parameters 'history=false' and "
+                    "'exclude_leading_action_session_start=true' can't be used "
+                    "with 'stream=true'.",
+                )
+
+            if not event_service.get_conversation(conversation_id):
+                return common_utils.error(
+                    HTTPStatus.NOT_FOUND,
+                    "ClientNotFound",
+                    f"Client for conversation_id '{conversation_id}' could not be "
+                    f"found",
+                )
+
+            return _stream_conversations(
+                request,
+                [conversation_id],
+                until_time,
+                since_time,
+                rasa_environment_query,
+                as_ndjson=False,
+                headers={
+                    "Content-Disposition": f"attachment;filename={conversation_id}"
+                    f"-dump.json"
+                },
+            )
 
         tracker = event_service.get_tracker_with_message_flags(
             conversation_id,
@@ -379,8 +567,6 @@ def blueprint() -> Blueprint:
                 f"Client for conversation_id '{conversation_id}' could not be found",
             )
 
-        requested_format = request.headers.get("Accept")
-
         if requested_format == "application/json":
             dispo = f"attachment;filename={conversation_id}-dump.json"
             return response.json(
@@ -402,6 +588,43 @@ def blueprint() -> Blueprint:
         else:
             return response.json(tracker, headers={"Content-Disposition": "inline"})
 
+    @stack_endpoints.route("/conversations/export", methods=["GET", "HEAD"])
+    @rasa_x_scoped("clients.get", allow_api_token=True)
+    @inject_rasa_x_user(allow_api_token=True, extract_user_from_jwt=True)
+    async def export_conversations(
+        request: Request, user: Dict[Text, Any]
+    ) -> HTTPResponse:
+        """Stream the events of many conversations as newline-delimited JSON.
+
+        Args:
+            request: Incoming HTTP request.
+            user: Rasa X user who sent the HTTP request.
+
+        Returns:
+            Streaming response with one conversation per line.
+        """
+        conversation_ids = common_utils.default_arg(request, "conversation_ids", None)
+        if conversation_ids:
+            conversation_ids = conversation_ids.split(",")
+
+        # users who can't view all conversations can only export the conversations
+        # they created themselves
+        created_by = None
+        if not _role_service(request).is_user_allowed_to_view_all_conversations(user):
+            created_by = user[constants.USERNAME_KEY]
+
+        return _stream_conversations(
+            request,
+            conversation_ids,
+            common_utils.float_arg(request, "until", None),
+            common_utils.float_arg(request, "since", None),
+            common_utils.default_arg(
+                request, "rasa_environment", constants.DEFAULT_RASA_ENVIRONMENT
+            ),
+            created_by,
+            headers={"Content-Disposition": "attachment;filename=conversations.ndjson"},
+        )
+
     @stack_endpoints.route("/conversationActions", methods=["GET", "HEAD"])
     @rasa_x_scoped("conversationActions.list", allow_api_token=True)
     async def unique_actions(request):
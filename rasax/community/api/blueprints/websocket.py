@@ -5,7 +5,6 @@ import time
 from json import JSONDecodeError
 from multiprocessing.context import BaseContext  # type: ignore
 from multiprocessing.managers import ListProxy  # pytype: disable=pyi-error
-from threading import Thread
 from typing import Tuple, Text, List, Dict, Optional
 
 from sanic import Blueprint, Sanic
@@ -23,8 +22,9 @@ from rasax.community.constants import USERNAME_KEY
 logger = logging.getLogger(__name__)
 
 # The single Sanic workers synchronize their process IDs so that we can assign each
-# of them a queue to communicate with.
+# of them an index among all workers.
 _worker_ids: Optional[ListProxy] = None
+_number_of_sanic_workers = 0
 
 AUTHORIZATION_KEY = "Authorization"
 
@@ -38,11 +38,11 @@ def blueprint() -> Blueprint:
     socket_endpoints = Blueprint("sockets")
 
     @socket_endpoints.listener("after_server_start")
-    async def assign_workers_queues(_: Sanic, loop: asyncio.BaseEventLoop) -> None:
-        """Assign each Sanic worker a process safe queue.
+    async def subscribe_to_messages(_: Sanic, loop: asyncio.BaseEventLoop) -> None:
+        """Subscribe the Sanic worker to the WebSocket messages.
 
-        We assign each Sanic worker a process safe queue so that we can send messages
-        to them which they then can forward to any connected WebSockets.
+        Every Sanic worker subscribes to the messages so that it can forward them to
+        its connected WebSockets.
 
         Args:
             _: The Sanic app.
@@ -50,18 +50,16 @@ def blueprint() -> Blueprint:
         """
 
         _register_worker_with_process_id()
-        number_of_sanic_workers = len(websocket_service.get_message_queues())
-        await _loop_until_all_workers_registered(number_of_sanic_workers)
+        await _loop_until_all_workers_registered(_number_of_sanic_workers)
         worker_index = _get_own_worker_index()
 
-        # Loop in a `Thread` to not block `EventLoop`.
-        # Thread will be killed on exit due to `daemon=True`.
-        message_consumer = Thread(
-            target=websocket_service.loop_for_messages_to_broadcast,
-            args=(worker_index, loop),
-            daemon=True,
-        )
-        message_consumer.start()
+        websocket_service.subscribe_to_messages(worker_index, loop)
+
+    @socket_endpoints.listener("before_server_stop")
+    async def unsubscribe_from_messages(_: Sanic, __: asyncio.BaseEventLoop) -> None:
+        """Stop forwarding WebSocket messages to this Sanic worker."""
+
+        websocket_service.unsubscribe_from_messages()
 
     @socket_endpoints.websocket("/ws")
     async def receive_websocket_message(
@@ -126,19 +124,44 @@ def initialize_global_sanic_worker_states(
 ) -> None:
     """Initializes process safe variables which are shared by the Sanic workers.
 
-    - `Queue`s for every worker which will contain messages which are forwared to
-      matching WebSocket connections.
+    - A message broker which distributes messages to the Sanic workers which then
+      forward them to matching WebSocket connections.
     - A list which is used to coordinate the Sanic workers.
 
     Args:
-        number_of_sanic_workers: Number of Sanic workers which each will get assigned to
-        one `Queue`.
+        number_of_sanic_workers: Number of Sanic workers which subscribe to the
+            messages.
         mp_context: The current multiprocessing context.
     """
-    websocket_service.initialize_websocket_queues(number_of_sanic_workers, mp_context)
+    websocket_service.initialize_message_broker(number_of_sanic_workers, mp_context)
+
+    set_global_sanic_worker_states(
+        common_utils.mp_context().Manager().list(), number_of_sanic_workers
+    )
+
 
-    global _worker_ids
-    _worker_ids = common_utils.mp_context().Manager().list()
+def get_global_sanic_worker_states() -> Tuple[Optional[ListProxy], int]:
+    """Get the state which is used to coordinate the Sanic workers.
+
+    Returns:
+        The synchronized list of Sanic worker process IDs and the number of Sanic
+        workers.
+    """
+    return _worker_ids, _number_of_sanic_workers
+
+
+def set_global_sanic_worker_states(
+    worker_ids: Optional[ListProxy], number_of_sanic_workers: int
+) -> None:
+    """Set the state which is used to coordinate the Sanic workers.
+
+    Args:
+        worker_ids: Synchronized list of the Sanic worker process IDs.
+        number_of_sanic_workers: Number of Sanic workers.
+    """
+    global _worker_ids, _number_of_sanic_workers
+    _worker_ids = worker_ids
+    _number_of_sanic_workers = number_of_sanic_workers
 
 
 def _register_worker_with_process_id() -> None:
@@ -145,8 +145,6 @@ def rasa_x_scoped(
 
         @wraps(f)
         async def decorated_function(request, *args, **kwargs):
-            user_service = UserService(request[constants.REQUEST_DB_SESSION_KEY])
-
             if initialized_on and isinstance(initialized_on, Blueprint):
                 instance = initialized_on
             else:
@@ -171,6 +169,9 @@ def rasa_x_scoped(
                     # skip the usual JWT authentication
                     api_token = common_utils.default_arg(request, "api_token")
                     if api_token:
+                        user_service = UserService(
+                            request[constants.REQUEST_DB_SESSION_KEY]
+                        )
                         user = user_service.api_token_auth(api_token)
                         is_authenticated = True
                         status = 200
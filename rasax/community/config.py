@@ -93,9 +93,22 @@ analytics_update_kwargs = json.loads(
     os.environ.get("ANALYTICS_UPDATE_KWARGS", '{"hour": "*"}')
 )
 
+# Time in seconds for which users authenticated by an API token are cached by each
+# Rasa X worker. Changes of users and roles invalidate the caches of all workers
+# once they were committed. A value of `0` disables the cache.
+api_token_cache_ttl_in_seconds = float(os.environ.get("API_TOKEN_CACHE_TTL") or 30)
+
 # Stack variables
 rasa_token = os.environ.get("RASA_TOKEN", "")
 
+# Maximum number of concurrent connections which each Rasa X worker opens to each
+# Rasa Open Source environment. Idle connections are kept open for
+# `rasa_connection_keepalive_timeout_in_seconds` to reuse them for later requests.
+rasa_connection_pool_size = int(os.environ.get("RASA_CONNECTION_POOL_SIZE") or 100)
+rasa_connection_keepalive_timeout_in_seconds = float(
+    os.environ.get("RASA_CONNECTION_KEEPALIVE_TIMEOUT") or 15
+)
+
 # RabbitMQ variables
 rabbitmq_username = os.environ.get("RABBITMQ_USERNAME", "user")
 rabbitmq_password = os.environ.get("RABBITMQ_PASSWORD", "bitnami")
@@ -109,6 +122,34 @@ should_run_event_consumer_separately = (
     os.environ.get(constants.EVENT_CONSUMER_SEPARATION_ENV, "false").lower() == "true"
 )
 
+# Number of consumed events which the event service persists in a single database
+# transaction. A value of `1` commits every event individually.
+event_consumer_batch_size = int(os.environ.get("EVENT_CONSUMER_BATCH_SIZE") or 1)
+
+# Maximum time in milliseconds an event may wait in a partially filled batch before
+# the batch is persisted.
+event_consumer_batch_timeout_in_ms = int(
+    os.environ.get("EVENT_CONSUMER_BATCH_TIMEOUT_MS") or 500
+)
+
+# The event service can be run as multiple replicas which each process the events
+# of a share of the conversations. A replica processes a conversation if the hash
+# of its sender ID modulo `event_service_shard_count` is its
+# `event_service_shard_index`. A shard count of `1` disables sharding.
+event_service_shard_index = int(os.environ.get("EVENT_SERVICE_SHARD_INDEX") or 0)
+event_service_shard_count = int(os.environ.get("EVENT_SERVICE_SHARD_COUNT") or 1)
+
+# URL of a Redis server (e.g. `redis://redis:6379/0`) which is used to share
+# WebSocket notifications among multiple replicas of the Rasa X server. If unset,
+# notifications are only shared among the Sanic workers of a single Rasa X server.
+websocket_pubsub_url = os.environ.get("WEBSOCKET_PUBSUB_URL") or None
+
+# Time in milliseconds during which identical WebSocket notifications (e.g. about new
+# models) are sent only once. A value of `0` disables the coalescing.
+websocket_coalescing_window_in_ms = int(
+    os.environ.get("WEBSOCKET_COALESCING_WINDOW_MS") or 100
+)
+
 # whether or not the model service should wait for the model discovery to finish
 # before fetching models from the database
 wait_for_model_discovery = True
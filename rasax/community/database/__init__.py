@@ -39,6 +39,7 @@ from rasax.community.database.analytics import (
     ConversationPolicyStatistic,
     ConversationStatistic,
     ConversationSession,
+    ConversationSessionRollup,
     AnalyticsCache,
 )
 
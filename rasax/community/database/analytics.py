@@ -156,6 +156,29 @@ class ConversationSession(Base):
     in_training_data = sa.Column(sa.Boolean, default=True)
 
 
+class ConversationSessionRollup(Base):
+    """Stores aggregated `ConversationSession` data per conversation and hour.
+
+    Sessions are assigned to the hour in which they started. Keeping the
+    conversation in the key allows to count distinct conversations across hours
+    and to exclude conversations of platform users from the analytics.
+    """
+
+    __tablename__ = "conversation_session_rollup"
+
+    # start of the hour as unix timestamp
+    hour_start = sa.Column(sa.Float, primary_key=True)
+    conversation_id = sa.Column(
+        sa.String, sa.ForeignKey("conversation.sender_id"), primary_key=True
+    )
+    sessions = sa.Column(sa.Integer, default=0)
+    new_users = sa.Column(sa.Integer, default=0)
+    user_messages = sa.Column(sa.Integer, default=0)
+    bot_messages = sa.Column(sa.Integer, default=0)
+    # sum of the session lengths in seconds
+    session_length = sa.Column(sa.Float, default=0.0)
+
+
 class AnalyticsCache(Base):
     """Caches the calculated analytic results for faster loading."""
 
@@ -1,17 +1,23 @@
 import json
-from typing import Dict, Any, Text, Set, Union, List
+from typing import Dict, Any, Text, Set, Union, List, Optional
 
 import sqlalchemy as sa
 from sqlalchemy.orm import object_session, relationship
 from sqlalchemy import and_
 
 import rasax.community.constants as constants
+import rasax.community.utils.json as json_utils
 from rasax.community.database.base import Base
 from rasax.community.database import utils
 
 
 class Conversation(Base):
-    """Stores the user's conversation and its metadata."""
+    """Stores the user's conversation and its metadata.
+
+    Indexed columns:
+    - `created_by` (Revision: `ac3fba1c2b86`)
+    - `(latest_event_time, sender_id)` (Revision: `8f3b2c6d1e47`)
+    """
 
     __tablename__ = "conversation"
 
@@ -99,9 +105,21 @@ class Conversation(Base):
         )
         return result is not None
 
-    def as_dict(self) -> Dict[Text, Any]:
+    def as_dict(self, has_flagged_messages: Optional[bool] = None) -> Dict[Text, Any]:
+        """Return a JSON-like representation of the conversation.
+
+        Args:
+            has_flagged_messages: Whether the conversation has flagged messages. If
+                `None`, this is determined with a separate database query.
+
+        Returns:
+            The conversation metadata.
+        """
         from rasax.community.services.event_service import EventService
 
+        if has_flagged_messages is None:
+            has_flagged_messages = self.has_flagged_messages
+
         result = {
             "sender_id": self.sender_id,
             "sender_name": EventService.get_sender_name(self),  # displayed in the UI
@@ -117,7 +135,7 @@ class Conversation(Base):
             "review_status": self.review_status,
             "policies": [p.policy for p in self.unique_policies],
             "n_user_messages": self.number_user_messages,
-            "has_flagged_messages": self.has_flagged_messages,
+            "has_flagged_messages": has_flagged_messages,
             "corrected_messages": [
                 {"message_timestamp": c.message_timestamp, "intent": c.intent}
                 for c in self.corrected_messages
@@ -206,11 +224,30 @@ class ConversationEvent(Base):
                 database entity.
         """
 
-        d = json.loads(self.data)
+        return self.data_as_rasa_dict(self.data, self.is_flagged, self.id)
+
+    @staticmethod
+    def data_as_rasa_dict(
+        data: Text, is_flagged: bool, event_id: int
+    ) -> Dict[Text, Any]:
+        """Return the Rasa event of a stored event including Rasa X metadata.
+
+        This allows to build the Rasa event from selected columns without loading
+        the whole `ConversationEvent` object.
+
+        Args:
+            data: Serialized Rasa event.
+            is_flagged: Whether the event was flagged.
+            event_id: ID of the `ConversationEvent`.
+
+        Returns:
+            A JSON-like representation of the Rasa event.
+        """
+        d = json_utils.loads(data)
 
         # Add some metadata specific to Rasa X (namespaced with "rasa_x_")
         metadata = d.get("metadata") or {}
-        metadata.update({"rasa_x_flagged": self.is_flagged, "rasa_x_id": self.id})
+        metadata.update({"rasa_x_flagged": is_flagged, "rasa_x_id": event_id})
         d["metadata"] = metadata
 
         return d
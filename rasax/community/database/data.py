@@ -5,7 +5,7 @@ from typing import Dict, Text, Any, Optional
 
 import sqlalchemy as sa
 from sqlalchemy import Column
-from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.orm import relationship
 
 import rasax.community.constants as constants
 import rasax.community.config as rasa_x_config
@@ -82,6 +82,10 @@ class Story(Base):
     annotated_at = sa.Column(sa.Float)  # annotation time as unix timestamp
     filename = sa.Column(sa.String)
     is_rule = sa.Column(sa.Boolean, default=False)
+    # hash of the story content and format which `domain_items` were extracted from
+    content_hash = sa.Column(sa.String)
+    # actions, intents, slots and entities used in the story as JSON
+    domain_items = sa.Column(sa.Text)
 
     def as_dict(self) -> Dict[Text, Any]:
         return {
@@ -182,8 +186,6 @@ class LookupTable(Base):
     project_id = sa.Column(sa.String, sa.ForeignKey("project.project_id"))
     name = sa.Column(sa.String)
     number_of_elements = Column(sa.Integer)
-    # Load content only if it's actually accessed
-    elements = deferred(Column(sa.Text))
     referencing_nlu_file = sa.Column("filename", sa.String)
 
     def as_dict(self, should_include_filename: bool = False) -> Dict[Text, Text]:
@@ -226,6 +228,25 @@ class LookupTable(Base):
         return str(io_utils.get_project_directory() / self.relative_file_path)
 
 
+class LookupTableElement(Base):
+    """Stores the elements of lookup tables.
+
+    Every element is stored as separate row so that the elements of large lookup
+    tables can be paged, searched and streamed without loading the whole table.
+    """
+
+    __tablename__ = "lookup_table_element"
+
+    id = sa.Column(sa.Integer, utils.create_sequence(__tablename__), primary_key=True)
+    lookup_table_id = sa.Column(sa.Integer, sa.ForeignKey("lookup_table.id"))
+    # position of the element within the lookup table, starting at `0`
+    position = sa.Column(sa.Integer)
+    element = sa.Column(sa.Text)
+
+    def as_dict(self) -> Dict[Text, Any]:
+        return {"position": self.position, "element": self.element}
+
+
 class EntitySynonym(Base):
     """Stores annotated entity synonyms of the NLU training data."""
 
@@ -0,0 +1,103 @@
+"""Add table to store hourly rollups of conversation sessions.
+
+Reason:
+The cached analytics were calculated by aggregating all `ConversationSession`s
+of the analysed time range. Aggregating the sessions per conversation and hour
+while they are updated allows to calculate the analytics from the much smaller
+rollups. Existing sessions are aggregated into the new table.
+
+Revision ID: 9b4e1f6a2c83
+Revises: 2d7a4f9c3b15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+# revision identifiers, used by Alembic.
+revision = "9b4e1f6a2c83"
+down_revision = "2d7a4f9c3b15"
+branch_labels = None
+depends_on = None
+
+TABLE_NAME = "conversation_session_rollup"
+SECONDS_PER_HOUR = 3600
+
+
+def upgrade():
+    rollup_table = op.create_table(
+        TABLE_NAME,
+        sa.Column("hour_start", sa.Float(), nullable=False),
+        sa.Column("conversation_id", sa.String(255), nullable=False),
+        sa.Column("sessions", sa.Integer(), nullable=True),
+        sa.Column("new_users", sa.Integer(), nullable=True),
+        sa.Column("user_messages", sa.Integer(), nullable=True),
+        sa.Column("bot_messages", sa.Integer(), nullable=True),
+        sa.Column("session_length", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["conversation_id"], ["conversation.sender_id"]),
+        sa.PrimaryKeyConstraint("hour_start", "conversation_id"),
+    )
+
+    _aggregate_existing_sessions(rollup_table)
+
+
+def _aggregate_existing_sessions(rollup_table: sa.Table) -> None:
+    sessions = sa.table(
+        "conversation_session",
+        sa.column("conversation_id", sa.String),
+        sa.column("session_start", sa.Float),
+        sa.column("session_length", sa.Float),
+        sa.column("user_messages", sa.Integer),
+        sa.column("bot_messages", sa.Integer),
+        sa.column("is_new_user", sa.Integer),
+    )
+    conversations = sa.table("conversation", sa.column("sender_id", sa.String))
+
+    hours = sessions.c.session_start / SECONDS_PER_HOUR
+    # SQLite doesn't have a `floor` function, but casting positive numbers to an
+    # integer truncates them
+    if migration_utils.using_dialect("sqlite"):
+        hour_start = sa.cast(hours, sa.Integer) * SECONDS_PER_HOUR
+    else:
+        hour_start = sa.func.floor(hours) * SECONDS_PER_HOUR
+
+    aggregated_sessions = (
+        sa.select(
+            [
+                hour_start,
+                sessions.c.conversation_id,
+                sa.func.count(),
+                sa.func.coalesce(sa.func.sum(sessions.c.is_new_user), 0),
+                sa.func.coalesce(sa.func.sum(sessions.c.user_messages), 0),
+                sa.func.coalesce(sa.func.sum(sessions.c.bot_messages), 0),
+                sa.func.coalesce(sa.func.sum(sessions.c.session_length), 0.0),
+            ]
+        )
+        .where(
+            sa.and_(
+                sessions.c.session_start.isnot(None),
+                sessions.c.conversation_id.in_(sa.select([conversations.c.sender_id])),
+            )
+        )
+        .group_by(hour_start, sessions.c.conversation_id)
+    )
+
+    op.execute(
+        rollup_table.insert().from_select(
+            [
+                "hour_start",
+                "conversation_id",
+                "sessions",
+                "new_users",
+                "user_messages",
+                "bot_messages",
+                "session_length",
+            ],
+            aggregated_sessions,
+        )
+    )
+
+
+def downgrade():
+    op.drop_table(TABLE_NAME)
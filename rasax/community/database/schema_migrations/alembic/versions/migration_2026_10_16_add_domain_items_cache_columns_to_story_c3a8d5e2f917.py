@@ -0,0 +1,37 @@
+"""Add columns to cache the domain items which are used in a story.
+
+Reason:
+Extracting the actions, intents, slots and entities of the stories required
+parsing every story whenever the domain warnings were requested. The extracted
+items are now stored together with the hash of the story content they were
+extracted from, so that only changed stories have to be parsed again.
+
+Revision ID: c3a8d5e2f917
+Revises: 9b4e1f6a2c83
+
+"""
+import sqlalchemy as sa
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+
+# revision identifiers, used by Alembic.
+revision = "c3a8d5e2f917"
+down_revision = "9b4e1f6a2c83"
+branch_labels = None
+depends_on = None
+
+TABLE_NAME = "story"
+
+
+def upgrade():
+    migration_utils.create_column(
+        TABLE_NAME, sa.Column("content_hash", sa.String(255), nullable=True)
+    )
+    migration_utils.create_column(
+        TABLE_NAME, sa.Column("domain_items", sa.Text(), nullable=True)
+    )
+
+
+def downgrade():
+    migration_utils.drop_column(TABLE_NAME, "domain_items")
+    migration_utils.drop_column(TABLE_NAME, "content_hash")
@@ -0,0 +1,188 @@
+"""Add full-text search indexes for text queries.
+
+Reason:
+Text queries on message logs, NLU training data, responses and stories used
+`LIKE '%...%'` filters which scan the whole table. SQLite databases get FTS5
+tables with the trigram tokenizer which index the text without diacritics and
+which are kept in sync using triggers, PostgreSQL databases get trigram indexes on
+the unaccented, lower-cased text. See
+`rasax.community.database.text_search` for how these are used.
+
+Revision ID: 2d7a4f9c3b15
+Revises: 8f3b2c6d1e47
+
+"""
+import logging
+from typing import Tuple
+
+from alembic import op
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+logger = logging.getLogger(__name__)
+
+# revision identifiers, used by Alembic.
+revision = "2d7a4f9c3b15"
+down_revision = "8f3b2c6d1e47"
+branch_labels = None
+depends_on = None
+
+# tables which get a text search index, mapped to their indexed column
+INDEXED_COLUMNS = {
+    "message_log": "text",
+    "nlu_training_data": "text",
+    "response": "text",
+    "story": "story",
+}
+
+# name of the immutable `unaccent` wrapper function in PostgreSQL
+POSTGRESQL_UNACCENT_FUNCTION = "rasa_x_unaccent"
+
+# SQL function which removes diacritics. It's registered on every SQLite connection
+# by `rasax.community.database.text_search.register_sqlite_functions`.
+SQLITE_FOLD_DIACRITICS_FUNCTION = "rasa_x_fold_diacritics"
+
+
+def _fts_table_name(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _fts_trigger_names(table: str) -> Tuple[str, str, str]:
+    return f"{table}_fts_ai", f"{table}_fts_ad", f"{table}_fts_au"
+
+
+def _postgresql_index_name(table: str) -> str:
+    return f"{table}_text_search_idx"
+
+
+def _sqlite_folded(value: str) -> str:
+    return f"{SQLITE_FOLD_DIACRITICS_FUNCTION}({value})"
+
+
+def upgrade():
+    if migration_utils.using_dialect("sqlite"):
+        _create_sqlite_fts_tables()
+    elif migration_utils.using_dialect("postgresql"):
+        _create_postgresql_trigram_indexes()
+
+
+def downgrade():
+    if migration_utils.using_dialect("sqlite"):
+        _drop_sqlite_fts_tables()
+    elif migration_utils.using_dialect("postgresql"):
+        _drop_postgresql_trigram_indexes()
+
+
+def _create_sqlite_fts_table(table: str, column: str) -> bool:
+    # The trigram tokenizer requires SQLite 3.34. Older versions don't get an index
+    # since other tokenizers don't support substring matching.
+    try:
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {_fts_table_name(table)} USING fts5("
+            f"{column}, content='{table}', content_rowid='id', tokenize='trigram')"
+        )
+        return True
+    except OperationalError as e:
+        logger.debug(f"Failed to create FTS5 table with the trigram tokenizer: {e}")
+        return False
+
+
+def _create_sqlite_fts_tables():
+    for table, column in INDEXED_COLUMNS.items():
+        if not _create_sqlite_fts_table(table, column):
+            logger.warning(
+                f"Could not create the full-text search table for '{table}' since "
+                f"the SQLite library doesn't support FTS5 with the trigram "
+                f"tokenizer. Text queries will scan the whole table."
+            )
+            continue
+
+        # The indexed values have no diacritics, hence the index can't be built
+        # from the content table with 'rebuild', and deleting a row from the index
+        # has to pass the same folded value.
+        fts_table = _fts_table_name(table)
+        new_value = _sqlite_folded(f"new.{column}")
+        old_value = _sqlite_folded(f"old.{column}")
+        insert_trigger, delete_trigger, update_trigger = _fts_trigger_names(table)
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {insert_trigger} AFTER INSERT ON {table} "
+            f"BEGIN "
+            f"INSERT INTO {fts_table}(rowid, {column}) VALUES (new.id, {new_value}); "
+            f"END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {delete_trigger} AFTER DELETE ON {table} "
+            f"BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) "
+            f"VALUES ('delete', old.id, {old_value}); "
+            f"END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {update_trigger} "
+            f"AFTER UPDATE OF {column} ON {table} "
+            f"BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) "
+            f"VALUES ('delete', old.id, {old_value}); "
+            f"INSERT INTO {fts_table}(rowid, {column}) VALUES (new.id, {new_value}); "
+            f"END"
+        )
+
+        # index the existing rows
+        op.execute(
+            f"INSERT INTO {fts_table}(rowid, {column}) "
+            f"SELECT id, {_sqlite_folded(column)} FROM {table}"
+        )
+
+
+def _drop_sqlite_fts_tables():
+    for table in INDEXED_COLUMNS:
+        for trigger in _fts_trigger_names(table):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+        if migration_utils.table_exists(_fts_table_name(table)):
+            op.execute(f"DROP TABLE {_fts_table_name(table)}")
+
+
+def _create_postgresql_trigram_indexes():
+    bind = op.get_bind()
+
+    # Creating extensions requires additional privileges. Use a savepoint so that
+    # the migration can continue without the indexes if that fails.
+    savepoint = bind.begin_nested()
+    try:
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        savepoint.commit()
+    except DBAPIError as e:
+        savepoint.rollback()
+        logger.warning(
+            f"Could not create the PostgreSQL extensions 'unaccent' and 'pg_trgm' "
+            f"({e}). Text queries will scan the whole table. To enable the "
+            f"full-text search indexes, create the extensions, then downgrade and "
+            f"upgrade this revision."
+        )
+        return
+
+    # `unaccent` is only `STABLE` since its behaviour depends on the dictionary.
+    # Functions used in indexes have to be `IMMUTABLE`, hence this wrapper.
+    op.execute(
+        f"CREATE OR REPLACE FUNCTION "
+        f"{POSTGRESQL_UNACCENT_FUNCTION}(text) RETURNS text AS "
+        f"$$ SELECT unaccent('unaccent'::regdictionary, $1) $$ "
+        f"LANGUAGE sql IMMUTABLE STRICT"
+    )
+
+    for table, column in INDEXED_COLUMNS.items():
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {_postgresql_index_name(table)} "
+            f"ON {table} USING gin ("
+            f"{POSTGRESQL_UNACCENT_FUNCTION}(lower({column})) gin_trgm_ops)"
+        )
+
+
+def _drop_postgresql_trigram_indexes():
+    for table in INDEXED_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS {_postgresql_index_name(table)}")
+
+    op.execute(f"DROP FUNCTION IF EXISTS {POSTGRESQL_UNACCENT_FUNCTION}(text)")
@@ -0,0 +1,34 @@
+"""Add index for keyset pagination of conversations.
+
+Reason:
+The conversation screen pages through conversations ordered by
+`(latest_event_time, sender_id)`. Indexing these columns allows to fetch a page
+without scanning and sorting all conversations.
+
+Revision ID: 8f3b2c6d1e47
+Revises: 6af361a57ca6
+
+"""
+from alembic import op
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+# revision identifiers, used by Alembic.
+revision = "8f3b2c6d1e47"
+down_revision = "6af361a57ca6"
+branch_labels = None
+depends_on = None
+
+TABLE_NAME = "conversation"
+NEW_INDEX_NAME = "conversation_latest_event_time_idx"
+
+
+def upgrade():
+    if not migration_utils.index_exists(TABLE_NAME, NEW_INDEX_NAME):
+        with op.batch_alter_table(TABLE_NAME) as batch_op:
+            batch_op.create_index(NEW_INDEX_NAME, ["latest_event_time", "sender_id"])
+
+
+def downgrade():
+    if migration_utils.index_exists(TABLE_NAME, NEW_INDEX_NAME):
+        with op.batch_alter_table(TABLE_NAME) as batch_op:
+            batch_op.drop_index(NEW_INDEX_NAME)
@@ -0,0 +1,118 @@
+"""Store the elements of lookup tables as separate rows.
+
+Reason:
+Lookup tables were stored as a single JSON blob which had to be loaded and decoded
+entirely whenever any of its elements were accessed. Lookup tables can contain
+hundreds of thousands of elements. Storing every element as row which is indexed by
+its position allows to page, search and stream the elements.
+
+Revision ID: e4b7c1d9a356
+Revises: c3a8d5e2f917
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+# revision identifiers, used by Alembic.
+revision = "e4b7c1d9a356"
+down_revision = "c3a8d5e2f917"
+branch_labels = None
+depends_on = None
+
+TABLE_NAME = "lookup_table_element"
+NEW_INDEX_NAME = "lookup_table_element_position_idx"
+LOOKUP_TABLE = "lookup_table"
+ELEMENTS_COLUMN = "elements"
+
+# number of elements which are inserted with a single statement
+ELEMENTS_PER_INSERT = 10000
+
+lookup_table = sa.table(
+    LOOKUP_TABLE, sa.column("id", sa.Integer), sa.column(ELEMENTS_COLUMN, sa.Text)
+)
+lookup_table_element = sa.Table(
+    TABLE_NAME,
+    sa.MetaData(),
+    sa.Column(
+        "id",
+        sa.Integer,
+        sa.Sequence(f"{TABLE_NAME}_seq", optional=True),
+        primary_key=True,
+    ),
+    sa.Column("lookup_table_id", sa.Integer),
+    sa.Column("position", sa.Integer),
+    sa.Column("element", sa.Text),
+)
+
+
+def upgrade():
+    op.create_table(
+        TABLE_NAME,
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("lookup_table_id", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("element", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["lookup_table_id"], [f"{LOOKUP_TABLE}.id"]),
+    )
+    migration_utils.create_sequence(TABLE_NAME)
+
+    with op.batch_alter_table(TABLE_NAME) as batch_op:
+        batch_op.create_index(NEW_INDEX_NAME, ["lookup_table_id", "position"])
+
+    _copy_elements_to_rows()
+    migration_utils.drop_column(LOOKUP_TABLE, ELEMENTS_COLUMN)
+
+
+def downgrade():
+    migration_utils.create_column(
+        LOOKUP_TABLE, sa.Column(ELEMENTS_COLUMN, sa.Text, nullable=True)
+    )
+    _copy_rows_to_elements()
+    op.drop_table(TABLE_NAME)
+
+
+def _lookup_table_ids(bind):
+    return [_id for (_id,) in bind.execute(sa.select([lookup_table.c.id]))]
+
+
+def _copy_elements_to_rows():
+    bind = op.get_bind()
+
+    # Decode one lookup table at a time to not load all of them into memory
+    for _id in _lookup_table_ids(bind):
+        serialized = bind.execute(
+            sa.select([lookup_table.c.elements]).where(lookup_table.c.id == _id)
+        ).scalar()
+        elements = json.loads(serialized) if serialized else []
+
+        for start in range(0, len(elements), ELEMENTS_PER_INSERT):
+            bind.execute(
+                lookup_table_element.insert(),
+                [
+                    {"lookup_table_id": _id, "position": position, "element": element}
+                    for position, element in enumerate(
+                        elements[start : start + ELEMENTS_PER_INSERT], start
+                    )
+                ],
+            )
+
+
+def _copy_rows_to_elements():
+    bind = op.get_bind()
+
+    for _id in _lookup_table_ids(bind):
+        elements = bind.execute(
+            sa.select([lookup_table_element.c.element])
+            .where(lookup_table_element.c.lookup_table_id == _id)
+            .order_by(lookup_table_element.c.position)
+        )
+        bind.execute(
+            lookup_table.update()
+            .where(lookup_table.c.id == _id)
+            .values(elements=json.dumps([element for (element,) in elements]))
+        )
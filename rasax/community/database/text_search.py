@@ -0,0 +1,271 @@
+"""Full-text search over the columns which can be filtered by free text queries.
+
+The text search indexes are created by the database migration with revision
+`2d7a4f9c3b15`:
+
+- SQLite: An external content FTS5 table `<table>_fts` with the trigram
+  tokenizer (SQLite 3.34 or later) per indexed table, which is kept in sync with
+  the indexed table using triggers. The triggers index the texts without
+  diacritics, so that e.g. "tieng" matches "Tiếng". They use the SQL function
+  `rasa_x_fold_diacritics` which is registered on every SQLite connection of
+  Rasa X (see `register_sqlite_functions`). The tokenizer's own
+  `remove_diacritics` option isn't used since it requires SQLite 3.45.
+- PostgreSQL: A trigram (`pg_trgm`) GIN index on
+  `rasa_x_unaccent(lower(<column>))` per indexed table. `rasa_x_unaccent` is an
+  immutable wrapper around the `unaccent` extension.
+
+Both indexes match case-insensitive substrings, just like the `ILIKE` filters
+which are used if the indexes are not available (e.g. since the SQLite build
+doesn't include the trigram tokenizer, or the database user wasn't allowed to
+create the PostgreSQL extensions).
+"""
+
+import logging
+import unicodedata
+from sqlite3 import Connection as SQLite3Connection
+from typing import Dict, Optional, Set, Text, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+logger = logging.getLogger(__name__)
+
+# tables which have a text search index, mapped to their indexed column
+INDEXED_COLUMNS: Dict[Text, Text] = {
+    "message_log": "text",
+    "nlu_training_data": "text",
+    "response": "text",
+    "story": "story",
+}
+
+# name of the immutable `unaccent` wrapper function in PostgreSQL
+POSTGRESQL_UNACCENT_FUNCTION = "rasa_x_unaccent"
+
+# name of the SQL function which removes diacritics in SQLite
+SQLITE_FOLD_DIACRITICS_FUNCTION = "rasa_x_fold_diacritics"
+
+# characters which aren't decomposed into a letter and diacritics by Unicode, but
+# which `unaccent` folds in PostgreSQL
+SQLITE_REPLACED_CHARACTERS: Dict[Text, Text] = {"đ": "d", "Đ": "D"}
+
+# minimum length of a text query which can be matched by the FTS5 trigram index
+SQLITE_MINIMUM_QUERY_LENGTH = 3
+
+
+def fts_table_name(table: Text) -> Text:
+    """Name of the SQLite FTS5 table which indexes `table`."""
+    return f"{table}_fts"
+
+
+def fts_trigger_names(table: Text) -> Tuple[Text, Text, Text]:
+    """Names of the SQLite triggers which keep the FTS5 table of `table` in sync.
+
+    Returns:
+        Names of the insert, delete and update triggers.
+    """
+    return f"{table}_fts_ai", f"{table}_fts_ad", f"{table}_fts_au"
+
+
+def postgresql_index_name(table: Text) -> Text:
+    """Name of the PostgreSQL trigram index on `table`."""
+    return f"{table}_text_search_idx"
+
+
+def fold_diacritics(text: Optional[Text]) -> Optional[Text]:
+    """Remove the diacritics from `text`, e.g. "Tiếng Việt" becomes "Tieng Viet".
+
+    Args:
+        text: Text to fold.
+
+    Returns:
+        The text without diacritics.
+    """
+    if text is None:
+        return None
+
+    for character, replacement in SQLITE_REPLACED_CHARACTERS.items():
+        text = text.replace(character, replacement)
+
+    return "".join(
+        character
+        for character in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(character)
+    )
+
+
+def register_sqlite_functions(connection: SQLite3Connection) -> None:
+    """Register the SQL functions which the SQLite text search indexes require.
+
+    The triggers which keep the FTS5 tables in sync call these functions, hence
+    they have to be registered on every connection which writes to the indexed
+    tables.
+
+    Args:
+        connection: The SQLite connection.
+    """
+    connection.create_function(SQLITE_FOLD_DIACRITICS_FUNCTION, 1, fold_diacritics)
+
+
+class TextSearchBackend:
+    """Builds filters which match the rows containing a text query.
+
+    This default backend doesn't use any index and filters with `ILIKE`.
+    """
+
+    def matches(self, column: InstrumentedAttribute, text_query: Text) -> ColumnElement:
+        """Create a filter for rows whose `column` contains `text_query`.
+
+        Args:
+            column: Indexed column of a model, e.g. `MessageLog.text`.
+            text_query: Text to search for.
+
+        Returns:
+            Filter condition which can be applied to queries on the model.
+        """
+        return column.ilike(f"%{text_query}%")
+
+
+class SQLiteTextSearchBackend(TextSearchBackend):
+    """Diacritic-insensitive substring search using FTS5 trigram tables.
+
+    Queries which are shorter than a trigram can't use the index and are
+    matched with `LIKE` instead.
+    """
+
+    def __init__(self, indexed_tables: Set[Text]) -> None:
+        """Create the backend.
+
+        Args:
+            indexed_tables: Tables for which the FTS5 table and its triggers exist.
+        """
+        self.indexed_tables = indexed_tables
+
+    @staticmethod
+    def match_expression(text_query: Text) -> Text:
+        """Convert `text_query` to an FTS5 query.
+
+        Args:
+            text_query: Text without diacritics to search for.
+
+        Returns:
+            FTS5 query which matches `text_query` as substring.
+        """
+        escaped = text_query.replace('"', '""')
+        return f'"{escaped}"'
+
+    def matches(self, column: InstrumentedAttribute, text_query: Text) -> ColumnElement:
+        table = column.class_.__table__
+
+        if table.name not in self.indexed_tables:
+            return super().matches(column, text_query)
+
+        text_query = fold_diacritics(text_query)
+        if len(text_query) < SQLITE_MINIMUM_QUERY_LENGTH:
+            fold = getattr(sa.func, SQLITE_FOLD_DIACRITICS_FUNCTION)
+            return fold(column).ilike(f"%{text_query}%")
+
+        match_expression = self.match_expression(text_query)
+        fts_table = fts_table_name(table.name)
+        matching_row_ids = (
+            sa.select([sa.column("rowid")])
+            .select_from(sa.table(fts_table))
+            .where(sa.literal_column(fts_table).op("MATCH")(match_expression))
+        )
+
+        return table.c.id.in_(matching_row_ids)
+
+
+class PostgreSQLTextSearchBackend(TextSearchBackend):
+    """Diacritic-insensitive substring search using trigram indexes."""
+
+    def matches(self, column: InstrumentedAttribute, text_query: Text) -> ColumnElement:
+        unaccent = getattr(sa.func, POSTGRESQL_UNACCENT_FUNCTION)
+
+        return unaccent(sa.func.lower(column)).like(
+            unaccent(sa.func.lower(f"%{text_query}%"))
+        )
+
+
+# text search backends by database URL
+_backends: Dict[Text, TextSearchBackend] = {}
+
+
+def _sqlite_indexed_tables(session: Session) -> Set[Text]:
+    rows = session.execute(
+        sa.text("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+    )
+    existing = {name for (name,) in rows}
+
+    # Tables which are recreated by migrations lose their triggers, in which case
+    # the FTS5 table isn't in sync anymore.
+    return {
+        table
+        for table in INDEXED_COLUMNS
+        if fts_table_name(table) in existing
+        and existing.issuperset(fts_trigger_names(table))
+    }
+
+
+def _postgresql_unaccent_function_exists(session: Session) -> bool:
+    result = session.execute(
+        sa.text("SELECT 1 FROM pg_proc WHERE proname = :name"),
+        {"name": POSTGRESQL_UNACCENT_FUNCTION},
+    )
+    return result.first() is not None
+
+
+def _create_backend(session: Session) -> TextSearchBackend:
+    dialect = session.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        indexed_tables = _sqlite_indexed_tables(session)
+        if indexed_tables:
+            return SQLiteTextSearchBackend(indexed_tables)
+    elif dialect == "postgresql":
+        if _postgresql_unaccent_function_exists(session):
+            return PostgreSQLTextSearchBackend()
+
+    logger.debug(
+        f"No text search index is available for the '{dialect}' database. "
+        f"Text queries will scan the searched tables."
+    )
+    return TextSearchBackend()
+
+
+def get_backend(session: Session) -> TextSearchBackend:
+    """Get the text search backend for the database of `session`.
+
+    Which indexes are available is only determined once per database.
+
+    Args:
+        session: Database session.
+
+    Returns:
+        The text search backend.
+    """
+    url = str(session.get_bind().url)
+
+    backend = _backends.get(url)
+    if backend is None:
+        backend = _create_backend(session)
+        _backends[url] = backend
+
+    return backend
+
+
+def matches(
+    session: Session, column: InstrumentedAttribute, text_query: Text
+) -> ColumnElement:
+    """Create a filter for rows whose `column` contains `text_query`.
+
+    Args:
+        session: Database session the filter is used with.
+        column: Searched column, e.g. `MessageLog.text`.
+        text_query: Text to search for.
+
+    Returns:
+        Filter condition which uses the text search index if it's available.
+    """
+    return get_backend(session).matches(column, text_query)
@@ -21,6 +21,7 @@ from sqlalchemy.orm import sessionmaker
 import rasax.community.utils.cli as cli_utils
 import rasax.community.config as rasa_x_config
 import rasax.community.constants as constants
+from rasax.community.database import text_search
 
 logger = logging.getLogger(__name__)
 POSTGRESQL_SCHEMA = "POSTGRESQL_SCHEMA"
@@ -29,6 +30,10 @@ POSTGRESQL_MAX_OVERFLOW = "SQL_MAX_OVERFLOW"
 POSTGRESQL_DEFAULT_MAX_OVERFLOW = 100
 POSTGRESQL_DEFAULT_POOL_SIZE = 50
 
+# Maximum number of values which are bound to a single `IN` clause. SQLite limits the
+# number of bound parameters per statement.
+MAXIMUM_VALUES_PER_IN_CLAUSE = 500
+
 
 async def setup_db(app: Sanic, is_local: Optional[bool] = None) -> None:
     """Create and initialize database."""
@@ -134,6 +139,7 @@ def _on_database_connected(dbapi_connection: Any, _) -> None:
 
     if isinstance(dbapi_connection, SQLite3Connection):
         set_sqlite_pragmas(dbapi_connection, True)
+        text_search.register_sqlite_functions(dbapi_connection)
 
 
 def set_sqlite_pragmas(
@@ -1,5 +1,10 @@
-from typing import NamedTuple, Text, List
+from typing import NamedTuple, Optional, Text
 import multiprocessing as mp
+import typing
+
+if typing.TYPE_CHECKING:
+    from multiprocessing.managers import ListProxy  # pytype: disable=pyi-error
+    from rasax.community.services.websocket_brokers import MessageBroker
 
 
 class GlobalState(NamedTuple):
@@ -7,7 +12,9 @@ class GlobalState(NamedTuple):
 
     Note that we can exclude state which is shared only by Sanic workers as they are
     always created using `fork`. This means that Sanic workers will always obtain
-    a copy of the initialized state of the parent process.
+    a copy of the initialized state of the parent process. The server process which
+    forks the Sanic workers might be spawned though, which is why the state that is
+    used to coordinate the Sanic workers is included.
     """
 
     telemetry_queue: mp.Queue  # type: ignore
@@ -23,11 +30,15 @@ class GlobalState(NamedTuple):
 
     were_models_discovered: mp.Value  # type: ignore
 
-    websocket_queues: List[mp.Queue]  # type: ignore
+    websocket_message_broker: "MessageBroker"
+    sanic_worker_ids: Optional["ListProxy"]
+    number_of_sanic_workers: int
 
     timestamp_of_oldest_pending_change: mp.Value  # type: ignore
     timestamp_of_latest_pending_change: mp.Value  # type: ignore
 
+    api_token_cache_version: mp.Value  # type: ignore
+
 
 def initialize_global_state(
     number_of_sanic_workers: int, is_local_mode: bool = False
@@ -46,7 +57,11 @@ def initialize_global_state(
     import rasax.community.utils.common as common_utils
     from rasax.community.services.integrated_version_control import git_service
     from rasax.community.api.blueprints import websocket
-    from rasax.community.services import background_dump_service, model_service
+    from rasax.community.services import (
+        background_dump_service,
+        model_service,
+        user_service,
+    )
     from rasax.community import telemetry
 
     rasa_x_config.LOCAL_MODE = is_local_mode
@@ -59,6 +74,7 @@ def initialize_global_state(
     scheduler.initialize_global_state(mp_context)
     background_dump_service.initialize_global_state(mp_context)
     model_service.initialize_global_state(mp_context)
+    user_service.initialize_global_state(mp_context)
     telemetry.initialize_global_state(mp_context)
     rasa_x_config.initialize_global_state(mp_context)
 
@@ -72,10 +88,12 @@ def get_global_state() -> GlobalState:
     from rasax.community import config as rasa_x_config
     from rasax.community import telemetry, scheduler
     from rasax.community.services.integrated_version_control import git_service
+    from rasax.community.api.blueprints import websocket
     from rasax.community.services import (  # pytype: disable=pyi-error
         model_service,
         websocket_service,
         background_dump_service,
+        user_service,
     )
 
     telemetry_queue = telemetry.get_events_queue()
@@ -85,6 +103,10 @@ def get_global_state() -> GlobalState:
         is_target_branch_ahead,
     ) = git_service.get_git_global_variables()
     oldest_pending, latest_pending = background_dump_service.get_global_state()
+    (
+        sanic_worker_ids,
+        number_of_sanic_workers,
+    ) = websocket.get_global_sanic_worker_states()
 
     return GlobalState(
         telemetry_queue=telemetry_queue,
@@ -95,9 +117,12 @@ def get_global_state() -> GlobalState:
         is_local_mode=rasa_x_config.LOCAL_MODE,
         project_directory=rasa_x_config.PROJECT_DIRECTORY,
         were_models_discovered=model_service.were_models_discovered,
-        websocket_queues=websocket_service.get_message_queues(),
+        websocket_message_broker=websocket_service.get_message_broker(),
+        sanic_worker_ids=sanic_worker_ids,
+        number_of_sanic_workers=number_of_sanic_workers,
         timestamp_of_oldest_pending_change=oldest_pending,
         timestamp_of_latest_pending_change=latest_pending,
+        api_token_cache_version=user_service.api_token_cache_version,
     )
 
 
@@ -109,9 +134,11 @@ def set_global_state(state: GlobalState) -> None:
     """
     from rasax.community import scheduler, config as rasa_x_config
     from rasax.community.services.integrated_version_control import git_service
+    from rasax.community.api.blueprints import websocket
     from rasax.community.services import (  # pytype: disable=pyi-error
         background_dump_service,
         model_service,
+        user_service,
         websocket_service,
     )
     from rasax.community import telemetry
@@ -132,9 +159,13 @@ def set_global_state(state: GlobalState) -> None:
         state.timestamp_of_latest_pending_change,
     )
 
-    websocket_service.set_message_queues(state.websocket_queues)
+    websocket_service.set_message_broker(state.websocket_message_broker)
+    websocket.set_global_sanic_worker_states(
+        state.sanic_worker_ids, state.number_of_sanic_workers
+    )
 
     model_service.were_models_discovered = state.were_models_discovered
+    user_service.api_token_cache_version = state.api_token_cache_version
 
 
 def initialize_global_state_for_standalone_event_service() -> None:
@@ -1,26 +1,37 @@
 import json
 import logging
 import uuid
-from typing import Text, Optional, List, Dict, Any, Union, Tuple
+from typing import Text, Optional, List, Dict, Any, Union, Tuple, TYPE_CHECKING
 
 import math
 import time
-from sqlalchemy import func, false, distinct, Integer, cast, Float
+from sqlalchemy import func, false, distinct, Integer, cast, Float, case
+from sqlalchemy.orm import Session
 from sqlalchemy.util import KeyedTuple
 
 import rasax.community.utils.common as common_utils
 import rasax.community.config as rasa_x_config
 import rasax.community.constants as constants
 import rasax.community.tracker_utils as tracker_utils
-from rasax.community.database.analytics import ConversationSession, AnalyticsCache
+from rasax.community.database.analytics import (
+    ConversationSession,
+    ConversationSessionRollup,
+    AnalyticsCache,
+)
 from rasax.community.database.conversation import (
     MessageLog,
     ConversationEvent,
     Conversation,
 )
 from rasax.community.database.service import DbService
+from rasax.community.services.parsed_event import ParsedEvent
 from rasax.community.services.user_service import UserService
 
+if TYPE_CHECKING:
+    from rasax.community.services.conversation_metadata_cache import (
+        ConversationMetadataCache,
+    )
+
 logger = logging.getLogger(__name__)
 
 CACHED_ANALYTICS_CONFIG = {
@@ -29,6 +40,8 @@ CACHED_ANALYTICS_CONFIG = {
     "24h": {"window": "PT1H", "range": "P1D"},
 }
 
+SECONDS_PER_HOUR = 3600
+
 EMPTY_BUCKET_RESULT = KeyedTuple(
     [0, 0, 0, 0, 0, 0, 0],
     labels=[
@@ -44,6 +57,22 @@ EMPTY_BUCKET_RESULT = KeyedTuple(
 
 
 class AnalyticsService(DbService):
+    def __init__(
+        self,
+        session: Optional[Session] = None,
+        conversation_cache: Optional["ConversationMetadataCache"] = None,
+    ):
+        """Create an `AnalyticsService`.
+
+        Args:
+            session: SQLAlchemy session to use.
+            conversation_cache: If given, the latest `ConversationSession` of a
+                conversation is looked up in this cache and the cache is kept in
+                sync with new and updated sessions.
+        """
+        self.conversation_cache = conversation_cache
+        super().__init__(session)
+
     def analytics_result_with_cutoff_time(
         self,
         cache_key: Text,
@@ -103,10 +132,10 @@ class AnalyticsService(DbService):
                 window = common_utils.duration_to_seconds(v["window"])
                 start = now - common_utils.duration_to_seconds(v["range"])
 
-                for include_platform_users in [False, True]:
-                    result = analytics_service.calculate_analytics(
-                        start, now, window, platform_user_ids
-                    )
+                results = analytics_service.calculate_analytics_from_rollups(
+                    start, now, window, platform_user_ids
+                )
+                for include_platform_users, result in results.items():
                     analytics_service._persist_analytics(
                         k, result, include_platform_users
                     )
@@ -172,6 +201,126 @@ class AnalyticsService(DbService):
 
         return self._query_result_to_analytics_result(result, n_buckets, start, window)
 
+    def calculate_analytics_from_rollups(
+        self,
+        start: float,
+        until: float,
+        window: float,
+        platform_user_ids: Optional[List[Text]] = None,
+    ) -> Dict[bool, Dict[Text, Any]]:
+        """Retrieves analytics between `start` and `until` from the session rollups.
+
+        The analytics with and without the conversations of platform users are
+        calculated with a single query. Since the rollups aggregate the sessions per
+        hour, the sessions of the hour which contains `start` are counted towards
+        the first bin and `window` should be a multiple of an hour.
+
+        Args:
+            start: Start of the analysed time range as unix timestamp.
+            until: End of the analysed time range as unix timestamp.
+            window: Width of the histogram bins in seconds.
+            platform_user_ids: IDs of the conversations of platform users.
+
+        Returns:
+            Analytics results keyed by whether they include the conversations of
+            platform users.
+        """
+        n_buckets, start, until, window = self._get_histogram_parameters(
+            start, until, window
+        )
+
+        # only the rollup query is aligned to full hours, the bins start at `start`
+        rollup_start = math.floor(start / SECONDS_PER_HOUR) * SECONDS_PER_HOUR
+        hour_start = case(
+            [(ConversationSessionRollup.hour_start < start, start)],
+            else_=ConversationSessionRollup.hour_start,
+        )
+        bucket_number = self._floor((hour_start - start) / window)
+        group_by = [bucket_number]
+        if platform_user_ids:
+            is_platform_user = case(
+                [(ConversationSessionRollup.conversation_id.in_(platform_user_ids), 1)],
+                else_=0,
+            )
+            group_by.append(is_platform_user)
+
+        rows = (
+            self.query(
+                *group_by,
+                func.count(distinct(ConversationSessionRollup.conversation_id)),
+                func.sum(ConversationSessionRollup.sessions),
+                func.sum(ConversationSessionRollup.new_users),
+                func.sum(ConversationSessionRollup.user_messages),
+                func.sum(ConversationSessionRollup.bot_messages),
+                func.sum(ConversationSessionRollup.session_length),
+            )
+            .filter(
+                ConversationSessionRollup.hour_start >= rollup_start,
+                ConversationSessionRollup.hour_start <= until,
+            )
+            .group_by(*group_by)
+        )
+
+        # Conversations either belong to platform users or not, so that the counts
+        # of both groups can be added to get the counts including platform users.
+        totals = {False: {}, True: {}}
+        for row in rows:
+            bucket = int(row[0])
+            from_platform_user = bool(platform_user_ids) and bool(row[1])
+            counts = [value or 0 for value in row[len(group_by) :]]
+
+            for include_platform_users in (
+                [True] if from_platform_user else [False, True]
+            ):
+                bucket_totals = totals[include_platform_users].setdefault(
+                    bucket, [0] * len(counts)
+                )
+                for i, count in enumerate(counts):
+                    bucket_totals[i] += count
+
+        return {
+            include_platform_users: self._query_result_to_analytics_result(
+                {
+                    bucket: self._bucket_result_from_rollup_totals(*bucket_totals)
+                    for bucket, bucket_totals in buckets.items()
+                },
+                n_buckets,
+                start,
+                window,
+            )
+            for include_platform_users, buckets in totals.items()
+        }
+
+    @staticmethod
+    def _bucket_result_from_rollup_totals(
+        conversations: int,
+        sessions: int,
+        new_users: int,
+        user_messages: int,
+        bot_messages: int,
+        session_length: float,
+    ) -> KeyedTuple:
+        return KeyedTuple(
+            [
+                int(new_users),
+                int(conversations),
+                int(user_messages),
+                int(bot_messages),
+                sessions / conversations if conversations else 0,
+                float(session_length) / sessions if sessions else 0,
+                user_messages / sessions if sessions else 0,
+            ],
+            labels=EMPTY_BUCKET_RESULT.keys(),
+        )
+
+    def _floor(self, expression: Any) -> Any:
+        # SQLite doesn't have a `floor` function, but casting positive numbers to
+        # an integer truncates them
+        if self.session.get_bind().dialect.name == "sqlite":
+            return cast(expression, Integer)
+
+        return func.floor(expression)
+
     def _get_histogram_parameters(
         self,
         start: Optional[float] = None,
@@ -305,6 +454,7 @@ class AnalyticsService(DbService):
 
         if old_analytics:
             old_analytics.result = result
+            old_analytics.timestamp = time.time()
         else:
             self.add(
                 AnalyticsCache(
@@ -317,12 +467,14 @@ class AnalyticsService(DbService):
         self.commit()
 
     def save_analytics(
-        self, body: Union[Text, bytes], sender_id: Optional[Text] = None
+        self, body: Union[Text, bytes, ParsedEvent], sender_id: Optional[Text] = None,
     ) -> None:
         logger.debug(f"Saving to AnalyticsService:\n{body}")
-        event = json.loads(body)
-        if sender_id:
+        parsed_event = ParsedEvent.from_body(body)
+        event = parsed_event.event
+        if sender_id and event.get("sender_id") != sender_id:
             event["sender_id"] = sender_id
+            parsed_event.is_modified = True
 
         self.update_session_data(event)
 
@@ -340,6 +492,15 @@ class AnalyticsService(DbService):
         self._update_session(latest_session, event_name, event_timestamp, policy)
 
     def _latest_session(self, sender_id: Text) -> Optional[ConversationSession]:
+        if self.conversation_cache is not None:
+            cached = self.conversation_cache.get(self.session, sender_id)
+            latest_session_id = cached.latest_session_id
+            if latest_session_id is None:
+                return None
+
+            # primary key lookups are served from the session's identity map
+            return self.query(ConversationSession).get((sender_id, latest_session_id))
+
         return (
             self.query(ConversationSession)
             .filter(ConversationSession.conversation_id == sender_id)
@@ -368,6 +529,14 @@ class AnalyticsService(DbService):
         )
         self.add(new_session)
 
+        rollup = self._rollup_for_session(new_session)
+        rollup.sessions += 1
+        rollup.new_users += new_session.is_new_user
+
+        if self.conversation_cache is not None:
+            cached = self.conversation_cache.get(self.session, sender_id)
+            cached.sessions[session_id] = new_session.in_training_data
+
         return new_session
 
     def _update_session(
@@ -377,17 +546,69 @@ class AnalyticsService(DbService):
         event_timestamp: float,
         policy: Optional[Text],
     ):
+        rollup = self._rollup_for_session(conversation_session)
+        previous_session_length = conversation_session.session_length or 0.0
+
         conversation_session.session_length = (
             event_timestamp - conversation_session.session_start
         )
         conversation_session.latest_event_time = event_timestamp
+        rollup.session_length += (
+            conversation_session.session_length - previous_session_length
+        )
 
         if policy and conversation_session.in_training_data:
             conversation_session.in_training_data = tracker_utils.is_predicted_event_in_training_data(
                 policy
             )
 
+            if self.conversation_cache is not None:
+                cached = self.conversation_cache.get(
+                    self.session, conversation_session.conversation_id
+                )
+                cached.sessions[
+                    conversation_session.session_id
+                ] = conversation_session.in_training_data
+
         if tracker_utils.is_bot_event(event_name):
             conversation_session.bot_messages += 1
+            rollup.bot_messages += 1
         elif tracker_utils.is_user_event(event_name):
             conversation_session.user_messages += 1
+            rollup.user_messages += 1
+
+    def _rollup_for_session(
+        self, conversation_session: ConversationSession
+    ) -> ConversationSessionRollup:
+        """Get the rollup which `conversation_session` is aggregated in.
+
+        Args:
+            conversation_session: The session.
+
+        Returns:
+            The rollup of the conversation for the hour in which the session
+            started. The rollup is created if it doesn't exist yet.
+        """
+        hour_start = float(
+            math.floor(conversation_session.session_start / SECONDS_PER_HOUR)
+            * SECONDS_PER_HOUR
+        )
+        conversation_id = conversation_session.conversation_id
+
+        # primary key lookups are served from the session's identity map
+        rollup = self.query(ConversationSessionRollup).get(
+            (hour_start, conversation_id)
+        )
+        if not rollup:
+            rollup = ConversationSessionRollup(
+                hour_start=hour_start,
+                conversation_id=conversation_id,
+                sessions=0,
+                new_users=0,
+                user_messages=0,
+                bot_messages=0,
+                session_length=0.0,
+            )
+            self.add(rollup)
+
+        return rollup
@@ -0,0 +1,236 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Text
+
+from sqlalchemy.orm import Session
+
+from rasax.community.database.analytics import ConversationSession
+from rasax.community.database.conversation import (
+    ConversationActionMetadata,
+    ConversationEntityMetadata,
+    ConversationIntentMetadata,
+    ConversationPolicyMetadata,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAXIMUM_CACHED_CONVERSATIONS = 10000
+
+# number of cache lookups after which the cache metrics are logged
+LOG_METRICS_INTERVAL = 10000
+
+
+class CachedConversation:
+    """Metadata of a single conversation which is required to process its events."""
+
+    def __init__(
+        self,
+        intents: Optional[Set[Text]] = None,
+        actions: Optional[Set[Text]] = None,
+        entities: Optional[Set[Text]] = None,
+        policies: Optional[Set[Text]] = None,
+        sessions: Optional[Dict[int, bool]] = None,
+    ) -> None:
+        """Create the cached metadata of a conversation.
+
+        Args:
+            intents: Unique intents which were used in the conversation.
+            actions: Unique actions which were used in the conversation.
+            entities: Unique entities which were used in the conversation.
+            policies: Unique policies which were used in the conversation.
+            sessions: Mapping of `ConversationSession` IDs to their
+                `in_training_data` value.
+        """
+        self.intents = intents or set()
+        self.actions = actions or set()
+        self.entities = entities or set()
+        self.policies = policies or set()
+        self.sessions = sessions or {}
+        # `Conversation.latest_event_time` as it was set by the event consumer
+        self.latest_event_time: Optional[float] = None
+
+    @classmethod
+    def from_database(cls, session: Session, sender_id: Text) -> "CachedConversation":
+        """Load the metadata of the conversation `sender_id` from the database.
+
+        Args:
+            session: Database session to use.
+            sender_id: ID of the conversation.
+
+        Returns:
+            The metadata of the conversation.
+        """
+
+        def _values(column, conversation_id_column) -> Set[Text]:
+            rows = session.query(column).filter(conversation_id_column == sender_id)
+            return {value for (value,) in rows}
+
+        # noinspection PyTypeChecker
+        sessions = session.query(
+            ConversationSession.session_id, ConversationSession.in_training_data
+        ).filter(ConversationSession.conversation_id == sender_id)
+
+        return cls(
+            intents=_values(
+                ConversationIntentMetadata.intent,
+                ConversationIntentMetadata.conversation_id,
+            ),
+            actions=_values(
+                ConversationActionMetadata.action,
+                ConversationActionMetadata.conversation_id,
+            ),
+            entities=_values(
+                ConversationEntityMetadata.entity,
+                ConversationEntityMetadata.conversation_id,
+            ),
+            policies=_values(
+                ConversationPolicyMetadata.policy,
+                ConversationPolicyMetadata.conversation_id,
+            ),
+            sessions={
+                session_id: bool(in_training_data)
+                for session_id, in_training_data in sessions
+            },
+        )
+
+    @property
+    def latest_session_id(self) -> Optional[int]:
+        """ID of the latest `ConversationSession` or `None` if there is none."""
+        return max(self.sessions) if self.sessions else None
+
+    @property
+    def number_of_sessions(self) -> int:
+        """Number of `ConversationSession`s of the conversation."""
+        return len(self.sessions)
+
+    def session_ids_in_training_data(self) -> List[int]:
+        """IDs of the `ConversationSession`s which are in the training data."""
+        return [
+            session_id
+            for session_id, in_training_data in self.sessions.items()
+            if in_training_data
+        ]
+
+    def is_latest_session_in_training_data(self) -> bool:
+        """Whether the latest `ConversationSession` is in the training data."""
+        latest_session_id = self.latest_session_id
+        if latest_session_id is None:
+            return False
+
+        return self.sessions[latest_session_id]
+
+
+class ConversationMetadataCache:
+    """Bounded LRU cache of `CachedConversation`s keyed by `sender_id`.
+
+    The cache lives inside an event consumer process. Entries are replaced when the
+    conversation is (re-)created, and the whole cache has to be cleared whenever a
+    transaction is rolled back since the cached state might include rolled back
+    changes. The cache also has to be cleared whenever the consumer might start
+    processing conversations which were processed by another consumer before (e.g.
+    when Kafka partitions are reassigned).
+
+    Changes done by other processes (e.g. the API deleting and re-creating a
+    conversation) are detected with `invalidate_if_changed`: every event updates
+    `Conversation.latest_event_time`, so a different value than the one the
+    consumer wrote means that someone else changed the conversation.
+    """
+
+    def __init__(self, maximum_size: int = DEFAULT_MAXIMUM_CACHED_CONVERSATIONS):
+        """Create an empty cache.
+
+        Args:
+            maximum_size: Maximum number of cached conversations. The least
+                recently used conversation is evicted once this size is exceeded.
+        """
+        self.maximum_size = maximum_size
+        self._entries: "OrderedDict[Text, CachedConversation]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, session: Session, sender_id: Text) -> CachedConversation:
+        """Get the cached metadata for `sender_id`.
+
+        The metadata is loaded from the database in case of a cache miss.
+
+        Args:
+            session: Database session to load the metadata with on a cache miss.
+            sender_id: ID of the conversation.
+
+        Returns:
+            The metadata of the conversation.
+        """
+        entry = self._entries.get(sender_id)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(sender_id)
+        else:
+            self.misses += 1
+            entry = CachedConversation.from_database(session, sender_id)
+            self.put(sender_id, entry)
+
+        if (self.hits + self.misses) % LOG_METRICS_INTERVAL == 0:
+            logger.debug(f"Conversation metadata cache metrics: {self.metrics()}.")
+
+        return entry
+
+    def put(self, sender_id: Text, entry: CachedConversation) -> None:
+        """Store `entry` for `sender_id` and evict the least recently used entry.
+
+        Args:
+            sender_id: ID of the conversation.
+            entry: Metadata of the conversation.
+        """
+        self._entries[sender_id] = entry
+        self._entries.move_to_end(sender_id)
+
+        while len(self._entries) > self.maximum_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, sender_id: Text) -> None:
+        """Remove the cached metadata of `sender_id`.
+
+        Args:
+            sender_id: ID of the conversation.
+        """
+        self._entries.pop(sender_id, None)
+
+    def invalidate_if_changed(
+        self, sender_id: Text, latest_event_time: Optional[float]
+    ) -> None:
+        """Remove the cached metadata of `sender_id` if it was changed by others.
+
+        Args:
+            sender_id: ID of the conversation.
+            latest_event_time: The current `latest_event_time` of the conversation
+                in the database.
+        """
+        entry = self._entries.get(sender_id)
+        if entry is not None and entry.latest_event_time != latest_event_time:
+            self.invalidate(sender_id)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups which were answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def metrics(self) -> Dict[Text, float]:
+        """Return the cache metrics.
+
+        Returns:
+            Number of hits, misses, cached entries and the hit rate.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hit_rate,
+        }
@@ -3,13 +3,25 @@ import logging
 import os
 import time
 from collections import defaultdict
-from typing import Text, Dict, List, Union, Any, Optional, Tuple, Set, Iterable
+from typing import (
+    Text,
+    Dict,
+    List,
+    Union,
+    Any,
+    Optional,
+    Tuple,
+    Set,
+    Iterable,
+    Iterator,
+)
 
 from sanic.request import Request
 
 import rasa.shared.nlu.training_data.training_data as nlu_data
 import rasax.community.config as rasa_x_config
 import rasax.community.constants as constants
+import rasax.community.data
 import rasax.community.utils.cli as cli_utils
 import rasax.community.utils.common as common_utils
 import rasax.community.utils.io as io_utils
@@ -22,19 +34,32 @@ from rasax.community.database.data import (
     TrainingDataEntity,
     RegexFeature,
     LookupTable,
+    LookupTableElement,
     EntitySynonym,
     EntitySynonymValue,
 )
 from rasax.community.database.service import DbService
+from rasax.community.database import text_search
+from rasax.community.database import utils as db_utils
 from rasax.community.initialise import _read_data  # pytype: disable=pyi-error
-from rasax.community.services import background_dump_service
+from rasax.community.services import background_dump_service, nlu_dump_cache
 from sqlalchemy import and_, func
+from sqlalchemy.orm import selectinload
 
 from rasa.shared.nlu.training_data import loading
 from rasa.shared.nlu.training_data.formats import MarkdownReader, RasaYAMLReader
+from rasa.shared.nlu.training_data.formats.markdown import LOOKUP
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of changed intents whose examples are read with separate filters
+# when an NLU file is dumped. If more intents changed, all examples are read.
+MAXIMUM_INTENTS_TO_RELOAD_SEPARATELY = 100
+
+# Number of lookup table elements which are inserted with a single statement and
+# which are fetched at once when the elements are streamed.
+LOOKUP_TABLE_ELEMENTS_PER_BATCH = 10000
+
 
 # TODO: This value was originally imported from rasa.nlu.constants, but it was
 # removed in Rasa OSS 2.0.0a3 (https://github.com/RasaHQ/rasa/pull/6466).
@@ -104,7 +129,9 @@ class DataService(DbService):
             query = True
 
         if text_query:
-            query = and_(query, TrainingData.text.ilike(f"%{text_query}%"))
+            query = and_(
+                query, text_search.matches(self.session, TrainingData.text, text_query)
+            )
 
         if filename:
             query = and_(query, TrainingData.filename == filename)
@@ -143,6 +170,8 @@ class DataService(DbService):
         project_id: Text,
         file_name: Optional[Text] = None,
         should_include_lookup_table_entries: bool = False,
+        use_cached_examples: bool = False,
+        should_include_lookup_tables: bool = True,
     ) -> Dict[Text, Dict[Text, Any]]:
         """Return training data in NLU format.
 
@@ -152,15 +181,29 @@ class DataService(DbService):
             should_include_lookup_table_entries: If `True` the training data includes
                 the entries of `LookupTable`s. If `False` it just includes the
                 abbreviated form with a file reference as element.
+            use_cached_examples: If `True` the training examples of `file_name` are
+                taken from the examples cache, which only re-reads changed intents.
+            should_include_lookup_tables: If `False` the training data doesn't
+                include any lookup tables, e.g. since they are streamed separately
+                using `get_lookup_tables_as_markdown`.
 
         Returns:
              Combined contents of `training_data`, `regex_features`,
             `entity_synonyms` and `lookup_tables`.
         """
 
-        training_examples, _ = self.get_training_data(project_id, filename=file_name)
+        if use_cached_examples and file_name:
+            training_examples = self._get_training_examples_of_file(
+                project_id, file_name
+            )
+        else:
+            training_examples, _ = self.get_training_data(
+                project_id, filename=file_name
+            )
         regex_features, _ = self.get_regex_features(project_id, filename=file_name)
-        if should_include_lookup_table_entries:
+        if not should_include_lookup_tables:
+            lookup_tables = []
+        elif should_include_lookup_table_entries:
             lookup_tables = self.get_lookup_tables_with_elements(project_id)
         else:
             lookup_tables = self.get_lookup_tables(project_id, filename=file_name)
@@ -354,6 +397,191 @@ class DataService(DbService):
 
         return new_example
 
+    def save_examples(
+        self,
+        username: Text,
+        project_id: Text,
+        examples: List[Dict[Text, Any]],
+        dump_data: bool = True,
+        add_example_items_to_domain: bool = True,
+    ) -> List[Dict[Text, Any]]:
+        """Saves training examples or updates them if the examples already exist.
+
+        This has the same effect as calling `save_example` for each example. The
+        filenames, existing examples and entity synonyms are looked up for all examples
+        at once, the domain is updated once and the matching message logs are marked
+        with a single update.
+
+        Args:
+            username: Name of the user who annotated the examples.
+            project_id: Project id of the training examples.
+            examples: The training examples.
+            dump_data: `True` if the changed NLU files should be dumped.
+            add_example_items_to_domain: `True` if the intents and entities of the
+                examples should be added to the domain.
+
+        Returns:
+            The saved examples in the order of `examples`.
+        """
+
+        if not examples:
+            return []
+
+        filenames = self._assign_filenames_based_on_intents(
+            {example.get("intent") for example in examples}, project_id
+        )
+        existing_by_id = self._get_training_examples_by_ids(
+            [example["id"] for example in examples if example.get("id") is not None]
+        )
+        existing_by_hash = self._get_examples_by_hashes(
+            project_id,
+            [
+                common_utils.get_text_hash(example.get("text", ""))
+                for example in examples
+                if example.get("id") is None
+            ],
+        )
+        entity_synonym_ids = self._get_entity_synonym_ids_by_value(
+            [
+                training_data_dict_get_entity(example, e.get("start"), e.get("end"))
+                for example in examples
+                for e in example.get("entities", [])
+            ]
+        )
+
+        saved_examples = []
+        nlu_files_to_dump = set()
+        for example in examples:
+            filename = filenames[example.get("intent")]
+            text_hash = common_utils.get_text_hash(example.get("text", ""))
+
+            if example.get("id") is not None:
+                existing_example = existing_by_id.get(str(example["id"]))
+            else:
+                existing_example = existing_by_hash.get(text_hash)
+
+            updated = self._training_data_object_from_dict(
+                example, project_id, filename, username, entity_synonym_ids
+            )
+            if existing_example:
+                nlu_files_to_dump.add(existing_example.filename)
+                _update_training_example(existing_example, updated)
+                updated = existing_example
+            else:
+                self.add(updated)
+
+            # later examples with the same text replace this example
+            existing_by_hash[updated.hash] = updated
+            nlu_files_to_dump.add(filename)
+            saved_examples.append(updated)
+
+        self.flush()  # flush to get the example ids
+
+        if dump_data:
+            background_dump_service.add_nlu_changes(nlu_files_to_dump)
+
+        if add_example_items_to_domain:
+            self._add_intents_and_entities_to_domain(examples, project_id, username)
+
+        from rasax.community.services.logs_service import LogsService
+
+        LogsService(self.session).mark_logs_as_in_training_data(
+            example.hash for example in saved_examples
+        )
+
+        return [example.as_dict() for example in saved_examples]
+
+    def _assign_filenames_based_on_intents(
+        self, intents: Set[Text], project_id: Text
+    ) -> Dict[Text, Text]:
+        """Assign a filename to each intent (see `assign_filename_based_on_intent`).
+
+        Args:
+            intents: Intents of the examples.
+            project_id: Project the examples belong to.
+
+        Returns:
+            File which already stores examples of the intent or the oldest NLU file
+            by intent.
+        """
+
+        filenames = {}
+        for chunk in common_utils.chunks(
+            list(intents), db_utils.MAXIMUM_VALUES_PER_IN_CLAUSE
+        ):
+            filenames.update(
+                self.query(TrainingData.intent, func.min(TrainingData.filename))
+                .filter(
+                    TrainingData.project_id == project_id,
+                    TrainingData.intent.in_(chunk),
+                )
+                .group_by(TrainingData.intent)
+            )
+
+        intents_without_file = [i for i in intents if not filenames.get(i)]
+        if intents_without_file:
+            default_filename = self.assign_filename(project_id)
+            for intent in intents_without_file:
+                filenames[intent] = default_filename
+
+        return filenames
+
+    def _get_training_examples_by_ids(
+        self, ids: List[Union[int, Text]]
+    ) -> Dict[Text, TrainingData]:
+        # IDs can be passed as numbers or strings, hence they are keyed as strings
+        examples = {}
+        for chunk in common_utils.chunks(ids, db_utils.MAXIMUM_VALUES_PER_IN_CLAUSE):
+            for example in self.query(TrainingData).filter(TrainingData.id.in_(chunk)):
+                examples[str(example.id)] = example
+
+        return examples
+
+    def _get_examples_by_hashes(
+        self, project_id: Text, hashes: List[Text]
+    ) -> Dict[Text, TrainingData]:
+        examples = {}
+        for chunk in common_utils.chunks(
+            list(set(hashes)), db_utils.MAXIMUM_VALUES_PER_IN_CLAUSE
+        ):
+            for example in (
+                self.query(TrainingData)
+                .filter(
+                    TrainingData.project_id == project_id, TrainingData.hash.in_(chunk),
+                )
+                .order_by(TrainingData.id.asc())
+            ):
+                examples.setdefault(example.hash, example)
+
+        return examples
+
+    def _get_entity_synonym_ids_by_value(
+        self, original_values: List[Text]
+    ) -> Dict[Text, int]:
+        """Find the entity synonyms which the given entity values are mapped to.
+
+        Args:
+            original_values: Entity values as they appear in the training examples.
+
+        Returns:
+            The IDs of the entity synonyms by the mapped values.
+        """
+
+        synonym_ids = {}
+        for chunk in common_utils.chunks(
+            list(set(original_values)), db_utils.MAXIMUM_VALUES_PER_IN_CLAUSE
+        ):
+            for name, entity_synonym_id in (
+                self.query(
+                    EntitySynonymValue.name, EntitySynonymValue.entity_synonym_id
+                )
+                .filter(EntitySynonymValue.name.in_(chunk))
+                .order_by(EntitySynonymValue.id.asc())
+            ):
+                synonym_ids.setdefault(name, entity_synonym_id)
+
+        return synonym_ids
+
     def _get_training_example_by_id(self, _id: int) -> Optional[TrainingData]:
         """Get `TrainingData` object for `_id`."""
         return self.query(TrainingData).filter(TrainingData.id == _id).first()
@@ -469,16 +697,112 @@ class DataService(DbService):
     def dump_nlu_data(
         self, project: Text, files: Optional[Iterable[Text]] = None
     ) -> None:
-        """Dump Rasa NLU data in database to file at `path`."""
+        """Dump Rasa NLU data in database to file at `path`.
+
+        Only the examples of intents which changed since the previous dump are read
+        from the database. Files whose content didn't change aren't written.
+        """
 
         if not files:
             files = self.get_all_filenames(project)
 
         for file_name in files:
             logger.debug(f"Dumping NLU data to file '{file_name}'.")
-            training_data = self.get_nlu_training_data_object(project, file_name)
-            directory = os.path.dirname(file_name) or "."
-            training_data.persist(directory, os.path.basename(file_name))
+            training_data = RasaReader().read_from_json(
+                self.create_formatted_training_data(
+                    project, file_name, use_cached_examples=True
+                )
+            )
+            content = _serialise_nlu_data(training_data, file_name)
+
+            if not io_utils.write_file_if_changed(file_name, content):
+                logger.debug(f"NLU data in file '{file_name}' is up to date.")
+
+    def _get_training_examples_of_file(
+        self, project_id: Text, filename: Text
+    ) -> List[Dict[Text, Any]]:
+        """Get the training examples of an NLU file using the examples cache.
+
+        Only the examples of intents whose fingerprint changed since they were cached
+        are read from the database.
+
+        Args:
+            project_id: Project id of the training data.
+            filename: Path of the NLU file.
+
+        Returns:
+            The training examples of the file sorted by their ID.
+        """
+        fingerprints = {
+            intent: (count, max_id, latest_annotation)
+            for intent, count, max_id, latest_annotation in (
+                self.query(
+                    TrainingData.intent,
+                    func.count(TrainingData.id),
+                    func.max(TrainingData.id),
+                    func.max(TrainingData.annotated_at),
+                )
+                .filter(
+                    TrainingData.project_id == project_id,
+                    TrainingData.filename == filename,
+                )
+                .group_by(TrainingData.intent)
+            )
+        }
+
+        cached = nlu_dump_cache.training_example_cache.get(project_id, filename)
+        changed_intents = {
+            intent
+            for intent, fingerprint in fingerprints.items()
+            if intent not in cached or cached[intent].fingerprint != fingerprint
+        }
+
+        examples = self.query(TrainingData).filter(
+            TrainingData.project_id == project_id, TrainingData.filename == filename
+        )
+        # Read all examples at once rather than with a huge `IN` clause. Examples
+        # without intent can't be matched with an `IN` clause either.
+        if (
+            None not in changed_intents
+            and len(changed_intents) <= MAXIMUM_INTENTS_TO_RELOAD_SEPARATELY
+        ):
+            examples = examples.filter(TrainingData.intent.in_(changed_intents))
+
+        reloaded: Dict[Text, List[Tuple[int, Dict[Text, Any]]]] = defaultdict(list)
+        if changed_intents:
+            for example in examples.order_by(TrainingData.id.asc()):
+                reloaded[example.intent].append(
+                    (
+                        example.id,
+                        {
+                            "text": example.text,
+                            "intent": example.intent,
+                            "entities": [e.as_dict() for e in example.entities],
+                        },
+                    )
+                )
+
+        intents = {
+            intent: (
+                nlu_dump_cache.CachedIntentExamples(fingerprint, reloaded[intent])
+                if intent in changed_intents
+                else cached[intent]
+            )
+            for intent, fingerprint in fingerprints.items()
+        }
+        nlu_dump_cache.training_example_cache.set(project_id, filename, intents)
+
+        return [
+            example
+            for _, example in sorted(
+                (
+                    identified_example
+                    for cached_intent in intents.values()
+                    for identified_example in cached_intent.examples
+                ),
+                key=lambda identified_example: identified_example[0],
+            )
+        ]
 
     def _get_example_by_hash(
         self, project_id: Text, _hash: Text
@@ -611,6 +935,12 @@ class DataService(DbService):
             project_id: ID of the project.
         """
         self.query(RegexFeature).filter(RegexFeature.project_id == project_id).delete()
+        lookup_table_ids = self.query(LookupTable.id).filter(
+            LookupTable.project_id == project_id
+        )
+        self.query(LookupTableElement).filter(
+            LookupTableElement.lookup_table_id.in_(lookup_table_ids.subquery())
+        ).delete(synchronize_session=False)
         self.query(LookupTable).filter(LookupTable.project_id == project_id).delete()
         self.query(EntitySynonym).filter(
             EntitySynonym.project_id == project_id
@@ -642,12 +972,14 @@ class DataService(DbService):
         ]
 
         lookup_tables = [
-            LookupTable(
-                name=table.get("name"),
-                number_of_elements=len(table.get("elements", [])),
-                elements=json.dumps(table.get("elements", [])),
-                project_id=project_id,
-                referencing_nlu_file=filename,
+            (
+                LookupTable(
+                    name=table.get("name"),
+                    number_of_elements=len(table.get("elements", [])),
+                    project_id=project_id,
+                    referencing_nlu_file=filename,
+                ),
+                table.get("elements", []),
             )
             for table in training_data.lookup_tables
             # Ignore lookup tables that contain a filename as "elements"
@@ -656,7 +988,11 @@ class DataService(DbService):
 
         # insert new entries
         self.bulk_save_objects(regex_features)
-        self.bulk_save_objects(lookup_tables)
+        self.add_all([lookup_table for lookup_table, _ in lookup_tables])
+        # Flush to assign the IDs of the lookup tables
+        self.flush()
+        for lookup_table, elements in lookup_tables:
+            self._save_lookup_table_elements(lookup_table.id, elements)
         self._bulk_save_entity_synonyms(
             project_id, training_data.entity_synonyms, filename
         )
@@ -790,65 +1126,81 @@ class DataService(DbService):
             for entity_synonym in entity_synonyms
         ]
 
-    def _entity_synonym_value_use_count(
-        self, entity_synonym_value: EntitySynonymValue
-    ) -> int:
-        """Given a single synonym mapped value, calculate how many times
-        its text value is used in the NLU training data.
-
-        Args:
-            entity_synonym_value: The mapped value on which to operate on.
-
-        Returns:
-            Number representing the number of times the text value of the
-                mapped value is used in the NLU training data.
-        """
-
-        return (
-            self.query(TrainingDataEntity)
-            .filter(TrainingDataEntity.original_value == entity_synonym_value.name)
-            .count()
-        )
-
     def _entity_synonym_values_use_counts(
-        self, entity_synonym: EntitySynonym
-    ) -> Dict[Text, int]:
-        """Given an entity synonym, calculate how many times each of its mapped values
-        are used in the NLU training data.
+        self,
+        project_id: Text,
+        filename: Optional[Text] = None,
+        entity_synonym_id: Optional[int] = None,
+    ) -> Dict[int, int]:
+        """Calculate how many times each mapped value of the entity synonyms is used
+        in the NLU training data.
+
+        The use counts of all matching mapped values are calculated with a single
+        grouped query.
 
         Args:
-            entity_synonym: The entity synonym on which to operate on.
+            project_id: Filter entity synonyms by project ID.
+            filename: Filter entity synonyms by the filename on which they were
+                defined.
+            entity_synonym_id: Only calculate the use counts of the mapped values of
+                this entity synonym.
 
         Returns:
             A dictionary containing the use count of each mapped value, using
                 the mapped value's ID as key.
         """
 
-        example_counts = {}
+        use_counts = (
+            self.query(EntitySynonymValue.id, func.count(TrainingDataEntity.id))
+            .join(
+                EntitySynonym, EntitySynonym.id == EntitySynonymValue.entity_synonym_id
+            )
+            .outerjoin(
+                TrainingDataEntity,
+                TrainingDataEntity.original_value == EntitySynonymValue.name,
+            )
+            .filter(EntitySynonym.project_id == project_id)
+        )
+
+        if filename:
+            use_counts = use_counts.filter(EntitySynonym.filename == filename)
+        if entity_synonym_id is not None:
+            use_counts = use_counts.filter(EntitySynonym.id == entity_synonym_id)
 
-        for entity_synonym_value in entity_synonym.synonym_values:
-            example_counts[
-                entity_synonym_value.id
-            ] = self._entity_synonym_value_use_count(entity_synonym_value)
+        return dict(use_counts.group_by(EntitySynonymValue.id))
 
-        return example_counts
+    @staticmethod
+    def _entity_synonym_as_dict(
+        entity_synonym: EntitySynonym, use_counts: Dict[int, int]
+    ) -> Dict[Text, Any]:
+        return entity_synonym.as_dict(
+            {
+                value.id: use_counts.get(value.id, 0)
+                for value in entity_synonym.synonym_values
+            }
+        )
 
     def _api_consumers_format_entity_synonyms(
-        self, entity_synonyms: List[EntitySynonym]
+        self,
+        entity_synonyms: List[EntitySynonym],
+        project_id: Text,
+        filename: Optional[Text] = None,
     ) -> List[Dict[Text, Any]]:
         """Format entity synonyms into shape expected by consumers of the Rasa X API.
 
         Args:
             entity_synonyms: List of entity synonyms to format.
+            project_id: Project ID which the entity synonyms were filtered by.
+            filename: Filename which the entity synonyms were filtered by.
 
         Returns:
             List of entity synonyms in a JSON-like format.
         """
 
+        use_counts = self._entity_synonym_values_use_counts(project_id, filename)
+
         return [
-            entity_synonym.as_dict(
-                self._entity_synonym_values_use_counts(entity_synonym)
-            )
+            self._entity_synonym_as_dict(entity_synonym, use_counts)
             for entity_synonym in entity_synonyms
         ]
 
@@ -876,11 +1228,17 @@ class DataService(DbService):
         if filename:
             entity_synonyms = entity_synonyms.filter(EntitySynonym.filename == filename)
 
-        entity_synonyms = entity_synonyms.order_by(EntitySynonym.id.asc()).all()
+        entity_synonyms = (
+            entity_synonyms.options(selectinload(EntitySynonym.synonym_values))
+            .order_by(EntitySynonym.id.asc())
+            .all()
+        )
         if nlu_format:
             return self._rasa_reader_format_entity_synonyms(entity_synonyms)
 
-        return self._api_consumers_format_entity_synonyms(entity_synonyms)
+        return self._api_consumers_format_entity_synonyms(
+            entity_synonyms, project_id, filename
+        )
 
     def _get_entity_synonym(
         self, project_id: Text, entity_synonym_id: int
@@ -921,8 +1279,11 @@ class DataService(DbService):
         entity_synonym = self._get_entity_synonym(project_id, entity_synonym_id)
 
         if entity_synonym:
-            return entity_synonym.as_dict(
-                self._entity_synonym_values_use_counts(entity_synonym)
+            return self._entity_synonym_as_dict(
+                entity_synonym,
+                self._entity_synonym_values_use_counts(
+                    project_id, entity_synonym_id=entity_synonym.id
+                ),
             )
 
         return None
@@ -1258,8 +1619,12 @@ class DataService(DbService):
         )
         self.flush()
 
+        use_counts = self._entity_synonym_values_use_counts(
+            project_id, entity_synonym_id=entity_synonym.id
+        )
+
         return [
-            value.as_dict(self._entity_synonym_value_use_count(value))
+            value.as_dict(use_counts.get(value.id, 0))
             for value in entity_synonym_values
         ]
 
@@ -1427,10 +1792,79 @@ class DataService(DbService):
         )
 
         return [
-            {"name": table.name, "elements": json.loads(table.elements)}
+            {
+                "name": table.name,
+                "elements": list(self._stream_lookup_table_elements(table.id)),
+            }
             for table in lookup_tables
         ]
 
+    def get_lookup_tables_as_markdown(self, project_id: Text) -> Iterator[Text]:
+        """Stream the lookup tables of a project including all their elements.
+
+        The elements are read from the database in batches, so that large lookup
+        tables never have to be loaded entirely.
+
+        Args:
+            project_id: the id of the project this data belongs to.
+
+        Returns:
+            Chunks of the lookup tables in the Markdown NLU training data format. Each
+            chunk starts with a newline so that the chunks can be appended to other
+            Markdown NLU training data.
+        """
+
+        lookup_tables = (
+            self.query(LookupTable.id, LookupTable.name)
+            .filter(LookupTable.project_id == project_id)
+            .order_by(LookupTable.id.asc())
+            .all()
+        )
+
+        for lookup_table_id, name in lookup_tables:
+            yield f"\n\n## {LOOKUP}:{name}"
+
+            elements = self._stream_lookup_table_elements(lookup_table_id)
+            batch = []
+            for element in elements:
+                batch.append(element)
+                if len(batch) == LOOKUP_TABLE_ELEMENTS_PER_BATCH:
+                    yield "".join(f"\n- {element}" for element in batch)
+                    batch = []
+
+            if batch:
+                yield "".join(f"\n- {element}" for element in batch)
+
+    def _stream_lookup_table_elements(self, lookup_table_id: int) -> Iterator[Text]:
+        elements = (
+            self.query(LookupTableElement.element)
+            .filter(LookupTableElement.lookup_table_id == lookup_table_id)
+            .order_by(LookupTableElement.position.asc())
+            .yield_per(LOOKUP_TABLE_ELEMENTS_PER_BATCH)
+        )
+
+        for (element,) in elements:
+            yield element
+
+    def _save_lookup_table_elements(
+        self, lookup_table_id: int, elements: List[Text]
+    ) -> None:
+        for start in range(0, len(elements), LOOKUP_TABLE_ELEMENTS_PER_BATCH):
+            self.session.bulk_insert_mappings(
+                LookupTableElement,
+                [
+                    {
+                        "lookup_table_id": lookup_table_id,
+                        "position": position,
+                        "element": element,
+                    }
+                    for position, element in enumerate(
+                        elements[start : start + LOOKUP_TABLE_ELEMENTS_PER_BATCH],
+                        start,
+                    )
+                ],
+            )
+
     def save_lookup_table(
         self,
         filename: Text,
@@ -1461,12 +1895,12 @@ class DataService(DbService):
             project_id=project_id,
             name=filename,
             referencing_nlu_file=nlu_filename,
-            elements=json.dumps(elements),
             number_of_elements=len(elements),
         )
         self.add(new)
         # Flush to assign id
         self.flush()
+        self._save_lookup_table_elements(new.id, elements)
 
         if dump_data:
             background_dump_service.add_lookup_table_change(
@@ -1489,11 +1923,55 @@ class DataService(DbService):
         """
 
         item = self._get_lookup_table_by_id(lookup_table_id)
-        return self._format_lookup_table_elements_as_text(item)
+        return "\n".join(self._stream_lookup_table_elements(item.id))
 
-    @staticmethod
-    def _format_lookup_table_elements_as_text(lookup_table: LookupTable) -> Text:
-        return "\n".join(json.loads(lookup_table.elements))
+    def get_lookup_table_elements(
+        self,
+        lookup_table_id: int,
+        text_query: Optional[Text] = None,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> common_utils.QueryResult:
+        """Get a page of the elements of a lookup table.
+
+        Args:
+            lookup_table_id: the id of the lookup table whose elements should be
+                retrieved.
+            text_query: Only return elements which contain this text.
+            offset: Return elements after the `offset`th element.
+            limit: Return a maximum number of `limit` elements.
+
+        Returns:
+            The elements with their positions in the lookup table, and the total
+            number of elements which match `text_query`.
+
+        Raises:
+            ValueError: raised if no lookup table with this id exists
+        """
+
+        self._get_lookup_table_by_id(lookup_table_id)
+
+        elements = self.query(LookupTableElement).filter(
+            LookupTableElement.lookup_table_id == lookup_table_id
+        )
+        if text_query:
+            elements = elements.filter(
+                text_search.matches(
+                    self.session, LookupTableElement.element, text_query
+                )
+            )
+
+        total_number_of_elements = elements.count()
+
+        elements = (
+            elements.order_by(LookupTableElement.position.asc())
+            .offset(offset)
+            .limit(limit)
+        )
+
+        return common_utils.QueryResult(
+            [element.as_dict() for element in elements], total_number_of_elements
+        )
 
     def dump_lookup_tables(self, lookup_table_ids: Set[int]) -> None:
         """Dump lookup tables with the given IDs to disk.
@@ -1506,8 +1984,10 @@ class DataService(DbService):
 
     def _dump_lookup_table_content(self, lookup_table_id: int) -> None:
         lookup_table = self._get_lookup_table_by_id(lookup_table_id)
-        formatted = self._format_lookup_table_elements_as_text(lookup_table)
-        io_utils.write_file(lookup_table.absolute_file_path, formatted)
+        io_utils.write_lines_atomically(
+            lookup_table.absolute_file_path,
+            self._stream_lookup_table_elements(lookup_table.id),
+        )
 
     def _get_lookup_table_by_id(self, lookup_table_id: int) -> LookupTable:
         item = self.query(LookupTable).filter(LookupTable.id == lookup_table_id).first()
@@ -1529,6 +2009,9 @@ class DataService(DbService):
         """
 
         to_delete = self._get_lookup_table_by_id(lookup_table_id)
+        self.query(LookupTableElement).filter(
+            LookupTableElement.lookup_table_id == to_delete.id
+        ).delete()
         self.delete(to_delete)
 
         self._delete_lookup_table_on_file_system(to_delete.absolute_file_path)
@@ -1859,6 +2342,7 @@ class DataService(DbService):
         project_id: Text,
         filename: Optional[Text] = None,
         should_include_lookup_table_entries: bool = False,
+        should_include_lookup_tables: bool = True,
     ) -> NluTrainingData:
         """Get an NLU `TrainingData` object from training data stored in the database.
 
@@ -1868,15 +2352,25 @@ class DataService(DbService):
             should_include_lookup_table_entries: `True` includes the elements of the lookup
                 tables in the data, `False` only adds the file links of the lookup
                 tables.
+            should_include_lookup_tables: `False` excludes the lookup tables from the
+                data.
         """
 
         combined_nlu_data = self.create_formatted_training_data(
-            project_id, filename, should_include_lookup_table_entries
+            project_id,
+            filename,
+            should_include_lookup_table_entries,
+            should_include_lookup_tables=should_include_lookup_tables,
         )
         return RasaReader().read_from_json(combined_nlu_data)
 
     def _training_data_object_from_dict(
-        self, data: Dict[Text, Any], project_id: Text, filename: Text, username: Text
+        self,
+        data: Dict[Text, Any],
+        project_id: Text,
+        filename: Text,
+        username: Text,
+        entity_synonym_ids: Optional[Dict[Text, int]] = None,
     ) -> TrainingData:
         _hash = common_utils.get_text_hash(data.get("text"))
         entities = []
@@ -1889,11 +2383,19 @@ class DataService(DbService):
             # TODO: Should we also create new synonym / synonym values here?
 
             # Check if one of the stored synonyms was used
-            matching_synonym_value = (
-                self.query(EntitySynonymValue)
-                .filter(EntitySynonymValue.name == original_value)
-                .first()
-            )
+            if entity_synonym_ids is not None:
+                entity_synonym_id = entity_synonym_ids.get(original_value)
+            else:
+                matching_synonym_value = (
+                    self.query(EntitySynonymValue)
+                    .filter(EntitySynonymValue.name == original_value)
+                    .first()
+                )
+                entity_synonym_id = (
+                    matching_synonym_value.entity_synonym_id
+                    if matching_synonym_value
+                    else None
+                )
 
             entity = TrainingDataEntity(
                 start=start,
@@ -1902,9 +2404,7 @@ class DataService(DbService):
                 value=e.get("value"),
                 original_value=original_value,
                 extractor=e.get("extractor"),
-                entity_synonym_id=matching_synonym_value.entity_synonym_id
-                if matching_synonym_value
-                else None,
+                entity_synonym_id=entity_synonym_id,
             )
 
             entities.append(entity)
@@ -1970,6 +2470,48 @@ def format_entities(example: Dict[Text, Any]) -> List[Dict[Text, Any]]:
     return ents
 
 
+def _update_training_example(existing: TrainingData, updated: TrainingData) -> None:
+    """Replace the content of a stored training example.
+
+    Args:
+        existing: The stored training example.
+        updated: Transient training example with the new content.
+    """
+    existing.hash = updated.hash
+    existing.text = updated.text
+    existing.intent = updated.intent
+    existing.annotator_id = updated.annotator_id
+    existing.annotated_at = updated.annotated_at
+    existing.project_id = updated.project_id
+    existing.filename = updated.filename
+    existing.entities = list(updated.entities)
+
+
+def _serialise_nlu_data(training_data: NluTrainingData, filename: Text) -> Text:
+    """Serialise NLU training data in the format of the file it's dumped to.
+
+    Args:
+        training_data: The NLU training data.
+        filename: Path of the file. Its extension determines the format.
+
+    Returns:
+        The serialised training data.
+
+    Raises:
+        ValueError: If the format of the file is not supported.
+    """
+    file_format = rasax.community.data.format_from_filename(filename)
+
+    if file_format == rasax.community.data.FileFormat.YAML:
+        return training_data.nlu_as_yaml()
+    if file_format == rasax.community.data.FileFormat.MARKDOWN:
+        return training_data.nlu_as_markdown()
+    if file_format == rasax.community.data.FileFormat.JSON:
+        return training_data.nlu_as_json(indent=2)
+
+    raise ValueError(f"Cannot dump NLU training data to file '{filename}'.")
+
+
 def nlu_format(
     data: List[Dict[Text, Any]],
     regex_features: Optional[List[Dict[Text, Any]]] = None,
@@ -1,9 +1,10 @@
-import json
 import logging
 import os
+import time
 import typing
+import zlib
 from collections import deque
-from typing import Text, Optional, Union, Deque, Callable
+from typing import Any, Text, Optional, Union, Deque, Callable, List
 import sqlalchemy.exc
 
 from sanic.response import HTTPResponse
@@ -14,7 +15,14 @@ import rasax.community.utils.cli as cli_utils
 import rasax.community.database.utils as db_utils
 from rasax.community.services.analytics_service import AnalyticsService
 from rasax.community.services.event_service import EventService
+from rasax.community.services.conversation_metadata_cache import (
+    ConversationMetadataCache,
+)
 from rasax.community.services.logs_service import LogsService
+from rasax.community.services.parsed_event import ParsedEvent
+from rasax.community.services.statistics_accumulator import (
+    ConversationStatisticsAccumulator,
+)
 
 if typing.TYPE_CHECKING:
     from multiprocessing import Process  # type: ignore
@@ -25,6 +33,43 @@ logger = logging.getLogger(__name__)
 MAX_PENDING_EVENTS = 1000  # number of PendingEvents to keep in memory
 
 
+def shard_for_conversation(sender_id: Text, shard_count: int) -> int:
+    """Determine which event service shard processes the conversation `sender_id`.
+
+    Args:
+        sender_id: ID of the conversation.
+        shard_count: Total number of event service shards.
+
+    Returns:
+        Index of the shard which processes the events of the conversation.
+    """
+    # `hash()` can't be used since it's randomized per process
+    return zlib.crc32(sender_id.encode("utf-8")) % shard_count
+
+
+def is_transient_database_error(error: Optional[Exception]) -> bool:
+    """Determine whether persisting an event might succeed if it's tried again.
+
+    Args:
+        error: Exception which was raised when the event was persisted.
+
+    Returns:
+        `True` if the database was unavailable (e.g. it was restarted or the
+        connection timed out), `False` if the event itself can't be persisted.
+    """
+    if isinstance(error, sqlalchemy.exc.DBAPIError) and error.connection_invalidated:
+        return True
+
+    return isinstance(
+        error,
+        (
+            sqlalchemy.exc.OperationalError,
+            sqlalchemy.exc.DisconnectionError,
+            sqlalchemy.exc.TimeoutError,
+        ),
+    )
+
+
 def _run_liveness_app(port: int, consumer_type: Text) -> None:
     from sanic import Sanic
     from sanic import response
@@ -47,6 +92,10 @@ class EventConsumer:
         self,
         should_run_liveness_endpoint: bool = False,
         session: Optional["Session"] = None,
+        batch_size: Optional[int] = None,
+        batch_timeout_in_ms: Optional[int] = None,
+        shard_index: Optional[int] = None,
+        shard_count: Optional[int] = None,
     ) -> None:
         """Abstract event consumer that implements a liveness endpoint.
 
@@ -56,8 +105,35 @@ class EventConsumer:
                 The service will be exposed at a port defined by the
                 `SELF_PORT` environment variable (5673 by default).
             session: SQLAlchemy session to use.
+            batch_size: Maximum number of events which are persisted in a single
+                database transaction. Defaults to the `EVENT_CONSUMER_BATCH_SIZE`
+                environment variable. A value of `1` disables batching.
+            batch_timeout_in_ms: Maximum time in milliseconds an event may wait in
+                a partially filled batch. Defaults to the
+                `EVENT_CONSUMER_BATCH_TIMEOUT_MS` environment variable.
+            shard_index: Index of the event service shard this consumer belongs to.
+                Defaults to the `EVENT_SERVICE_SHARD_INDEX` environment variable.
+            shard_count: Total number of event service shards. Defaults to the
+                `EVENT_SERVICE_SHARD_COUNT` environment variable. Each shard has to
+                consume all events, and only persists the events of the
+                conversations which belong to the shard.
+
+        Raises:
+            ValueError: If `shard_index` is not a valid index for `shard_count`.
 
         """
+        if shard_index is None:
+            shard_index = rasa_x_config.event_service_shard_index
+        if shard_count is None:
+            shard_count = rasa_x_config.event_service_shard_count
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise ValueError(
+                f"Invalid event service shard {shard_index} of {shard_count} shards. "
+                f"The shard index has to be between 0 and the shard count minus 1."
+            )
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
         self.liveness_endpoint: Optional["Process"] = None
         self.start_liveness_endpoint_process(should_run_liveness_endpoint)
 
@@ -65,17 +141,35 @@ class EventConsumer:
             rasa_x_config.LOCAL_MODE
         )
 
-        self.event_service = EventService(self._session)
-        self.analytics_service = AnalyticsService(self._session)
+        self.conversation_cache = ConversationMetadataCache()
+        self.event_service = EventService(
+            self._session,
+            statistics_accumulator=ConversationStatisticsAccumulator(),
+            conversation_cache=self.conversation_cache,
+            defer_event_inserts=True,
+        )
+        self.analytics_service = AnalyticsService(
+            self._session, conversation_cache=self.conversation_cache
+        )
         self.logs_service = LogsService(self._session)
 
         self.pending_events: Deque[PendingEvent] = deque(maxlen=MAX_PENDING_EVENTS)
 
+        self.batch_size = max(batch_size or rasa_x_config.event_consumer_batch_size, 1)
+        if batch_timeout_in_ms is None:
+            batch_timeout_in_ms = rasa_x_config.event_consumer_batch_timeout_in_ms
+        self.batch_timeout_in_seconds = batch_timeout_in_ms / 1000
+        self._batch: List[PendingEvent] = []
+        self._batch_started_at: Optional[float] = None
+
     def __enter__(self) -> None:
         pass
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
-        self._session.close()
+        try:
+            self.flush_batch()
+        finally:
+            self._session.close()
 
     @staticmethod
     def _run_liveness_endpoint_process(consumer_type: Text) -> "Process":
@@ -123,6 +217,7 @@ class EventConsumer:
         event_number: Optional[int] = None,
         origin: Optional[Text] = None,
         import_process_id: Optional[Text] = None,
+        delivery: Optional[Any] = None,
     ) -> None:
         """Handle an incoming event forwarding it to necessary services and handlers.
 
@@ -133,17 +228,89 @@ class EventConsumer:
             origin: Rasa environment origin of the event.
             import_process_id: Unique ID if the event comes from a `rasa export`
                 process.
+            delivery: Broker specific reference to the delivery of the event (e.g.
+                a delivery tag). It's passed to `_save_event_as_pending` if the
+                event couldn't be persisted.
 
         """
 
+        # the event is decoded once and shared by all services
+        parsed_event = ParsedEvent(data)
+
+        if not self._is_in_shard(parsed_event, sender_id):
+            return
+
         log_operation = self._event_log_operation(
-            data, sender_id, event_number, origin, import_process_id
+            parsed_event, sender_id, event_number, origin, import_process_id
         )
 
-        try:
-            log_operation()
+        if self.batch_size > 1:
+            self._add_to_batch(data, log_operation, delivery)
+        else:
+            self._persist_event(data, log_operation, delivery)
+
+    def _is_in_shard(
+        self, parsed_event: ParsedEvent, sender_id: Optional[Text]
+    ) -> bool:
+        """Determine whether an event belongs to the shard of this consumer.
 
-            self._session.commit()
+        Args:
+            parsed_event: Event to be logged.
+            sender_id: Conversation ID sending the event.
+
+        Returns:
+            `True` if sharding is disabled or the event's conversation belongs to
+            this shard.
+        """
+        if self.shard_count == 1:
+            return True
+
+        if sender_id is None:
+            try:
+                sender_id = parsed_event.event.get("sender_id")
+            except (ValueError, AttributeError):
+                # invalid events are handled by the shard which logs them as errors
+                sender_id = None
+
+        if sender_id is None:
+            return self.shard_index == 0
+
+        return shard_for_conversation(sender_id, self.shard_count) == self.shard_index
+
+    def _commit(self) -> None:
+        """Write deferred events and accumulated statistics and commit the current
+        transaction."""
+        self.event_service.flush_events()
+        self.event_service.flush_statistics()
+        self._session.commit()
+
+    def _rollback(self) -> None:
+        """Roll back the current transaction and discard deferred events and
+        accumulated statistics.
+
+        The conversation metadata cache is cleared as well since it might contain
+        changes of the rolled back transaction.
+        """
+        self._session.rollback()
+        self.event_service.discard_events()
+        self.event_service.discard_statistics()
+        self.conversation_cache.clear()
+
+    def _persist_event(
+        self,
+        data: Union[Text, bytes],
+        log_operation: Callable[[], None],
+        delivery: Optional[Any] = None,
+    ) -> None:
+        """Persist a single event in its own database transaction.
+
+        Args:
+            data: Event to be logged.
+            log_operation: `Callable` which persists the event.
+            delivery: Broker specific reference to the delivery of the event.
+        """
+        try:
+            self._persist_event_with_retry(log_operation)
 
             self._process_pending_events()
         except sqlalchemy.exc.IntegrityError as e:
@@ -152,15 +319,113 @@ class EventConsumer:
                 f"means that the event is already stored in the "
                 f"database. The event data was '{data}'. {e}"
             )
-            self._session.rollback()
+            self._rollback()
         except Exception as e:
             logger.error(e)
-            self._save_event_as_pending(data, log_operation)
-            self._session.rollback()
+            self._save_event_as_pending(data, log_operation, delivery, e)
+            self._rollback()
 
-    def _event_log_operation(
+    def _persist_event_with_retry(self, log_operation: Callable[[], None]) -> None:
+        """Persist an event and retry once if this failed with an `IntegrityError`.
+
+        An `IntegrityError` can also be caused by outdated conversation metadata in
+        the cache. Rolling back clears the cache, so the retry uses the metadata
+        from the database. If the retry fails as well, the event is a duplicate.
+
+        Args:
+            log_operation: `Callable` which persists the event.
+        """
+        try:
+            log_operation()
+            self._commit()
+        except sqlalchemy.exc.IntegrityError as e:
+            logger.debug(f"Retrying to save event after an 'IntegrityError': {e}")
+            self._rollback()
+
+            log_operation()
+            self._commit()
+
+    def _add_to_batch(
         self,
         data: Union[Text, bytes],
+        log_operation: Callable[[], None],
+        delivery: Optional[Any] = None,
+    ) -> None:
+        """Add an event to the current batch and persist the batch if it is due.
+
+        Args:
+            data: Event to be logged.
+            log_operation: `Callable` which persists the event.
+            delivery: Broker specific reference to the delivery of the event.
+        """
+        if not self._batch:
+            self._batch_started_at = time.monotonic()
+
+        self._batch.append(PendingEvent(data, log_operation, delivery))
+
+        self.flush_batch_if_due()
+
+    def is_batch_due(self) -> bool:
+        """Determine whether the current batch should be persisted.
+
+        Returns:
+            `True` if the batch is full or its oldest event has waited longer than
+            the batch timeout.
+        """
+        if not self._batch:
+            return False
+
+        if len(self._batch) >= self.batch_size:
+            return True
+
+        waited = time.monotonic() - (self._batch_started_at or 0)
+        return waited >= self.batch_timeout_in_seconds
+
+    def flush_batch_if_due(self) -> None:
+        """Persist the current batch if it is full or has timed out."""
+        if self.is_batch_due():
+            self.flush_batch()
+
+    def flush_batch(self) -> None:
+        """Persist all batched events in a single database transaction.
+
+        If the transaction fails (e.g. because one of the events is already stored
+        in the database), the transaction is rolled back and the events of the batch
+        are persisted one by one. This keeps the de-duplication of single events
+        and the retry behaviour of `PendingEvent`s.
+        """
+        batch, self._batch = self._batch, []
+        self._batch_started_at = None
+
+        if not batch:
+            return
+
+        try:
+            for pending_event in batch:
+                pending_event.on_save()
+
+            self._commit()
+        except Exception as e:
+            self._rollback()
+            logger.debug(
+                f"Persisting a batch of {len(batch)} events in a single transaction "
+                f"failed. Persisting the events one by one instead. Exception: {e}."
+            )
+            for pending_event in batch:
+                self._persist_event(
+                    pending_event.raw_event,
+                    pending_event.on_save,
+                    pending_event.delivery,
+                )
+
+            return
+
+        logger.debug(f"Persisted a batch of {len(batch)} events.")
+        self._process_pending_events()
+
+    def _event_log_operation(
+        self,
+        parsed_event: ParsedEvent,
         sender_id: Optional[Text] = None,
         event_number: Optional[int] = None,
         origin: Optional[Text] = None,
@@ -168,7 +433,7 @@ class EventConsumer:
     ) -> Callable[[], None]:
         def _log() -> None:
             event = self.event_service.save_event(
-                data,
+                parsed_event,
                 sender_id=sender_id,
                 event_number=event_number,
                 origin=origin,
@@ -176,14 +441,16 @@ class EventConsumer:
             )
 
             self.logs_service.save_nlu_logs_from_event(
-                data, event.id, event.conversation_id
+                parsed_event, event.id, event.conversation_id
+            )
+            self.analytics_service.save_analytics(
+                parsed_event, sender_id=event.conversation_id
             )
-            self.analytics_service.save_analytics(data, sender_id=event.conversation_id)
 
             if common_utils.is_enterprise_installed():
                 from rasax.enterprise import reporting  # pytype: disable=import-error
 
-                reporting.report_event(json.loads(data), event.conversation_id)
+                reporting.report_event(parsed_event.event, event.conversation_id)
 
         return _log
 
@@ -191,6 +458,8 @@ class EventConsumer:
         self,
         raw_event: Union[Text, bytes],
         on_save: Optional[Callable[[], None]] = None,
+        delivery: Optional[Any] = None,
+        error: Optional[Exception] = None,
     ) -> None:
         """Add `ConversationEvent` to pending events.
 
@@ -198,6 +467,8 @@ class EventConsumer:
             raw_event: Consumed event which has to be saved later since the last try
                 failed.
             on_save: `Callable` that will be called to persist the event.
+            delivery: Broker specific reference to the delivery of the event.
+            error: Exception which was raised when the event was persisted.
         """
         if len(self.pending_events) >= MAX_PENDING_EVENTS:
             pending_event = self.pending_events.popleft()
@@ -207,7 +478,7 @@ class EventConsumer:
                 f"{pending_event.raw_event} was removed."
             )
 
-        self.pending_events.append(PendingEvent(raw_event, on_save))
+        self.pending_events.append(PendingEvent(raw_event, on_save, delivery))
 
     def _process_pending_events(self) -> None:
         """Process all pending events."""
@@ -215,10 +486,10 @@ class EventConsumer:
         for pending_event in list(self.pending_events):
             try:
                 pending_event.on_save()
-                self._session.commit()
+                self._commit()
                 self.pending_events.remove(pending_event)
             except Exception as e:
-                self._session.rollback()
+                self._rollback()
                 logger.debug(
                     f"Cannot process the pending event with "
                     f"the following data: '{pending_event.raw_event}'."
@@ -236,7 +507,10 @@ class PendingEvent:
     """A class that represents a pending event — an event that will be saved later."""
 
     def __init__(
-        self, raw_event: Union[Text, bytes], on_save: Optional[Callable[[], None]]
+        self,
+        raw_event: Union[Text, bytes],
+        on_save: Optional[Callable[[], None]],
+        delivery: Optional[Any] = None,
     ):
         """Create an instance of `PendingEvent`.
 
@@ -244,6 +518,8 @@ class PendingEvent:
             raw_event: Consumed event that needs to be saved later.
             on_save: a callback function that will be called after the event is added to
             the database.
+            delivery: Broker specific reference to the delivery of the event.
         """
         self.raw_event = raw_event
         self.on_save: Optional[Callable[[], None]] = on_save
+        self.delivery = delivery
@@ -1,19 +1,29 @@
 import logging
+import multiprocessing
 import typing
 from typing import Any, Text, List, Optional, Union, Dict
 
-import time
-
 import rasax.community.config as rasa_x_config
+import rasax.community.utils.common as common_utils
 from rasax.community.services.event_consumers.event_consumer import EventConsumer
 
 if typing.TYPE_CHECKING:
-    from kafka.structs import TopicPartition
+    from multiprocessing import Process  # type: ignore
+    from kafka.structs import TopicPartition, OffsetAndMetadata
     from kafka.consumer.fetcher import ConsumerRecord
-    from kafka import KafkaConsumer
+    from kafka import KafkaConsumer, ConsumerRebalanceListener
+    from rasax.community.services.conversation_metadata_cache import (
+        ConversationMetadataCache,
+    )
 
 logger = logging.getLogger(__name__)
 
+# maximum number of records returned by a single call to `KafkaConsumer.poll()`
+DEFAULT_MAX_POLL_RECORDS = 500
+
+# minimum time in milliseconds which `KafkaConsumer.poll()` waits for new records
+MINIMUM_POLL_TIMEOUT_IN_MS = 10
+
 
 class KafkaEventConsumer(EventConsumer):
     type_name = "kafka"
@@ -32,6 +42,8 @@ class KafkaEventConsumer(EventConsumer):
         ssl_keyfile: Optional[Text] = None,
         ssl_check_hostname: bool = False,
         should_run_liveness_endpoint: bool = False,
+        max_poll_records: int = DEFAULT_MAX_POLL_RECORDS,
+        partition_workers: int = 1,
         **kwargs: Any,
     ):
         """Kafka event consumer.
@@ -75,6 +87,13 @@ class KafkaEventConsumer(EventConsumer):
                 background process that can be used to probe liveness of this service.
                 The service will be exposed at a port defined by the
                 `SELF_PORT` environment variable (5673 by default).
+            max_poll_records: Maximum number of records returned by a single poll.
+            partition_workers: Number of processes which consume the topic. Each
+                process joins the consumer group `group_id` and is assigned a share
+                of the topic's partitions. Requires `group_id` to be set.
+
+        If the event service is sharded, every shard joins its own consumer group
+        (`<group_id>-shard-<shard index>`) so that each shard receives all events.
 
         """
         self.url = url
@@ -88,9 +107,39 @@ class KafkaEventConsumer(EventConsumer):
         self.ssl_certfile = ssl_certfile
         self.ssl_keyfile = ssl_keyfile
         self.ssl_check_hostname = ssl_check_hostname
+        self.max_poll_records = max_poll_records
+        self.partition_workers = max(partition_workers, 1)
         self.consumer: Optional["KafkaConsumer"] = None
+        self._worker_processes: List["Process"] = []
+        # offsets of the records which were logged but aren't committed yet
+        self._uncommitted_offsets: Dict["TopicPartition", "OffsetAndMetadata"] = {}
+        # offsets which were committed last, per partition
+        self._committed_offsets: Dict["TopicPartition", int] = {}
         super().__init__(should_run_liveness_endpoint)
 
+        if self.partition_workers > 1 and not self.group_id:
+            logger.warning(
+                "Consuming Kafka events with multiple partition workers requires "
+                "a `group_id`. Will consume all partitions in a single process."
+            )
+            self.partition_workers = 1
+
+        if self.partition_workers > 1 and multiprocessing.current_process().daemon:
+            # daemonic processes (e.g. the event service which is started by the
+            # Rasa X server) are not allowed to have child processes
+            raise ValueError(
+                f"Cannot start {self.partition_workers} Kafka partition workers since "
+                f"the event service is not running in standalone mode. Please run "
+                f"the event service as separate service or set `partition_workers` "
+                f"to 1."
+            )
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            super().__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            self._stop_partition_workers()
+
     @classmethod
     def from_endpoint_config(
         cls,
@@ -112,72 +161,236 @@ class KafkaEventConsumer(EventConsumer):
         # noinspection PyPackageRequirements
         import kafka
 
-        if self.security_protocol.upper() == "PLAINTEXT":
-            self.consumer = kafka.KafkaConsumer(
-                self.topic,
-                bootstrap_servers=self.url,
-                client_id=self.client_id,
-                group_id=self.group_id,
-                security_protocol="PLAINTEXT",
-                ssl_check_hostname=False,
-            )
-        elif self.security_protocol.upper() == "SASL_PLAINTEXT":
-            self.consumer = kafka.KafkaConsumer(
-                self.topic,
-                bootstrap_servers=self.url,
-                client_id=self.client_id,
-                group_id=self.group_id,
-                security_protocol="SASL_PLAINTEXT",
-                sasl_mechanism="PLAIN",
-                sasl_plain_username=self.sasl_username,
-                sasl_plain_password=self.sasl_password,
-                ssl_check_hostname=False,
-            )
-        elif self.security_protocol.upper() == "SSL":
-            self.consumer = kafka.KafkaConsumer(
-                self.topic,
-                bootstrap_servers=self.url,
-                client_id=self.client_id,
-                group_id=self.group_id,
-                security_protocol="SSL",
-                ssl_cafile=self.ssl_cafile,
-                ssl_certfile=self.ssl_certfile,
-                ssl_keyfile=self.ssl_keyfile,
-                ssl_check_hostname=self.ssl_check_hostname,
-            )
-        elif self.security_protocol.upper() == "SASL_SSL":
-            self.consumer = kafka.KafkaConsumer(
-                self.topic,
-                bootstrap_servers=self.url,
-                client_id=self.client_id,
-                group_id=self.group_id,
-                security_protocol="SASL_SSL",
-                sasl_mechanism="PLAIN",
-                sasl_plain_username=self.sasl_username,
-                sasl_plain_password=self.sasl_password,
-                ssl_cafile=self.ssl_cafile,
-                ssl_certfile=self.ssl_certfile,
-                ssl_keyfile=self.ssl_keyfile,
-                ssl_check_hostname=self.ssl_check_hostname,
+        security_protocol = self.security_protocol.upper()
+        kwargs = {
+            "bootstrap_servers": self.url,
+            "client_id": self.client_id,
+            "group_id": self._consumer_group_id(),
+            "security_protocol": security_protocol,
+            "max_poll_records": self.max_poll_records,
+            # offsets are committed once the events were persisted
+            "enable_auto_commit": False,
+        }
+
+        if security_protocol in ["SASL_PLAINTEXT", "SASL_SSL"]:
+            kwargs.update(
+                {
+                    "sasl_mechanism": "PLAIN",
+                    "sasl_plain_username": self.sasl_username,
+                    "sasl_plain_password": self.sasl_password,
+                }
             )
 
+        if security_protocol in ["SSL", "SASL_SSL"]:
+            kwargs.update(
+                {
+                    "ssl_cafile": self.ssl_cafile,
+                    "ssl_certfile": self.ssl_certfile,
+                    "ssl_keyfile": self.ssl_keyfile,
+                    "ssl_check_hostname": self.ssl_check_hostname,
+                }
+            )
+        elif security_protocol in ["PLAINTEXT", "SASL_PLAINTEXT"]:
+            kwargs["ssl_check_hostname"] = False
         else:
             raise ValueError(
                 f"Cannot initialise `kafka.KafkaConsumer` "
                 f"with security protocol '{self.security_protocol}'."
             )
 
+        self.consumer = kafka.KafkaConsumer(**kwargs)
+        self.consumer.subscribe(
+            [self.topic], listener=_clear_cache_on_rebalance(self.conversation_cache)
+        )
+
+    def _consumer_group_id(self) -> Optional[Text]:
+        if self.group_id and self.shard_count > 1:
+            return f"{self.group_id}-shard-{self.shard_index}"
+
+        return self.group_id
+
+    def _partition_worker_config(self) -> Dict[Text, Any]:
+        """Create the endpoint config for a single partition worker."""
+        return {
+            "type": self.type_name,
+            "url": self.url,
+            "topic": self.topic,
+            "client_id": self.client_id,
+            "group_id": self.group_id,
+            "security_protocol": self.security_protocol,
+            "sasl_username": self.sasl_username,
+            "sasl_password": self.sasl_password,
+            "ssl_cafile": self.ssl_cafile,
+            "ssl_certfile": self.ssl_certfile,
+            "ssl_keyfile": self.ssl_keyfile,
+            "ssl_check_hostname": self.ssl_check_hostname,
+            "max_poll_records": self.max_poll_records,
+            "partition_workers": 1,
+        }
+
+    def _start_partition_workers(self) -> None:
+        """Start additional consumer processes in the consumer group.
+
+        The current process is one of the `partition_workers`, hence one process less
+        is started. Kafka assigns each process a share of the topic's partitions.
+        """
+        from rasax.community.services.event_service import continuously_consume
+
+        for _ in range(self.partition_workers - 1):
+            self._worker_processes.append(
+                common_utils.run_in_process(
+                    fn=continuously_consume,
+                    args=(self._partition_worker_config(),),
+                    daemon=True,
+                )
+            )
+
+        logger.info(
+            f"Started {len(self._worker_processes)} additional Kafka partition "
+            f"workers."
+        )
+
+    def _stop_partition_workers(self) -> None:
+        for process in self._worker_processes:
+            if process.is_alive():
+                process.terminate()
+
+        self._worker_processes = []
+
+    def _track_offset(self, message: "ConsumerRecord") -> None:
+        from kafka.structs import TopicPartition, OffsetAndMetadata
+
+        # the committed offset is the offset of the next record which is consumed
+        self._uncommitted_offsets[
+            TopicPartition(message.topic, message.partition)
+        ] = OffsetAndMetadata(message.offset + 1, None)
+
+    def _commit_persisted_offsets(self) -> None:
+        """Commit the offsets of the logged records if none of them is batched.
+
+        Events which couldn't be saved are kept as `PendingEvent`s. The offset of
+        their partition is held back at the oldest pending record, so that they are
+        consumed again if the consumer stops before they could be persisted. Offsets
+        can only be committed as part of a consumer group.
+        """
+        if self._batch or not self._uncommitted_offsets or not self.group_id:
+            return
+
+        # noinspection PyPackageRequirements
+        from kafka.errors import CommitFailedError
+        from kafka.structs import OffsetAndMetadata
+
+        pending_offsets = self._pending_offsets()
+        # partitions might have been reassigned to other consumers in the meantime
+        assignment = self.consumer.assignment()
+        offsets = {}
+        for partition, offset in self._uncommitted_offsets.items():
+            if partition not in assignment:
+                continue
+            if partition in pending_offsets:
+                offset = OffsetAndMetadata(pending_offsets[partition], None)
+            if self._committed_offsets.get(partition) != offset.offset:
+                offsets[partition] = offset
+
+        # partitions with pending events have to be committed again once the events
+        # were persisted
+        self._uncommitted_offsets = {
+            partition: offset
+            for partition, offset in self._uncommitted_offsets.items()
+            if partition in pending_offsets and partition in assignment
+        }
+
+        if not offsets:
+            return
+
+        try:
+            self.consumer.commit(offsets)
+            self._committed_offsets.update(
+                {partition: offset.offset for partition, offset in offsets.items()}
+            )
+        except CommitFailedError as e:
+            # The partitions were reassigned to other consumers in the group. They
+            # continue from the last committed offsets, which means that they will
+            # receive some of the persisted events again. These are dropped as
+            # duplicates.
+            logger.warning(
+                f"Committing the Kafka offsets failed since the partitions were "
+                f"reassigned: {e}"
+            )
+            self._uncommitted_offsets = {}
+            self._committed_offsets = {}
+
+    def _pending_offsets(self) -> Dict["TopicPartition", int]:
+        """Get the offset of the oldest record of each partition which isn't persisted.
+
+        Returns:
+            Offset of the oldest `PendingEvent` per partition.
+        """
+        pending_offsets = {}
+        for pending_event in self.pending_events:
+            if pending_event.delivery is None:
+                continue
+
+            partition, offset = pending_event.delivery
+            pending_offsets[partition] = min(
+                offset, pending_offsets.get(partition, offset)
+            )
+
+        return pending_offsets
+
     def consume(self):
+        if self.partition_workers > 1:
+            self._start_partition_workers()
+
         self._create_consumer()
         logger.info(f"Start consuming topic '{self.topic}' on Kafka url '{self.url}'.")
+
+        poll_timeout_in_ms = max(
+            int(self.batch_timeout_in_seconds * 1000), MINIMUM_POLL_TIMEOUT_IN_MS
+        )
         while True:
             records: Dict[
                 "TopicPartition", List["ConsumerRecord"]
-            ] = self.consumer.poll()
+            ] = self.consumer.poll(timeout_ms=poll_timeout_in_ms)
 
-            # records contain only one topic, so we can just get all values
-            for messages in records.values():
+            # records contain only one topic and are grouped by partition
+            for partition, messages in records.items():
                 for message in messages:
-                    self.log_event(message.value)
+                    self._track_offset(message)
+                    self.log_event(message.value, delivery=(partition, message.offset))
+
+                    # commit as soon as a batch was persisted, since the batch might
+                    # never be empty at the end of a poll
+                    if self.batch_size > 1:
+                        self._commit_persisted_offsets()
+
+            self.flush_batch_if_due()
+            self._commit_persisted_offsets()
+
+
+def _clear_cache_on_rebalance(
+    conversation_cache: "ConversationMetadataCache",
+) -> "ConsumerRebalanceListener":
+    """Create a listener which clears the conversation metadata cache on rebalances.
+
+    Partitions which are assigned to this consumer might have been consumed by
+    another consumer before, which makes the cached metadata of their
+    conversations outdated.
+
+    Args:
+        conversation_cache: Cache of the consumer.
+
+    Returns:
+        Listener which can be passed to `KafkaConsumer.subscribe`.
+    """
+    # noinspection PyPackageRequirements
+    from kafka import ConsumerRebalanceListener
+
+    class CacheClearingListener(ConsumerRebalanceListener):
+        def on_partitions_revoked(self, revoked) -> None:
+            conversation_cache.clear()
+
+        def on_partitions_assigned(self, assigned) -> None:
+            conversation_cache.clear()
 
-            time.sleep(0.01)
+    return CacheClearingListener()
@@ -1,12 +1,18 @@
 import os
 import logging
 import typing
+from collections import OrderedDict
 from contextlib import contextmanager
-from typing import Any, Generator, Dict, List, Optional, Text, Union
+from typing import Any, Callable, Generator, Dict, List, Optional, Set, Text, Union
 
 import rasax.community.constants as constants
 import rasax.community.utils.cli as cli_utils
-from rasax.community.services.event_consumers.event_consumer import EventConsumer
+import rasax.community.utils.common as common_utils
+from rasax.community.services.event_consumers.event_consumer import (
+    EventConsumer,
+    MAX_PENDING_EVENTS,
+    is_transient_database_error,
+)
 
 if typing.TYPE_CHECKING:
     from pika.adapters.blocking_connection import BlockingChannel
@@ -19,6 +25,19 @@ logger = logging.getLogger("pika")
 
 RASA_EXPORT_PROCESS_ID_HEADER_NAME = "rasa-export-process-id"
 
+# minimum interval in seconds at which batched events are checked for persistence
+MINIMUM_BATCH_FLUSH_INTERVAL = 0.01
+
+# fanout exchange which Rasa Open Source publishes events to
+RASA_EXCHANGE = "rasa-exchange"
+
+# default number of unacknowledged messages which RabbitMQ delivers to the consumer
+DEFAULT_PREFETCH_COUNT = 100
+
+# number of times a message is requeued if its event couldn't be persisted due to a
+# database error which might be transient
+MAX_REQUEUES_PER_MESSAGE = 3
+
 
 class PikaEventConsumer(EventConsumer):
     type_name = "pika"
@@ -31,6 +50,7 @@ class PikaEventConsumer(EventConsumer):
         port: Union[Text, int, None] = 5672,
         queue: Optional[Text] = "rasa_production_events",
         should_run_liveness_endpoint: bool = False,
+        prefetch_count: Optional[int] = None,
         **kwargs: Any,
     ):
         """Pika event consumer.
@@ -45,9 +65,17 @@ class PikaEventConsumer(EventConsumer):
                 background process that can be used to probe liveness of this service.
                 The service will be exposed at a port defined by the
                 `SELF_PORT` environment variable (5673 by default).
+            prefetch_count: Maximum number of unacknowledged messages which RabbitMQ
+                delivers to the consumer. Messages are acknowledged once they are
+                persisted. Defaults to `DEFAULT_PREFETCH_COUNT` or twice the batch
+                size, whichever is larger, and is never smaller than the batch size.
             kwargs: Additional kwargs to be processed. If `queue` is not provided, and
                 `queues` is present in `kwargs`, the first queue listed under
                 `queues` will be used as the queue to consume.
+
+        If the event service is sharded, the first shard consumes `queue`. The other
+        shards consume their own queue (`<queue>-shard-<shard index>`) which is bound
+        to the exchange of Rasa Open Source, so that each shard receives all events.
         """
 
         self.queue = self._get_queue_from_args(queue, kwargs)
@@ -55,8 +83,32 @@ class PikaEventConsumer(EventConsumer):
         self.channel = _initialise_pika_channel(
             url, self.queue, username, password, port
         )
+        # delivery tags of the messages which weren't acknowledged or rejected yet
+        self._unacknowledged_delivery_tags: Set[int] = set()
+        # number of times the messages were requeued by the hash of their body
+        self._requeue_counts: "OrderedDict[Text, int]" = OrderedDict()
         super().__init__(should_run_liveness_endpoint)
 
+        if self.shard_index > 0:
+            self.queue = self._declare_shard_queue()
+
+        self.prefetch_count = max(
+            prefetch_count or max(DEFAULT_PREFETCH_COUNT, 2 * self.batch_size),
+            self.batch_size,
+        )
+
+    def _declare_shard_queue(self) -> Text:
+        """Declare the queue of this shard and bind it to the Rasa exchange.
+
+        Returns:
+            Name of the queue.
+        """
+        queue = f"{self.queue}-shard-{self.shard_index}"
+        self.channel.queue_declare(queue, durable=True)
+        self.channel.queue_bind(queue, RASA_EXCHANGE)
+
+        return queue
+
     @classmethod
     def from_endpoint_config(
         cls, consumer_config: Optional[Dict], should_run_liveness_endpoint: bool,
@@ -163,17 +215,111 @@ class PikaEventConsumer(EventConsumer):
         properties: "BasicProperties",
         body: bytes,
     ):
+        self._unacknowledged_delivery_tags.add(method.delivery_tag)
         self.log_event(
             body,
             origin=self._origin_from_message_properties(properties),
             import_process_id=self._export_process_id_from_message_properties(
                 properties
             ),
+            delivery=method.delivery_tag,
+        )
+        self._acknowledge_persisted_messages()
+
+    def _save_event_as_pending(
+        self,
+        raw_event: Union[Text, bytes],
+        on_save: Optional[Callable[[], None]] = None,
+        delivery: Optional[Any] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Reject the message of an event which couldn't be persisted.
+
+        If the database was unavailable, RabbitMQ requeues the message and delivers
+        it again, so that the event isn't lost if the consumer is stopped before it
+        could be persisted. Every message is requeued at most
+        `MAX_REQUEUES_PER_MESSAGE` times. Other messages (e.g. invalid events) are
+        rejected without requeueing them, which dead-letters them if the queue has
+        a dead letter exchange.
+
+        Args:
+            raw_event: Consumed event which couldn't be persisted.
+            on_save: `Callable` which persists the event.
+            delivery: Delivery tag of the message.
+            error: Exception which was raised when the event was persisted.
+        """
+        if delivery is None:
+            super()._save_event_as_pending(raw_event, on_save, delivery, error)
+            return
+
+        # acknowledging a rejected message would close the channel
+        self._unacknowledged_delivery_tags.discard(delivery)
+
+        if is_transient_database_error(error) and self._count_requeue(raw_event):
+            logger.debug(f"Requeueing message with delivery tag {delivery}.")
+            self.channel.basic_nack(delivery, requeue=True)
+            return
+
+        logger.error(
+            f"Rejecting message with delivery tag {delivery} without requeueing it "
+            f"since its event couldn't be persisted. The event data was "
+            f"'{raw_event}'."
+        )
+        self.channel.basic_nack(delivery, requeue=False)
+
+    def _count_requeue(self, raw_event: Union[Text, bytes]) -> bool:
+        """Count that the message of an event is requeued.
+
+        Args:
+            raw_event: Body of the message.
+
+        Returns:
+            `True` if the message may be requeued once more.
+        """
+        message_hash = common_utils.get_text_hash(raw_event)
+        requeues = self._requeue_counts.pop(message_hash, 0)
+        if requeues >= MAX_REQUEUES_PER_MESSAGE:
+            return False
+
+        self._requeue_counts[message_hash] = requeues + 1
+        if len(self._requeue_counts) > MAX_PENDING_EVENTS:
+            # forget the message which was requeued least recently
+            self._requeue_counts.popitem(last=False)
+
+        return True
+
+    def _acknowledge_persisted_messages(self) -> None:
+        """Acknowledge all received messages if none of them is batched anymore.
+
+        Messages of events which couldn't be saved were rejected before, and hence
+        aren't acknowledged.
+        """
+        if self._batch or not self._unacknowledged_delivery_tags:
+            return
+
+        # this also acknowledges all messages with lower delivery tags which
+        # weren't rejected
+        self.channel.basic_ack(max(self._unacknowledged_delivery_tags), multiple=True)
+        self._unacknowledged_delivery_tags.clear()
+
+    def _schedule_batch_flush(self) -> None:
+        """Periodically persist batched events while waiting for new messages."""
+
+        def _flush() -> None:
+            self.flush_batch_if_due()
+            self._acknowledge_persisted_messages()
+            self._schedule_batch_flush()
+
+        self.channel.connection.call_later(
+            max(self.batch_timeout_in_seconds, MINIMUM_BATCH_FLUSH_INTERVAL), _flush
         )
 
     def consume(self):
         logger.info(f"Start consuming queue '{self.queue}' on pika url '{self.url}'.")
-        self.channel.basic_consume(self.queue, self._callback, auto_ack=True)
+        self.channel.basic_qos(prefetch_count=self.prefetch_count)
+        self.channel.basic_consume(self.queue, self._callback)
+        if self.batch_size > 1:
+            self._schedule_batch_flush()
         self.channel.start_consuming()
 
 
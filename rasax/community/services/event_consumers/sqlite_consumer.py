@@ -15,34 +15,161 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+# maximum number of broker events which are read and deleted at once
+DEFAULT_CHUNK_SIZE = 500
+
+# The consumer polls the broker database with `MINIMUM_POLL_INTERVAL_IN_SECONDS`
+# while events arrive. The interval is doubled every time no new events were found,
+# until it reaches `MAXIMUM_POLL_INTERVAL_IN_SECONDS`.
+MINIMUM_POLL_INTERVAL_IN_SECONDS = 0.01
+MAXIMUM_POLL_INTERVAL_IN_SECONDS = 0.5
+
+
 class SQLiteEventConsumer(event_consumer.EventConsumer):
     type_name = "sql"
 
-    def __init__(self, should_run_liveness_endpoint: bool = False):
+    def __init__(
+        self,
+        should_run_liveness_endpoint: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Create a consumer for the events of the SQL event broker.
+
+        Args:
+            should_run_liveness_endpoint: If `True`, runs a Sanic server as a
+                background process that can be used to probe liveness of this service.
+            chunk_size: Maximum number of broker events which are read and removed
+                from the broker database at once.
+        """
         self.producer = SQLEventBroker()
+        self.chunk_size = max(chunk_size, 1)
+        self._data_version: Optional[int] = None
+        self._change_detection_connection: Optional[
+            "sqlalchemy.engine.Connection"
+        ] = None
         super().__init__(should_run_liveness_endpoint)
 
+        if self.shard_count > 1:
+            raise ValueError(
+                "The SQL event broker can't be consumed by multiple event service "
+                "shards since consumed events are removed from the broker."
+            )
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            super().__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            if self._change_detection_connection is not None:
+                self._change_detection_connection.close()
+                self._change_detection_connection = None
+
     def consume(self):
         logger.info("Start consuming SQLite events from database 'events.db'.")
+
+        if self.producer.engine.dialect.name == "sqlite":
+            # `PRAGMA data_version` only changes for commits of *other* connections,
+            # hence the change detection needs its own connection.
+            self._change_detection_connection = self.producer.engine.connect()
+
+        poll_interval = MINIMUM_POLL_INTERVAL_IN_SECONDS
         with self.producer.session_scope() as session:
             while True:
-                new_events = (
-                    session.query(self.producer.SQLBrokerEvent)
-                    .order_by(self.producer.SQLBrokerEvent.id.asc())
-                    .all()
-                )
-
-                for event in new_events:
-                    self.log_event(
-                        event.data,
-                        sender_id=event.sender_id,
-                        event_number=event.id,
-                        origin=constants.DEFAULT_RASA_ENVIRONMENT,
+                number_of_consumed_events = 0
+                if self._has_database_changed():
+                    number_of_consumed_events = self._consume_available_events(session)
+
+                if number_of_consumed_events:
+                    poll_interval = MINIMUM_POLL_INTERVAL_IN_SECONDS
+                else:
+                    poll_interval = min(
+                        poll_interval * 2, MAXIMUM_POLL_INTERVAL_IN_SECONDS
                     )
-                    session.delete(event)
-                    session.commit()
 
-                time.sleep(0.01)
+                # persist batched events which are due while no new events arrive
+                self.flush_batch_if_due()
+
+                time.sleep(poll_interval)
+
+    def _has_database_changed(self) -> bool:
+        """Check whether the broker database might contain new events.
+
+        Returns:
+            `False` if SQLite's `data_version` shows that no other connection
+            committed changes since the last check, `True` otherwise.
+        """
+        if self._change_detection_connection is None:
+            return True
+
+        data_version = self._change_detection_connection.execute(
+            "PRAGMA data_version"
+        ).scalar()
+        has_changed = data_version != self._data_version
+        self._data_version = data_version
+
+        return has_changed
+
+    def _consume_available_events(self, session: "sqlalchemy.orm.Session") -> int:
+        """Consume chunks of broker events until the broker database is drained.
+
+        Args:
+            session: Session of the broker database.
+
+        Returns:
+            Number of consumed events.
+        """
+        number_of_consumed_events = 0
+        while True:
+            consumed_in_chunk = self._consume_chunk(session)
+            number_of_consumed_events += consumed_in_chunk
+
+            if consumed_in_chunk < self.chunk_size:
+                return number_of_consumed_events
+
+    def _consume_chunk(self, session: "sqlalchemy.orm.Session") -> int:
+        """Consume the oldest `chunk_size` broker events and remove them.
+
+        Args:
+            session: Session of the broker database.
+
+        Returns:
+            Number of consumed events.
+        """
+        broker_event = self.producer.SQLBrokerEvent
+
+        # Consumed events are deleted, so the oldest events are always the ones
+        # which weren't consumed yet. Filtering by the last consumed ID instead
+        # wouldn't work since SQLite reuses IDs once the table is empty.
+        new_events = (
+            session.query(broker_event.id, broker_event.sender_id, broker_event.data)
+            .order_by(broker_event.id.asc())
+            .limit(self.chunk_size)
+            .all()
+        )
+
+        if not new_events:
+            return 0
+
+        for event_id, sender_id, data in new_events:
+            self.log_event(
+                data,
+                sender_id=sender_id,
+                event_number=event_id,
+                origin=constants.DEFAULT_RASA_ENVIRONMENT,
+            )
+
+        # Persist events which are still batched before removing them from
+        # the broker
+        self.flush_batch()
+
+        # New events always get a higher ID than the existing ones, hence no other
+        # events can be in this range.
+        first_event_id, last_event_id = new_events[0][0], new_events[-1][0]
+        session.query(broker_event).filter(
+            broker_event.id.between(first_event_id, last_event_id)
+        ).delete(synchronize_session=False)
+        session.commit()
+
+        return len(new_events)
 
 
 class SQLEventBroker:
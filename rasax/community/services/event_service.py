@@ -1,3 +1,4 @@
+import argparse
 import json
 import logging
 
@@ -5,8 +6,22 @@ import sqlalchemy
 import sqlalchemy.exc
 import time
 from sqlalchemy import and_, or_, false
-from sqlalchemy.orm import Session
-from typing import Text, Optional, List, Dict, Any, Union, NoReturn
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql.elements import BinaryExpression
+from typing import (
+    Text,
+    Optional,
+    List,
+    Dict,
+    Any,
+    Union,
+    NoReturn,
+    TYPE_CHECKING,
+    Iterator,
+    Tuple,
+    Set,
+)
 from sqlalchemy.exc import IntegrityError
 import uuid
 
@@ -31,6 +46,7 @@ from rasax.community.database.analytics import (
     ConversationStatistic,
     conversation_statistics_dict,
     ConversationSession,
+    ConversationSessionRollup,
 )
 from rasax.community.database.conversation import (
     Conversation,
@@ -45,7 +61,10 @@ from rasax.community.database.conversation import (
 )
 from rasax.community.database.domain import DomainIntent
 from rasax.community.database.service import DbService
+from rasax.community.database import text_search
 from rasax.community.database import utils as db_utils
+from rasax.community.services import retrieval_intents
+from rasax.community.services.parsed_event import ParsedEvent
 from rasax.community.services.data_service import DataService
 from rasax.community.services.intent_service import (
     INTENT_MAPPED_TO_KEY,
@@ -53,14 +72,64 @@ from rasax.community.services.intent_service import (
     IntentService,
 )
 
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Query
+    from rasax.community.services.conversation_metadata_cache import (
+        CachedConversation,
+        ConversationMetadataCache,
+    )
+    from rasax.community.services.statistics_accumulator import (
+        ConversationStatisticsAccumulator,
+    )
+
 logger = logging.getLogger(__name__)
 
 CORRECTED_MESSAGES_KEY = "corrected_messages"
 
+# number of events which are fetched at once when streaming events
+STREAMED_EVENTS_CHUNK_SIZE = 1000
+
+# modes of counting the total number of conversations which match a query
+CONVERSATION_COUNT_EXACT = "exact"
+CONVERSATION_COUNT_APPROXIMATE = "approximate"
+CONVERSATION_COUNT_NONE = "none"
+CONVERSATION_COUNT_MODES = [
+    CONVERSATION_COUNT_EXACT,
+    CONVERSATION_COUNT_APPROXIMATE,
+    CONVERSATION_COUNT_NONE,
+]
+
+# number of matching conversations after which approximate counting stops
+APPROXIMATE_CONVERSATION_COUNT_LIMIT = 10000
+
 
 class EventService(DbService):
-    def __init__(self, session: Optional[Session] = None):
+    def __init__(
+        self,
+        session: Optional[Session] = None,
+        statistics_accumulator: Optional["ConversationStatisticsAccumulator"] = None,
+        conversation_cache: Optional["ConversationMetadataCache"] = None,
+        defer_event_inserts: bool = False,
+    ):
+        """Create an `EventService`.
+
+        Args:
+            session: SQLAlchemy session to use.
+            statistics_accumulator: If given, conversation statistics are
+                accumulated in memory and only written to the database when
+                `flush_statistics` is called.
+            conversation_cache: If given, the metadata of conversations which is
+                required to process incoming events is read from this cache
+                instead of the database.
+            defer_event_inserts: If `True`, saved events whose ID isn't required
+                right away are kept in memory and inserted with a single statement
+                when `flush_events` is called.
+        """
         self._import_process_id = None
+        self.statistics_accumulator = statistics_accumulator
+        self.conversation_cache = conversation_cache
+        self.defer_event_inserts = defer_event_inserts
+        self._deferred_events: List[ConversationEvent] = []
         super().__init__(session)
 
     def get_conversation_events(
@@ -71,6 +140,24 @@ class EventService(DbService):
         rasa_environment_query: Optional[Text] = None,
     ) -> List[ConversationEvent]:
 
+        return (
+            self.query(ConversationEvent)
+            .filter(
+                *self._conversation_events_filter(
+                    conversation_id, until_time, since_time, rasa_environment_query
+                )
+            )
+            .order_by(ConversationEvent.timestamp.asc())
+            .all()
+        )
+
+    @staticmethod
+    def _conversation_events_filter(
+        conversation_id: Text,
+        until_time: Optional[float] = None,
+        since_time: Optional[float] = None,
+        rasa_environment_query: Optional[Text] = None,
+    ) -> List[BinaryExpression]:
         since_time = since_time or 0
         filter_query = [
             ConversationEvent.conversation_id == conversation_id,
@@ -85,12 +172,7 @@ class EventService(DbService):
                 ConversationEvent.rasa_environment == rasa_environment_query
             )
 
-        return (
-            self.query(ConversationEvent)
-            .filter(*filter_query)
-            .order_by(ConversationEvent.timestamp.asc())
-            .all()
-        )
+        return filter_query
 
     def get_tracker_for_conversation(
         self,
@@ -99,12 +181,40 @@ class EventService(DbService):
         since_time: Optional[float] = None,
         rasa_environment_query: Optional[Text] = None,
     ) -> Optional[DialogueStateTracker]:
-        conversation_events = self.get_conversation_events(
-            conversation_id, until_time, since_time, rasa_environment_query
+        """Create the tracker of a conversation from its stored events.
+
+        Only the columns which are needed to create the Rasa events are loaded, which
+        avoids constructing an ORM object for each event of the conversation.
+
+        Args:
+            conversation_id: ID of the conversation.
+            until_time: Include only events until the given time.
+            since_time: Include only events after the given time.
+            rasa_environment_query: Include only events of this Rasa environment.
+
+        Returns:
+            The tracker or `None` if the conversation does not exist.
+        """
+        rows = (
+            self.query(
+                ConversationEvent.id,
+                ConversationEvent.is_flagged,
+                ConversationEvent.data,
+            )
+            .filter(
+                *self._conversation_events_filter(
+                    conversation_id, until_time, since_time, rasa_environment_query
+                )
+            )
+            .order_by(ConversationEvent.timestamp.asc())
+            .all()
         )
 
-        if conversation_events or self._conversation_exists(conversation_id):
-            events = [e.as_rasa_dict() for e in conversation_events]
+        if rows or self._conversation_exists(conversation_id):
+            events = [
+                ConversationEvent.data_as_rasa_dict(data, is_flagged, event_id)
+                for event_id, is_flagged, data in rows
+            ]
             return DialogueStateTracker.from_dict(conversation_id, events)
         else:
             logger.debug(
@@ -112,6 +222,73 @@ class EventService(DbService):
             )
             return None
 
+    def stream_conversation_events(
+        self,
+        conversation_ids: Optional[List[Text]] = None,
+        until_time: Optional[float] = None,
+        since_time: Optional[float] = None,
+        rasa_environment_query: Optional[Text] = None,
+        created_by: Optional[Text] = None,
+    ) -> Iterator[Tuple[Text, Dict[Text, Any]]]:
+        """Iterate over stored events without loading them into memory at once.
+
+        Events are fetched in chunks from a server-side cursor (if supported by the
+        database) and are ordered by conversation and timestamp.
+
+        Args:
+            conversation_ids: Only return events of these conversations. Returns
+                events of all conversations if `None`.
+            until_time: Include only events until the given time.
+            since_time: Include only events after the given time.
+            rasa_environment_query: Include only events of this Rasa environment.
+            created_by: Only return events of conversations created by this user.
+
+        Yields:
+            Tuples of conversation ID and the Rasa event including Rasa X metadata
+            and the `is_flagged` property.
+        """
+        filter_query = [ConversationEvent.timestamp > (since_time or 0)]
+
+        if conversation_ids is not None:
+            filter_query.append(ConversationEvent.conversation_id.in_(conversation_ids))
+
+        if until_time:
+            filter_query.append(ConversationEvent.timestamp <= until_time)
+
+        if rasa_environment_query:
+            filter_query.append(
+                ConversationEvent.rasa_environment == rasa_environment_query
+            )
+
+        if created_by:
+            filter_query.append(
+                ConversationEvent.conversation.has(
+                    Conversation.created_by == created_by
+                )
+            )
+
+        # noinspection PyTypeChecker
+        rows = (
+            self.query(
+                ConversationEvent.conversation_id,
+                ConversationEvent.data,
+                ConversationEvent.is_flagged,
+                ConversationEvent.id,
+            )
+            .filter(*filter_query)
+            .order_by(
+                ConversationEvent.conversation_id.asc(),
+                ConversationEvent.timestamp.asc(),
+            )
+            .execution_options(stream_results=True)
+            .yield_per(STREAMED_EVENTS_CHUNK_SIZE)
+        )
+
+        for conversation_id, data, is_flagged, event_id in rows:
+            event = ConversationEvent.data_as_rasa_dict(data, is_flagged, event_id)
+            event["is_flagged"] = is_flagged
+            yield conversation_id, event
+
     def _conversation_exists(self, conversation_id: Text) -> bool:
         query = self.query(Conversation).filter(
             Conversation.sender_id == conversation_id
@@ -146,7 +323,7 @@ class EventService(DbService):
 
     def save_event(
         self,
-        body: Union[Text, bytes],
+        body: Union[Text, bytes, ParsedEvent],
         sender_id: Optional[Text] = None,
         event_number: Optional[int] = None,
         origin: Optional[Text] = None,
@@ -166,21 +343,29 @@ class EventService(DbService):
            `ConversationEvent` of the successfully saved event.
         """
         logger.debug(f"Saving event from origin '{origin}' to event service:\n{body}")
-        event = json.loads(body)
+        parsed_event = ParsedEvent.from_body(body)
+        event = parsed_event.event
 
-        if sender_id:
+        if sender_id and event.get("sender_id") != sender_id:
             event["sender_id"] = sender_id
+            parsed_event.is_modified = True
 
         self._track_import_process(import_process_id)
 
-        if event["event"] == UserUttered.type_name:
+        if event["event"] == UserUttered.type_name and event.get("parse_data", {}).get(
+            "response_selector"
+        ):
             self._expand_retrieval_intents(event)
+            parsed_event.is_modified = True
 
         self._update_conversation_metadata(event)
 
-        return self._save_conversation_event(event, event_number, origin=origin)
+        return self._save_conversation_event(
+            event, event_number, origin=origin, parsed_event=parsed_event
+        )
 
-    def _expand_retrieval_intents(self, event: Dict[Text, Any]) -> None:
+    @staticmethod
+    def _expand_retrieval_intents(event: Dict[Text, Any]) -> None:
         """Update all intent names within an event to reflect the full retrieval intent.
 
         If the event has a response_selector object attached, both the predicted `intent`
@@ -190,44 +375,17 @@ class EventService(DbService):
         Args:
             event: Event to be modified
         """
-
-        def expand_intent(
-            response_selector: Dict[Text, Any], intent_name: Text
-        ) -> Text:
-            # This should be invariant for a bot - can we cache it?
-            retrieval_intents = response_selector["all_retrieval_intents"]
-            if intent_name not in retrieval_intents:
-                return intent_name
-
-            retrieval_intent = response_selector.get(intent_name)
-            if not retrieval_intent:
-                retrieval_intent = response_selector["default"]
-
-            return retrieval_intent["response"]["intent_response_key"] or intent_name
-
         if event["event"] != UserUttered.type_name:
             return
 
-        parse_data = event.get("parse_data", {})
-        response_selector = parse_data.get("response_selector", None)
-
-        # This should also be invariant!
-        if not response_selector:
-            return
-
-        # Update the final predicted intent
-        intent = parse_data["intent"]
-        intent["name"] = expand_intent(response_selector, intent["name"])
-
-        # Update each ranked intent prediction
-        for prediction in parse_data["intent_ranking"]:
-            prediction["name"] = expand_intent(response_selector, prediction["name"])
+        retrieval_intents.expand_retrieval_intents(event.get("parse_data", {}))
 
     def _save_conversation_event(
         self,
         event: Dict[Text, Any],
         event_number: Optional[int] = None,
         origin: Optional[Text] = None,
+        parsed_event: Optional[ParsedEvent] = None,
     ) -> ConversationEvent:
         type_name = event.get("event")
         sender_id = event.get("sender_id")
@@ -251,7 +409,7 @@ class EventService(DbService):
             timestamp=timestamp,
             intent_name=intent,
             action_name=action,
-            data=json.dumps(event),
+            data=parsed_event.serialise() if parsed_event else json.dumps(event),
             policy=policy,
             rasa_environment=origin,
             slot_name=slot_name,
@@ -259,14 +417,55 @@ class EventService(DbService):
         )
 
         self._store_conversation_event(new_event)
-        self._update_statistics_from_event(new_event.as_rasa_dict(), event_number)
+        # the statistics don't depend on the Rasa X metadata which `as_rasa_dict()`
+        # adds, hence the event doesn't have to be decoded again
+        self._update_statistics_from_event(event, event_number)
 
         return new_event
 
     def _store_conversation_event(self, event: ConversationEvent) -> None:
+        # the NLU logs reference the ID of user events
+        if self.defer_event_inserts and event.type_name != UserUttered.type_name:
+            self._deferred_events.append(event)
+            return
+
+        # insert deferred events first to keep the IDs in the order of the events
+        self.flush_events()
         self.add(event)
         self.flush()  # flush to obtain ID
 
+    def flush_events(self) -> None:
+        """Insert the deferred events into the current transaction.
+
+        The events are inserted with a single `executemany` statement. Does
+        nothing if no events were deferred.
+        """
+        if not self._deferred_events:
+            return
+
+        events, self._deferred_events = self._deferred_events, []
+        self.bulk_save_objects(events)
+
+    def discard_events(self) -> None:
+        """Discard deferred events after a rollback."""
+        self._deferred_events = []
+
+    def _cached_conversation(
+        self, conversation_id: Text
+    ) -> Optional["CachedConversation"]:
+        """Get the cached metadata of a conversation.
+
+        Args:
+            conversation_id: Conversation ID to search for.
+
+        Returns:
+            The cached metadata or `None` if this service doesn't use a cache.
+        """
+        if self.conversation_cache is None:
+            return None
+
+        return self.conversation_cache.get(self.session, conversation_id)
+
     def _get_latest_session(
         self, conversation_id: Text
     ) -> Optional[ConversationSession]:
@@ -294,6 +493,10 @@ class EventService(DbService):
         Returns:
             `True` if the current session is in training data, otherwise `False`.
         """
+        cached = self._cached_conversation(conversation_id)
+        if cached:
+            return cached.is_latest_session_in_training_data()
+
         latest_session = self._get_latest_session(conversation_id)
         if latest_session:
             return latest_session.in_training_data
@@ -309,6 +512,10 @@ class EventService(DbService):
         Returns:
             IDs of `ConversationSession`s that are entirely in training data.
         """
+        cached = self._cached_conversation(conversation_id)
+        if cached:
+            return cached.session_ids_in_training_data()
+
         # noinspection PyTypeChecker
         session_ids = (
             self.query(ConversationSession.session_id).filter(
@@ -328,6 +535,10 @@ class EventService(DbService):
         Returns:
             ID of the current `ConversationSession`s, `None` if it doesn't exist.
         """
+        cached = self._cached_conversation(conversation_id)
+        if cached:
+            return cached.latest_session_id
+
         latest_session = self._get_latest_session(conversation_id)
         if latest_session:
             return latest_session.session_id
@@ -367,6 +578,10 @@ class EventService(DbService):
         Returns:
             Number of saved `ConversationSession`s.
         """
+        cached = self._cached_conversation(conversation_id)
+        if cached:
+            return cached.number_of_sessions
+
         # noinspection PyTypeChecker
         return (
             self.query(ConversationSession.session_id).filter(
@@ -425,8 +640,26 @@ class EventService(DbService):
             # Flush to obtain row id
             self.flush()
 
+            if self.conversation_cache is not None:
+                # the conversation might have been deleted and re-created
+                from rasax.community.services.conversation_metadata_cache import (
+                    CachedConversation,
+                )
+
+                self.conversation_cache.put(sender_id, CachedConversation())
+        elif self.conversation_cache is not None:
+            # the conversation might have been changed by the API or by another
+            # event consumer since its metadata was cached
+            self.conversation_cache.invalidate_if_changed(
+                sender_id, conversation.latest_event_time
+            )
+
         conversation.latest_event_time = event.get("timestamp")
 
+        cached = self._cached_conversation(sender_id)
+        if cached:
+            cached.latest_event_time = conversation.latest_event_time
+
         if tracker_utils.is_action_event(event):
             self._update_conversation_from_action(conversation, event)
             self._update_conversation_in_training_data(
@@ -462,14 +695,27 @@ class EventService(DbService):
     def _update_unique_actions(
         self, conversation: Conversation, action_name: Optional[Text]
     ) -> None:
-        # noinspection PyTypeChecker
-        unique_actions = (a.action for a in conversation.unique_actions)
+        cached = self._cached_conversation(conversation.sender_id)
+        if cached:
+            unique_actions = cached.actions
+        else:
+            # noinspection PyTypeChecker
+            unique_actions = (a.action for a in conversation.unique_actions)
+
         if action_name and action_name not in unique_actions:
-            self.add(
-                ConversationActionMetadata(
-                    conversation_id=conversation.sender_id, action=action_name
+            if cached:
+                self._add_metadata_if_absent(
+                    ConversationActionMetadata.action,
+                    conversation.sender_id,
+                    action_name,
+                )
+                cached.actions.add(action_name)
+            else:
+                self.add(
+                    ConversationActionMetadata(
+                        conversation_id=conversation.sender_id, action=action_name
+                    )
                 )
-            )
 
     def _update_conversation_from_user_event(
         self, conversation: Conversation, event: Dict[Text, Any]
@@ -497,14 +743,27 @@ class EventService(DbService):
         if not intent_name:
             return
 
-        # noinspection PyTypeChecker
-        unique_intents = (i.intent for i in conversation.unique_intents)
+        cached = self._cached_conversation(conversation.sender_id)
+        if cached:
+            unique_intents = cached.intents
+        else:
+            # noinspection PyTypeChecker
+            unique_intents = (i.intent for i in conversation.unique_intents)
+
         if intent_name not in unique_intents:
-            self.add(
-                ConversationIntentMetadata(
-                    conversation_id=conversation.sender_id, intent=intent_name
+            if cached:
+                self._add_metadata_if_absent(
+                    ConversationIntentMetadata.intent,
+                    conversation.sender_id,
+                    intent_name,
+                )
+                cached.intents.add(intent_name)
+            else:
+                self.add(
+                    ConversationIntentMetadata(
+                        conversation_id=conversation.sender_id, intent=intent_name
+                    )
                 )
-            )
 
     @staticmethod
     def _update_intent_confidences(
@@ -526,6 +785,16 @@ class EventService(DbService):
         self, conversation: Conversation, entities: List[Dict]
     ) -> None:
         entities = [e.get("entity") for e in entities]
+        cached = self._cached_conversation(conversation.sender_id)
+        if cached:
+            for e in entities:
+                if e not in cached.entities:
+                    self._add_metadata_if_absent(
+                        ConversationEntityMetadata.entity, conversation.sender_id, e
+                    )
+                    cached.entities.add(e)
+            return
+
         for e in entities:
             existing = (
                 self.query(ConversationEntityMetadata)
@@ -547,14 +816,61 @@ class EventService(DbService):
         self, conversation: Conversation, event: Dict[Text, Any]
     ) -> None:
         policy = self.extract_policy_base_from_event(event)
+        if not policy:
+            return
 
-        # noinspection PyTypeChecker
-        if policy and policy not in [p.policy for p in conversation.unique_policies]:
-            self.add(
-                ConversationPolicyMetadata(
-                    conversation_id=conversation.sender_id, policy=policy
+        cached = self._cached_conversation(conversation.sender_id)
+        if cached:
+            unique_policies = cached.policies
+        else:
+            # noinspection PyTypeChecker
+            unique_policies = [p.policy for p in conversation.unique_policies]
+
+        if policy not in unique_policies:
+            if cached:
+                self._add_metadata_if_absent(
+                    ConversationPolicyMetadata.policy, conversation.sender_id, policy
                 )
+                cached.policies.add(policy)
+            else:
+                self.add(
+                    ConversationPolicyMetadata(
+                        conversation_id=conversation.sender_id, policy=policy
+                    )
+                )
+
+    def _add_metadata_if_absent(
+        self, value_column: InstrumentedAttribute, conversation_id: Text, value: Text
+    ) -> None:
+        """Insert a metadata row of a conversation unless it exists already.
+
+        Cached metadata might miss rows which were inserted by another event
+        consumer, e.g. one which processed the conversation before a Kafka rebalance.
+        The insert hence must not fail if the row exists already.
+
+        Args:
+            value_column: Column of the metadata value, e.g.
+                `ConversationIntentMetadata.intent`.
+            conversation_id: ID of the conversation.
+            value: The metadata value, e.g. the name of an intent.
+        """
+        table = value_column.class_.__table__
+        row_exists = (
+            sqlalchemy.select([table.c.conversation_id])
+            .where(
+                and_(table.c.conversation_id == conversation_id, value_column == value,)
+            )
+            .exists()
+        )
+
+        self.execute(
+            table.insert().from_select(
+                [table.c.conversation_id, value_column.key],
+                sqlalchemy.select(
+                    [sqlalchemy.literal(conversation_id), sqlalchemy.literal(value)]
+                ).where(~row_exists),
             )
+        )
 
     def create_new_conversation(
         self,
@@ -649,9 +965,26 @@ class EventService(DbService):
 
         return None
 
+    def flush_statistics(self) -> None:
+        """Write the accumulated conversation statistics to the current transaction.
+
+        Does nothing if the service does not accumulate statistics.
+        """
+        if self.statistics_accumulator:
+            self.statistics_accumulator.flush(self.session)
+
+    def discard_statistics(self) -> None:
+        """Discard accumulated conversation statistics after a rollback."""
+        if self.statistics_accumulator:
+            self.statistics_accumulator.discard()
+
     def _update_statistics_from_event(
         self, event: Dict[Text, Any], event_number: Optional[int]
     ) -> None:
+        if self.statistics_accumulator:
+            self.statistics_accumulator.add_event(event, event_number)
+            return
+
         event_name = event.get("event")
         statistic = self.query(ConversationStatistic).first()
 
@@ -985,6 +1318,8 @@ class EventService(DbService):
         slots: Optional[List[Text]] = None,
         input_channels: Optional[List[Text]] = None,
         created_by: Optional[Text] = None,
+        after: Optional[Text] = None,
+        count_mode: Text = CONVERSATION_COUNT_EXACT,
     ) -> common_utils.QueryResult:
         """Returns list of conversations that match all given query parameters.
 
@@ -1021,10 +1356,38 @@ class EventService(DbService):
             input_channels: Return only conversations which have their
                 `latest_input_channel` set to ANY of these values.
             created_by: Name of the user who created the conversation.
+            after: Pagination cursor as returned by `encode_pagination_cursor`.
+                Only conversations which are sorted after the conversation the
+                cursor points to are returned. Can only be used when sorting by
+                date, and is used instead of `offset`.
+            count_mode: How to count the total number of matching conversations.
+                `exact` counts all of them, `approximate` stops counting at
+                `APPROXIMATE_CONVERSATION_COUNT_LIMIT` conversations, and `none`
+                doesn't count them at all.
+
+        Raises:
+            ValueError: If the pagination cursor is invalid or used with a sort
+                order other than sorting by date, or if `count_mode` is unknown.
 
         Returns:
-            List of conversations.
+            List of conversations. The total number of conversations is `None`
+            if `count_mode` is `none`.
         """
+        if count_mode not in CONVERSATION_COUNT_MODES:
+            raise ValueError(
+                f"Invalid count mode '{count_mode}'. Valid count modes are: "
+                f"{', '.join(CONVERSATION_COUNT_MODES)}."
+            )
+
+        if after and not self.supports_pagination_cursor(
+            sort_by_date, sort_by_confidence, in_training_data
+        ):
+            raise ValueError(
+                "Pagination cursors can only be used when sorting conversations "
+                "by date."
+            )
+        sort_by_confidence = in_training_data is False and sort_by_confidence
+
         conversations = self.query(Conversation)
 
         query = True
@@ -1105,11 +1468,12 @@ class EventService(DbService):
             )
 
         if text_query:
-            text_query = f"%{text_query}%"
             query = and_(
                 query,
                 Conversation.events.any(
-                    ConversationEvent.message_log.has(MessageLog.text.ilike(text_query))
+                    ConversationEvent.message_log.has(
+                        text_search.matches(self.session, MessageLog.text, text_query)
+                    )
                 ),
             )
 
@@ -1171,23 +1535,162 @@ class EventService(DbService):
             query = and_(query, Conversation.latest_input_channel.in_(input_channels))
 
         conversations = conversations.filter(query)
-        number_conversations = conversations.count()
+        number_conversations = self._count_conversations(conversations, count_mode)
 
-        if in_training_data is False and sort_by_confidence:
+        if sort_by_confidence:
             conversations = conversations.order_by(
                 Conversation.minimum_action_confidence.desc()
             )
         elif sort_by_date:
+            # `sender_id` makes the order deterministic, which is required for
+            # the keyset pagination
             conversations = conversations.order_by(
-                Conversation.latest_event_time.desc()
+                Conversation.latest_event_time.desc(), Conversation.sender_id.desc()
+            )
+
+        if after:
+            latest_event_time, sender_id = self.decode_pagination_cursor(after)
+            conversations = conversations.filter(
+                or_(
+                    Conversation.latest_event_time < latest_event_time,
+                    and_(
+                        Conversation.latest_event_time == latest_event_time,
+                        Conversation.sender_id < sender_id,
+                    ),
+                )
+            )
+        else:
+            conversations = conversations.offset(offset)
+
+        conversations = (
+            conversations.options(
+                selectinload(Conversation.unique_intents),
+                selectinload(Conversation.unique_actions),
+                selectinload(Conversation.unique_policies),
+                selectinload(Conversation.corrected_messages),
+                selectinload(Conversation.tags),
             )
+            .limit(limit)
+            .all()
+        )
 
-        conversations = conversations.offset(offset).limit(limit).all()
+        flagged = self._conversations_with_flagged_messages(
+            [c.sender_id for c in conversations]
+        )
 
         return common_utils.QueryResult(
-            [c.as_dict() for c in conversations], number_conversations
+            [
+                c.as_dict(has_flagged_messages=c.sender_id in flagged)
+                for c in conversations
+            ],
+            number_conversations,
+        )
+
+    @staticmethod
+    def _count_conversations(conversations: "Query", count_mode: Text) -> Optional[int]:
+        if count_mode == CONVERSATION_COUNT_NONE:
+            return None
+
+        if count_mode == CONVERSATION_COUNT_APPROXIMATE:
+            # Stop counting once the limit is reached so that the database doesn't
+            # have to scan all matching rows.
+            conversations = conversations.with_entities(Conversation.sender_id).limit(
+                APPROXIMATE_CONVERSATION_COUNT_LIMIT
+            )
+
+        return conversations.count()
+
+    def _conversations_with_flagged_messages(
+        self, conversation_ids: List[Text]
+    ) -> Set[Text]:
+        if not conversation_ids:
+            return set()
+
+        rows = (
+            self.query(ConversationEvent.conversation_id)
+            .filter(
+                ConversationEvent.conversation_id.in_(conversation_ids),
+                ConversationEvent.is_flagged,
+            )
+            .distinct()
+        )
+
+        return {conversation_id for (conversation_id,) in rows}
+
+    @staticmethod
+    def is_approximate_count_lower_bound(
+        number_conversations: int, count_mode: Text
+    ) -> bool:
+        """Determine whether a conversation count is only a lower bound.
+
+        Args:
+            number_conversations: Count as returned by
+                `get_conversation_metadata_for_all_clients`.
+            count_mode: Count mode which was used to count the conversations.
+
+        Returns:
+            `True` if counting stopped at `APPROXIMATE_CONVERSATION_COUNT_LIMIT`.
+        """
+        return (
+            count_mode == CONVERSATION_COUNT_APPROXIMATE
+            and number_conversations >= APPROXIMATE_CONVERSATION_COUNT_LIMIT
+        )
+
+    @staticmethod
+    def supports_pagination_cursor(
+        sort_by_date: bool, sort_by_confidence: bool, in_training_data: Optional[bool]
+    ) -> bool:
+        """Determine whether pagination cursors can be used for a sort order.
+
+        Args:
+            sort_by_date: Whether the conversations are sorted by date.
+            sort_by_confidence: Whether the conversations are sorted by confidence.
+            in_training_data: Value of the `in_training_data` filter. Sorting by
+                confidence is only applied if it's `False`.
+
+        Returns:
+            `True` if the conversations are sorted by date only.
+        """
+        sort_by_confidence = in_training_data is False and sort_by_confidence
+        return sort_by_date and not sort_by_confidence
+
+    @staticmethod
+    def encode_pagination_cursor(conversation: Dict[Text, Any]) -> Text:
+        """Create a pagination cursor which points to `conversation`.
+
+        Args:
+            conversation: Conversation as returned by
+                `get_conversation_metadata_for_all_clients`.
+
+        Returns:
+            Cursor which can be passed as `after` to fetch the next page.
+        """
+        return common_utils.encode_base64(
+            json.dumps([conversation["latest_event_time"], conversation["sender_id"]])
         )
 
+    @staticmethod
+    def decode_pagination_cursor(cursor: Text) -> Tuple[float, Text]:
+        """Decode a cursor created by `encode_pagination_cursor`.
+
+        Args:
+            cursor: The pagination cursor.
+
+        Raises:
+            ValueError: If the cursor is invalid.
+
+        Returns:
+            `latest_event_time` and `sender_id` of the conversation the cursor
+            points to.
+        """
+        try:
+            latest_event_time, sender_id = json.loads(
+                common_utils.decode_base64(cursor)
+            )
+            return float(latest_event_time), str(sender_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid pagination cursor '{cursor}'.") from e
+
     def get_number_of_conversations(self) -> int:
         """Retrieve the number of stored conversations.
 
@@ -1671,6 +2174,10 @@ class EventService(DbService):
         if conversation_session:
             self.delete_all(conversation_session)
 
+        self.query(ConversationSessionRollup).filter(
+            ConversationSessionRollup.conversation_id == conversation_id
+        ).delete(synchronize_session=False)
+
         self.delete(conversation)
         self.commit()
 
@@ -1769,7 +2276,11 @@ def read_event_broker_config(
     return None
 
 
-def main(should_run_liveness_endpoint: bool = True) -> None:
+def main(
+    should_run_liveness_endpoint: bool = True,
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+) -> None:
     """Start an event consumer and consume continuously.
 
     Args:
@@ -1777,6 +2288,10 @@ def main(should_run_liveness_endpoint: bool = True) -> None:
             background process that can be used to probe liveness of this service.
             The service will be exposed at a port defined by the
             `SELF_PORT` environment variable (5673 by default).
+        shard_index: Index of the shard this event service replica processes.
+            Overrides the `EVENT_SERVICE_SHARD_INDEX` environment variable.
+        shard_count: Total number of event service shards. Overrides the
+            `EVENT_SERVICE_SHARD_COUNT` environment variable.
 
     In server mode a simple Sanic server is run exposing a `/health` endpoint as a
     background process that can be used to probe liveness of this service.
@@ -1785,9 +2300,16 @@ def main(should_run_liveness_endpoint: bool = True) -> None:
     """
     common_utils.update_log_level()
 
+    if shard_index is not None:
+        rasa_x_config.event_service_shard_index = shard_index
+    if shard_count is not None:
+        rasa_x_config.event_service_shard_count = shard_count
+
     logger.info(
         f"Starting event service (standalone: "
-        f"{rasa_x_config.should_run_event_consumer_separately})."
+        f"{rasa_x_config.should_run_event_consumer_separately}, shard: "
+        f"{rasa_x_config.event_service_shard_index + 1} of "
+        f"{rasa_x_config.event_service_shard_count})."
     )
 
     endpoint_config = (
@@ -1813,11 +2335,39 @@ def initialize_event_service_for_standalone_mode() -> None:
         telemetry.initialize_from_db(session, overwrite_configuration=False)
 
 
-def run_event_service_in_standalone_mode() -> None:
-    """Runs the event service in standalone mode."""
+def run_event_service_in_standalone_mode(
+    shard_index: Optional[int] = None, shard_count: Optional[int] = None
+) -> None:
+    """Runs the event service in standalone mode.
+
+    Args:
+        shard_index: Index of the shard this event service replica processes.
+        shard_count: Total number of event service shards.
+    """
     initialize_event_service_for_standalone_mode()
-    main()
+    main(shard_index=shard_index, shard_count=shard_count)
+
+
+def _create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the Rasa X event service.")
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=None,
+        help="Index of the shard this event service replica processes. Defaults to "
+        "the `EVENT_SERVICE_SHARD_INDEX` environment variable.",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=None,
+        help="Total number of event service shards. Defaults to the "
+        "`EVENT_SERVICE_SHARD_COUNT` environment variable.",
+    )
+
+    return parser
 
 
 if __name__ == "__main__":
-    run_event_service_in_standalone_mode()
+    arguments = _create_argument_parser().parse_args()
+    run_event_service_in_standalone_mode(arguments.shard_index, arguments.shard_count)
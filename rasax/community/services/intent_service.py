@@ -221,13 +221,11 @@ class IntentService(DbService):
         self, intents: List[Dict[str, Union[str, List[str]]]]
     ) -> None:
         logs_service = LogsService(self.session)
+        suggestions = logs_service.get_suggestion_hashes_by_intent(
+            [i[INTENT_NAME_KEY] for i in intents]
+        )
         for i in intents:
-            suggestions, _ = logs_service.fetch_logs(
-                intent_query=i[INTENT_NAME_KEY],
-                fields_query=[("hash", True)],
-                exclude_training_data=True,
-            )
-            i[INTENT_SUGGESTIONS_KEY] = [s.get("hash") for s in suggestions]
+            i[INTENT_SUGGESTIONS_KEY] = suggestions.get(i[INTENT_NAME_KEY], [])
 
     def _add_user_goals_to_intents(
         self, intents: List[Dict[str, Union[str, List[str]]]], project_id: Text
@@ -3,7 +3,7 @@ import json
 import logging
 import time
 from pathlib import Path
-from typing import Dict, Text, Any, Optional, List, Tuple, Union
+from typing import Dict, Text, Any, Optional, List, Tuple, Union, Iterable
 
 from sanic.request import Request
 
@@ -17,7 +17,11 @@ import rasax.community.utils.common as common_utils
 import rasax.community.constants as constants
 from rasax.community.database.conversation import MessageLog
 from rasax.community.database.service import DbService
+from rasax.community.database import text_search
+from rasax.community.database import utils as db_utils
+from rasax.community.services import retrieval_intents
 from rasax.community.services.model_service import ModelService
+from rasax.community.services.parsed_event import ParsedEvent
 from rasax.community.services.settings_service import SettingsService
 
 logger = logging.getLogger(__name__)
@@ -68,10 +72,11 @@ class LogsService(DbService):
 
         if text_query and intent_query:
             query = or_(
-                MessageLog.text.like(f"%{text_query}%"), MessageLog.intent.in_(intents)
+                text_search.matches(self.session, MessageLog.text, text_query),
+                MessageLog.intent.in_(intents),
             )
         elif text_query:
-            query = MessageLog.text.like(f"%{text_query}%")
+            query = text_search.matches(self.session, MessageLog.text, text_query)
         elif intent_query:
             query = MessageLog.intent.in_(intents)
 
@@ -119,6 +124,55 @@ class LogsService(DbService):
 
         return common_utils.QueryResult(results, total_number_logs)
 
+    def get_suggestion_hashes_by_intent(
+        self, intents: Optional[List[Text]] = None
+    ) -> Dict[Text, List[Text]]:
+        """Get the hashes of the suggested training examples of each intent.
+
+        Suggested training examples are message logs which are neither archived nor
+        part of the training data. The suggestions of all intents are fetched with a
+        single query. Given `intents` are filtered in the database, with one query
+        per chunk of intents.
+
+        Args:
+            intents: Intents to get the suggestions for. Defaults to all intents.
+
+        Returns:
+            The hashes of the suggested message logs by intent, most recent first.
+            Intents without suggestions are not included.
+        """
+        if intents is None:
+            return self._get_suggestion_hashes_by_intent()
+
+        suggestions: Dict[Text, List[Text]] = {}
+        # Every intent is part of exactly one chunk, hence the order of the hashes of
+        # each intent is kept
+        for chunk in common_utils.chunks(
+            list(set(intents)), db_utils.MAXIMUM_VALUES_PER_IN_CLAUSE
+        ):
+            suggestions.update(
+                self._get_suggestion_hashes_by_intent(MessageLog.intent.in_(chunk))
+            )
+
+        return suggestions
+
+    def _get_suggestion_hashes_by_intent(self, *filters: Any) -> Dict[Text, List[Text]]:
+        logs = (
+            self.query(MessageLog.intent, MessageLog.hash)
+            .filter(
+                MessageLog.archived == false(),
+                MessageLog.in_training_data == false(),
+                *filters,
+            )
+            .order_by(MessageLog.id.desc())
+        )
+
+        suggestions: Dict[Text, List[Text]] = {}
+        for intent, _hash in logs:
+            suggestions.setdefault(intent, []).append(_hash)
+
+        return suggestions
+
     def archive(self, log_id: int) -> bool:
         """Mark a message log as archived.
 
@@ -342,6 +396,8 @@ class LogsService(DbService):
     ) -> MessageLog:
         """Create a new `MessageLog` object from a parsed user message data.
 
+        Retrieval intents in `parse_data` are expanded to the full retrieval intent.
+
         Args:
             parse_data: NLU parse result for a user message.
             event_id: ID of the user message event.
@@ -360,6 +416,8 @@ class LogsService(DbService):
             else constants.UNAVAILABLE_MODEL_NAME
         )
 
+        retrieval_intents.expand_retrieval_intents(parse_data)
+
         text = parse_data.get("text")
         intent = parse_data.get("intent", {})
 
@@ -378,7 +436,7 @@ class LogsService(DbService):
 
     def save_nlu_logs_from_event(
         self,
-        event_data: Union[Text, bytes],
+        event_data: Union[Text, bytes, ParsedEvent],
         event_id: Optional[int] = None,
         sender_id: Optional[Text] = None,
     ) -> Optional[int]:
@@ -395,7 +453,7 @@ class LogsService(DbService):
             The ID of the created or updated message log in the database.
         """
         try:
-            event = Event.from_parameters(json.loads(event_data))
+            event = Event.from_parameters(ParsedEvent.from_body(event_data).event)
             if isinstance(event, UserUttered):
                 log = self.create_log_from_parse_data(
                     event.parse_data, event_id=event_id, sender_id=sender_id
@@ -405,6 +463,19 @@ class LogsService(DbService):
         except ValueError as e:
             logger.exception(f"Could not persist event '{e}' to NLU logs:\n {e}")
 
+    def mark_logs_as_in_training_data(self, message_hashes: Iterable[Text]) -> None:
+        """Mark `MessageLog`s with matching text hashes as included in the training data.
+
+        Args:
+            message_hashes: The hashes of the messages.
+        """
+        for hashes in common_utils.chunks(
+            list(set(message_hashes)), db_utils.MAXIMUM_VALUES_PER_IN_CLAUSE
+        ):
+            self.query(MessageLog).filter(MessageLog.hash.in_(hashes)).update(
+                {MessageLog.in_training_data: True}, synchronize_session=False
+            )
+
     def bulk_update_in_training_data_column(
         self,
         message_log: Optional[sa.Table] = None,
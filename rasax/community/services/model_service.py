@@ -1,15 +1,18 @@
 import asyncio  # pytype: disable=pyi-error
 import datetime
+import functools
 import glob
 import logging
 import os
 import shutil
 import tarfile
-import tempfile
 import time
 import ctypes
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing.context import BaseContext  # type: ignore
-from typing import Optional, Text, Dict, Any, List, Union
+from typing import Optional, Text, Dict, Any, List, Set, Union, Tuple
 
 from aiohttp import ClientConnectorError
 from packaging import version
@@ -31,6 +34,12 @@ logger = logging.getLogger(__name__)
 
 FINGERPRINT_FILE_PATH = "fingerprint.json"
 
+# file in the model directory which caches the metadata of the models
+MODEL_METADATA_CACHE_FILE = ".model_metadata_cache.json"
+
+# maximum number of threads which read model metadata during model discovery
+MAXIMUM_MODEL_DISCOVERY_WORKERS = 8
+
 # We use this to not serve any models to Rasa Open Source until we successfully
 # validated (e.g. minimum compatible version) the models.
 were_models_discovered: Optional[BaseContext.Value] = None
@@ -65,6 +74,132 @@ def _model_discovery_completed() -> bool:
     return False
 
 
+class ModelMetadataCache:
+    """Caches the metadata of model archives.
+
+    Entries are keyed by the path, size and modification time of the model
+    archive, so that a model which is replaced on disk is read again. The cache of
+    each model directory is persisted in that directory by `persist`, which means
+    that models don't have to be read again after a restart.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Text, Dict[Text, Dict[Text, Any]]] = {}
+        # directories whose entries changed since they were persisted
+        self._changed_directories: Set[Text] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cache_file(directory: Text) -> Text:
+        return os.path.join(directory, MODEL_METADATA_CACHE_FILE)
+
+    @staticmethod
+    def _file_signature(path: Text) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _entries_for_directory(self, directory: Text) -> Dict[Text, Dict[Text, Any]]:
+        entries = self._entries.get(directory)
+        if entries is None:
+            try:
+                entries = io_utils.read_json_file(self._cache_file(directory))
+            except (ValueError, OSError):
+                # the cache file doesn't exist yet, is invalid or can't be read
+                entries = {}
+
+            self._entries[directory] = entries
+
+        return entries
+
+    def get(self, path: Text) -> Optional[Dict[Text, Any]]:
+        """Get the cached metadata of the model at `path`.
+
+        Args:
+            path: Path of the model archive.
+
+        Returns:
+            The metadata or `None` if the model is not cached or changed since it
+            was cached.
+        """
+        directory, filename = os.path.split(os.path.abspath(path))
+        size, modification_time = self._file_signature(path)
+
+        with self._lock:
+            entry = self._entries_for_directory(directory).get(filename)
+
+        if (
+            entry
+            and entry["size"] == size
+            and entry["modification_time"] == modification_time
+        ):
+            return entry["metadata"]
+
+        return None
+
+    def put(self, path: Text, metadata: Dict[Text, Any]) -> None:
+        """Cache the metadata of the model at `path`.
+
+        The entry is only kept in memory until `persist` is called.
+
+        Args:
+            path: Path of the model archive.
+            metadata: Metadata of the model.
+        """
+        directory, filename = os.path.split(os.path.abspath(path))
+        size, modification_time = self._file_signature(path)
+
+        with self._lock:
+            self._entries_for_directory(directory)[filename] = {
+                "size": size,
+                "modification_time": modification_time,
+                "metadata": metadata,
+            }
+            self._changed_directories.add(directory)
+
+    def persist(self) -> None:
+        """Write the cache files of the directories whose entries changed."""
+        with self._lock:
+            directories, self._changed_directories = self._changed_directories, set()
+
+            for directory in directories:
+                entries = self._entries[directory]
+
+                # remove entries of models which were deleted in the meantime
+                for cached_filename in list(entries):
+                    if not os.path.exists(os.path.join(directory, cached_filename)):
+                        del entries[cached_filename]
+
+                try:
+                    io_utils.write_file_atomically(
+                        self._cache_file(directory), json.dumps(entries)
+                    )
+                except OSError as e:
+                    logger.debug(
+                        f"Could not persist the model metadata cache in "
+                        f"'{directory}': {e}."
+                    )
+
+
+model_metadata_cache = ModelMetadataCache()
+
+
+def _read_model_metadata_from_archive(path: Text) -> Dict[Text, Any]:
+    # Read the archive as stream and stop as soon as the fingerprint was found, so
+    # that neither the whole archive has to be decompressed nor written to disk.
+    with tarfile.open(path, "r|*") as tar:
+        for member in tar:
+            if os.path.normpath(member.name) != FINGERPRINT_FILE_PATH:
+                continue
+
+            metadata_file = tar.extractfile(member)
+            if metadata_file is None:
+                break
+
+            return json.loads(metadata_file.read().decode(io_utils.DEFAULT_ENCODING))
+
+    raise FileNotFoundError(f"'{FINGERPRINT_FILE_PATH}' is missing in '{path}'.")
+
+
 class ModelService(DbService):
     version_key = "version"
 
@@ -179,9 +314,11 @@ class ModelService(DbService):
     ) -> None:
         minimum_version = await self._retry_fetching_minimum_compatible_version()
 
+        paths = glob.glob(os.path.join(self.model_directory, "*.tar.gz"))
+        all_metadata = await self._read_model_metadata_in_parallel(paths)
+
         available_model_names = []
-        for path in glob.glob(os.path.join(self.model_directory, "*.tar.gz")):
-            metadata = self.get_model_metadata(path)
+        for path, metadata in zip(paths, all_metadata):
             model_version = self.get_model_version(metadata)
             is_compatible = self.is_model_compatible(
                 minimum_version, model_version=model_version
@@ -214,6 +351,37 @@ class ModelService(DbService):
 
         self.delete_not_existing_models_from_db(project_id, available_model_names)
 
+    @staticmethod
+    async def _read_model_metadata_in_parallel(
+        paths: List[Text],
+    ) -> List[Optional[Dict[Text, Any]]]:
+        """Read the metadata of the models at `paths` using a thread pool.
+
+        The model metadata cache is persisted once all models were read.
+
+        Args:
+            paths: Paths of the model archives.
+
+        Returns:
+            The metadata of each model in the same order as `paths`.
+        """
+        if not paths:
+            return []
+
+        loop = asyncio.get_event_loop()
+        max_workers = min(MAXIMUM_MODEL_DISCOVERY_WORKERS, len(paths))
+        read_metadata = functools.partial(
+            ModelService.get_model_metadata, should_persist_cache=False
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            all_metadata = await asyncio.gather(
+                *[loop.run_in_executor(executor, read_metadata, path) for path in paths]
+            )
+
+        await loop.run_in_executor(None, model_metadata_cache.persist)
+
+        return all_metadata
+
     def delete_not_existing_models_from_db(
         self, project_id: Text, available_models: List[Text]
     ):
@@ -253,7 +421,7 @@ class ModelService(DbService):
     def _store_trained_model_on_disk(self, content: bytes) -> Optional[Text]:
         # save model at temporary location to extract metadata timestamp
         temp_model_path = io_utils.create_temporary_file(data=content, mode="w+b")
-        metadata = self.get_model_metadata(temp_model_path)
+        metadata = self.get_model_metadata(temp_model_path, use_cache=False)
         model_timestamp = self.get_model_training_time_from_file_as_str(
             metadata, temp_model_path
         )
@@ -293,13 +461,13 @@ class ModelService(DbService):
     async def add_model(
         self, project: Text, model_name: Text, path: Text
     ) -> Optional[Dict[Text, Any]]:
-        model_hash = self._get_model_hash(path)
-
         existing = self.get_model_by_name(project, model_name)
         if existing:
             # no need to add, we already got this one
             return existing
 
+        model_hash = self._get_model_hash(path)
+
         metadata = self.get_model_metadata(path)
         model_version = self.get_model_version(metadata)
         training_time = self.get_training_time_as_unix_timestamp(metadata, path)
@@ -585,17 +753,34 @@ class ModelService(DbService):
                 self.delete(t)
 
     @staticmethod
-    def get_model_metadata(path: Text) -> Optional[Dict[Text, Any]]:
-        """Retrieve model metadata for file at `path`."""
+    def get_model_metadata(
+        path: Text, use_cache: bool = True, should_persist_cache: bool = True
+    ) -> Optional[Dict[Text, Any]]:
+        """Retrieve model metadata for file at `path`.
+
+        Args:
+            path: Path of the model archive.
+            use_cache: If `True`, the metadata is read from and stored in the model
+                metadata cache. Should be `False` for temporary files.
+            should_persist_cache: If `True`, the model metadata cache is persisted
+                right away if the metadata was added to it. Should be `False` if
+                many models are read, in which case `ModelMetadataCache.persist`
+                has to be called once they were read.
 
-        temp_dir = tempfile.mkdtemp()
+        Returns:
+            The model metadata or `None` if it couldn't be read.
+        """
 
         try:
-            tar = tarfile.open(path)
-            tar.extractall(temp_dir)
-            tar.close()
-            metadata_path = os.path.join(temp_dir, FINGERPRINT_FILE_PATH)
-            return io_utils.read_json_file(metadata_path)
+            metadata = model_metadata_cache.get(path) if use_cache else None
+            if metadata is None:
+                metadata = _read_model_metadata_from_archive(path)
+                if use_cache:
+                    model_metadata_cache.put(path, metadata)
+                    if should_persist_cache:
+                        model_metadata_cache.persist()
+
+            return metadata
         except tarfile.TarError as e:
             logger.error(f"Failed to open model at path '{path}': {e}.")
         except (FileNotFoundError, ValueError):
@@ -605,8 +790,6 @@ class ModelService(DbService):
                 "Encountered error while reading metadata for model at path "
                 "'{}': {}.".format(path, e)
             )
-        finally:
-            shutil.rmtree(temp_dir)
 
     def get_model_version(
         self, metadata: Optional[Dict], default_version: Text = "0.0.0"
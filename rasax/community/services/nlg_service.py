@@ -13,6 +13,7 @@ import rasax.community.utils.cli as cli_utils
 from rasa.shared.constants import UTTER_PREFIX
 from rasax.community.database.data import Response
 from rasax.community.database.service import DbService
+from rasax.community.database import text_search
 
 logger = logging.getLogger(__name__)
 
@@ -178,7 +179,9 @@ class NlgService(DbService):
         query_joiner = and_ if intersect_filters else or_
 
         if text_query:
-            query = query_joiner(query, Response.text.ilike(f"%{text_query}%"))
+            query = query_joiner(
+                query, text_search.matches(self.session, Response.text, text_query)
+            )
 
         if response_query:
             query = query_joiner(query, Response.response_name.in_(responses_to_query))
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Text, Tuple
+
+# Number of examples, greatest example ID and latest annotation time of an intent.
+# Adding, deleting or replacing an example of the intent changes its fingerprint.
+IntentFingerprint = Tuple[int, Optional[int], Optional[float]]
+
+
+class CachedIntentExamples(NamedTuple):
+    """Training examples of a single intent within an NLU file."""
+
+    fingerprint: IntentFingerprint
+    # Tuples of example ID and the example
+    examples: List[Tuple[int, Dict[Text, Any]]]
+
+
+class TrainingExampleCache:
+    """Cache of the training examples of each NLU file grouped by intent.
+
+    Dumping an NLU file only has to re-read the examples of intents which changed
+    since the file was dumped the last time. The cache lives in the process which
+    dumps the files and is validated against the fingerprints of the intents in the
+    database before each dump, so changes made by other processes are picked up.
+    """
+
+    def __init__(self) -> None:
+        self._files: Dict[Tuple[Text, Text], Dict[Text, CachedIntentExamples]] = {}
+
+    def get(self, project_id: Text, filename: Text) -> Dict[Text, CachedIntentExamples]:
+        """Get the cached examples of an NLU file.
+
+        Args:
+            project_id: Project which the NLU file belongs to.
+            filename: Path of the NLU file.
+
+        Returns:
+            The cached examples by intent.
+        """
+        return self._files.get((project_id, filename), {})
+
+    def set(
+        self,
+        project_id: Text,
+        filename: Text,
+        intents: Dict[Text, CachedIntentExamples],
+    ) -> None:
+        """Replace the cached examples of an NLU file.
+
+        Args:
+            project_id: Project which the NLU file belongs to.
+            filename: Path of the NLU file.
+            intents: The examples of the file by intent.
+        """
+        if intents:
+            self._files[(project_id, filename)] = intents
+        else:
+            self._files.pop((project_id, filename), None)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        self._files.clear()
+
+
+# training examples of the NLU files which were dumped by this process
+training_example_cache = TrainingExampleCache()
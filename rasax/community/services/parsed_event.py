@@ -0,0 +1,67 @@
+from typing import Any, Dict, Optional, Text, Union
+
+import rasax.community.utils.json as json_utils
+
+
+class ParsedEvent:
+    """A consumed event which is decoded once and shared by all services.
+
+    The services which process an event (e.g. `EventService`, `LogsService` and
+    `AnalyticsService`) work on the same decoded event. Services which change the
+    event have to mark it as modified, otherwise the original serialized event is
+    stored as is.
+    """
+
+    def __init__(self, raw: Union[Text, bytes]) -> None:
+        """Wrap a serialized event.
+
+        Args:
+            raw: The event as JSON document.
+        """
+        self.raw = raw
+        self.is_modified = False
+        self._event: Optional[Dict[Text, Any]] = None
+
+    @classmethod
+    def from_body(cls, body: Union[Text, bytes, "ParsedEvent"]) -> "ParsedEvent":
+        """Wrap `body` unless it's a `ParsedEvent` already.
+
+        Args:
+            body: Serialized or parsed event.
+
+        Returns:
+            The parsed event.
+        """
+        if isinstance(body, ParsedEvent):
+            return body
+
+        return cls(body)
+
+    @property
+    def event(self) -> Dict[Text, Any]:
+        """The decoded event. The event is decoded on first access.
+
+        Raises:
+            ValueError: If the event is not a valid JSON document.
+        """
+        if self._event is None:
+            self._event = json_utils.loads(self.raw)
+
+        return self._event
+
+    def serialise(self) -> Text:
+        """Serialize the event for storage.
+
+        Returns:
+            The original JSON document if the event wasn't modified, otherwise the
+            encoded modified event.
+        """
+        if not self.is_modified:
+            if isinstance(self.raw, bytes):
+                return self.raw.decode("utf-8")
+            return self.raw
+
+        return json_utils.dumps(self.event)
+
+    def __str__(self) -> Text:
+        return self.serialise()
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Text
+
+DEFAULT_MAXIMUM_CACHED_MODELS = 100
+
+
+class RetrievalIntentCache:
+    """Bounded LRU cache of the retrieval intents of each model.
+
+    The retrieval intents of a model are part of every response selector result it
+    returns (`all_retrieval_intents`). They only change if a new model is trained,
+    hence they are cached by the model name, which contains the model's fingerprint.
+    """
+
+    def __init__(self, maximum_size: int = DEFAULT_MAXIMUM_CACHED_MODELS) -> None:
+        """Create an empty cache.
+
+        Args:
+            maximum_size: Maximum number of cached models. The least recently used
+                model is evicted once this size is exceeded.
+        """
+        self.maximum_size = maximum_size
+        self._entries: "OrderedDict[Text, FrozenSet[Text]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, model: Optional[Text], response_selector: Dict[Text, Any]
+    ) -> FrozenSet[Text]:
+        """Get the retrieval intents of `model`.
+
+        Args:
+            model: Name of the model which created `response_selector`. The retrieval
+                intents aren't cached if the model is unknown.
+            response_selector: Response selector result of the model.
+
+        Returns:
+            Names of the model's retrieval intents.
+        """
+        if not model:
+            return frozenset(response_selector["all_retrieval_intents"])
+
+        retrieval_intents = self._entries.get(model)
+        if retrieval_intents is None:
+            retrieval_intents = frozenset(response_selector["all_retrieval_intents"])
+            self._entries[model] = retrieval_intents
+
+            while len(self._entries) > self.maximum_size:
+                self._entries.popitem(last=False)
+
+        self._entries.move_to_end(model)
+
+        return retrieval_intents
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        self._entries.clear()
+
+
+# retrieval intents of the models which parsed the consumed messages
+retrieval_intent_cache = RetrievalIntentCache()
+
+
+def _full_retrieval_intent(
+    response_selector: Dict[Text, Any], retrieval_intent: Text
+) -> Text:
+    selector_result = response_selector.get(retrieval_intent)
+    if not selector_result:
+        selector_result = response_selector["default"]
+
+    return selector_result["response"]["intent_response_key"] or retrieval_intent
+
+
+def expand_retrieval_intents(
+    parse_data: Dict[Text, Any], cache: Optional[RetrievalIntentCache] = None
+) -> None:
+    """Update all intent names within `parse_data` to the full retrieval intent.
+
+    If `parse_data` contains a response selector result, both the predicted `intent`
+    and each item in the `intent_ranking` have their `name` expanded to match the
+    corresponding retrieval intent (if any). Intent names which were already
+    expanded are left unchanged.
+
+    Args:
+        parse_data: NLU parse result which is modified in place.
+        cache: Cache of the retrieval intents of each model. Defaults to
+            `retrieval_intent_cache`.
+    """
+    response_selector = parse_data.get("response_selector")
+    if not response_selector:
+        return
+
+    if cache is None:
+        cache = retrieval_intent_cache
+    retrieval_intents = cache.get(parse_data.get("model"), response_selector)
+
+    # the full retrieval intents depend on the predicted responses of the message
+    expanded_intents: Dict[Text, Text] = {}
+
+    def expand_intent(intent_name: Text) -> Text:
+        if intent_name not in retrieval_intents:
+            return intent_name
+
+        if intent_name not in expanded_intents:
+            expanded_intents[intent_name] = _full_retrieval_intent(
+                response_selector, intent_name
+            )
+
+        return expanded_intents[intent_name]
+
+    intent = parse_data.get("intent")
+    if intent:
+        intent["name"] = expand_intent(intent.get("name"))
+
+    for prediction in parse_data.get("intent_ranking", []):
+        prediction["name"] = expand_intent(prediction.get("name"))
@@ -1,5 +1,6 @@
 import logging
-from typing import List, Text, Optional, Dict, Any
+from functools import lru_cache
+from typing import List, Text, Optional, Dict, Any, Tuple
 
 from ruamel.yaml.compat import ordereddict
 from sqlalchemy import and_
@@ -9,7 +10,13 @@ import rasax.community.config as rasa_x_config
 import rasax.community.constants as constants
 from rasax.community.database.admin import Role, Permission, Project, User
 from rasax.community.database.service import DbService
-from rasax.community.services.user_service import ADMIN, ANNOTATOR, TESTER, UserService
+from rasax.community.services.user_service import (
+    ADMIN,
+    ANNOTATOR,
+    TESTER,
+    UserService,
+    invalidate_api_token_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -308,6 +315,50 @@ def permissions_for_category(category: Text) -> List[Text]:
     ]
 
 
+@lru_cache(maxsize=None)
+def _api_permissions() -> Tuple[Text, ...]:
+    return tuple(
+        ".".join((category, mode, action))
+        for category, actions in PERMISSIONS.items()
+        for mode, action_set in actions.items()
+        for action in action_set
+    )
+
+
+@lru_cache(maxsize=None)
+def _api_permissions_by_prefix() -> Dict[Text, Tuple[Text, ...]]:
+    """Index all API permissions by every prefix of their name.
+
+    Wildcard permissions (e.g. `basic.view.*`) match all API permissions which start
+    with the part before the `*`, so expanding them is a lookup in this index.
+    """
+    index: Dict[Text, List[Text]] = {}
+    for permission in _api_permissions():
+        for end in range(len(permission) + 1):
+            index.setdefault(permission[:end], []).append(permission)
+
+    return {prefix: tuple(permissions) for prefix, permissions in index.items()}
+
+
+def expand_wildcard_permission(permission: Text) -> Tuple[Text, ...]:
+    """Expand an API permission which might contain a wildcard (`*`).
+
+    Args:
+        permission: The permission, e.g. `basic.view.*` or `basic.view.user.get`.
+
+    Returns:
+        All API permissions which `permission` grants. Unknown permissions don't
+        grant any API permissions.
+    """
+    if "*" in permission:
+        return _api_permissions_by_prefix().get(permission.replace("*", ""), ())
+
+    if permission in _api_permissions_by_prefix().get(permission, ()):
+        return (permission,)
+
+    return ()
+
+
 def normalise_permissions(perms: List[Text]) -> List[Text]:
     """Normalises permission strings to be sanic-jwt-compatible.
 
@@ -337,13 +388,7 @@ class RoleService(DbService):
     def api_permissions(self) -> List[Text]:
         """Retrieve list of all existing API permissions."""
 
-        permissions_list = []
-        for category, actions in PERMISSIONS.items():
-            for mode, action_set in actions.items():
-                for action in action_set:
-                    permissions_list.append(".".join((category, mode, action)))
-
-        return permissions_list
+        return list(_api_permissions())
 
     @property
     def roles(self) -> List[Text]:
@@ -428,6 +473,7 @@ class RoleService(DbService):
         role = self.query(Role).filter(Role.role == role).first()
 
         self.delete(role)
+        invalidate_api_token_cache(self.session)
 
     def get_stripped_role_permissions(self, roles: List[Role]) -> List[Text]:
         """Returns a list of stripped permissions for `roles`.
@@ -443,26 +489,12 @@ class RoleService(DbService):
 
         return _strip_category_from_permissions(permissions)
 
-    def _expand_wildcard_permission(self, permission: Text) -> List[Text]:
-        permissions_list = []
-        if "*" in permission:
-            permission = permission.replace("*", "")
-            for p in self.api_permissions:
-                if p.startswith(permission):
-                    permissions_list.append(p)
-
-        elif permission in self.api_permissions:
-            permissions_list.append(permission)
-
-        return permissions_list
-
-    def expand_wildcard_permissions(
-        self, unexpanded_permissions: List[Text]
-    ) -> List[Text]:
+    @staticmethod
+    def expand_wildcard_permissions(unexpanded_permissions: List[Text]) -> List[Text]:
         """Expand API permissions with wildcard syntax (`*`)."""
 
         permission_list = set()
-        for expanded in map(self._expand_wildcard_permission, unexpanded_permissions):
+        for expanded in map(expand_wildcard_permission, unexpanded_permissions):
             permission_list.update(expanded)
 
         return list(permission_list)
@@ -526,6 +558,7 @@ class RoleService(DbService):
 
             try:
                 self.bulk_save_objects(permission_objects)
+                invalidate_api_token_cache(self.session)
             except IntegrityError as e:
                 logger.debug(
                     "Permissions '{}' could not be saved due to '{}'."
@@ -549,6 +582,7 @@ class RoleService(DbService):
             .all()
         )
         self.delete_all(permissions)
+        invalidate_api_token_cache(self.session)
 
     def backend_to_frontend_format_roles(
         self, backend_roles: List[Text]
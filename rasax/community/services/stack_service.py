@@ -1,22 +1,34 @@
 import asyncio  # pytype: disable=pyi-error
-
+import itertools
 import logging
 import typing
 from http import HTTPStatus
-from typing import Any, Dict, List, Optional, Text, Union, Tuple
-
-import aiohttp
-from aiohttp import ClientError, ClientSession
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Text,
+    Union,
+    Tuple,
+)
+
+from aiohttp import ClientError
 from concurrent.futures import TimeoutError  # pytype: disable=pyi-error
 
 from sanic.request import Request
+from sqlalchemy.orm import Session
 
 from rasa.shared.core.events import Restarted
 from rasa.shared.core.trackers import EventVerbosity
 import rasax.community.data as data
 import rasax.community.jwt
 import rasax.community.utils.cli as cli_utils
+import rasax.community.utils.http as http_utils
 import rasax.community.utils.io as io_utils
+import rasax.community.utils.json as json_utils
 import rasax.community.utils.yaml as yaml_utils
 import rasax.community.config as rasa_x_config
 import rasax.community.constants as constants
@@ -25,10 +37,9 @@ import rasax.community.utils.common as common_utils
 from rasax.community.services.user_service import GUEST
 
 # TODO: See comment about RESPONSE_KEY_ATTRIBUTE in data_service.py.
-from rasax.community.services.data_service import RESPONSE_KEY_ATTRIBUTE
+from rasax.community.services.data_service import RESPONSE_KEY_ATTRIBUTE, DataService
 
 if typing.TYPE_CHECKING:
-    from rasax.community.services.data_service import DataService
     from rasax.community.services.story_service import StoryService
     from rasax.community.services.domain_service import DomainService
     from rasax.community.services.settings_service import (  # pytype: disable=pyi-error
@@ -41,6 +52,9 @@ RASA_VERSION_KEY = "version"
 INCLUDE_EVENTS_QUERY_PARAM = "include_events"
 TOKEN_QUERY_PARAM = "token"
 
+# maximum number of streamed chunks which are read ahead of the request
+STREAMED_CHUNKS_QUEUE_SIZE = 4
+
 
 class RasaCredentials(typing.NamedTuple):
     """Credentials to connect and authenticate to a Rasa Open Source environment."""
@@ -103,15 +117,52 @@ class StackService:
             return await response.json()
 
     @staticmethod
-    def _session() -> ClientSession:
-        """Create session for requests to a Rasa Open Source instance.
+    def _session() -> http_utils.SharedClientSession:
+        """Get the session for requests to a Rasa Open Source instance.
+
+        The session is shared by all `StackService`s of the current event loop so
+        that connections to the Rasa Open Source instances are reused.
 
         Returns:
             Session with default configuration.
         """
-        return aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=constants.DEFAULT_REQUEST_TIMEOUT),
-            raise_for_status=True,
+        return http_utils.client_session()
+
+    def _training_request_body(
+        self, payload: Dict[Text, Any], md_formatted_data: Text, project_id: Text
+    ) -> AsyncIterator[bytes]:
+        """Stream the JSON body of a training request.
+
+        The lookup tables are appended to the NLU training data while they are read
+        from the database. This happens in a separate thread, which requires its
+        own database session.
+
+        Args:
+            payload: Training request without the NLU training data.
+            md_formatted_data: NLU training data without lookup tables in Markdown.
+            project_id: Project whose lookup tables are added.
+
+        Returns:
+            The encoded parts of the request body.
+        """
+        bind = self.data_service.session.get_bind()
+
+        def _encoded_parts() -> Iterator[bytes]:
+            session = Session(bind=bind)
+            try:
+                lookup_tables = DataService(session).get_lookup_tables_as_markdown(
+                    project_id
+                )
+                nlu_data = itertools.chain([md_formatted_data], lookup_tables)
+                for part in json_utils.iter_dumps_with_streamed_text(
+                    payload, "nlu", nlu_data
+                ):
+                    yield part.encode("utf-8")
+            finally:
+                session.close()
+
+        return common_utils.iterate_in_thread(
+            _encoded_parts, STREAMED_CHUNKS_QUEUE_SIZE
         )
 
     def _request_url(self, sub_path: Text) -> Text:
@@ -349,8 +400,10 @@ class StackService:
     ) -> Any:
         url = "/model/train"
 
+        # Lookup tables can be large, hence their elements are streamed into the
+        # request body instead of being added to the training data object.
         nlu_training_data = self.data_service.get_nlu_training_data_object(
-            project_id=project_id, should_include_lookup_table_entries=True
+            project_id=project_id, should_include_lookup_tables=False
         )
 
         responses: Optional[Union[List[Any], Dict[Text, Any]]] = None
@@ -392,18 +445,19 @@ class StackService:
         payload = dict(
             domain=domain_yaml,
             config=config_yaml,
-            nlu=md_formatted_data,
             stories=combined_stories,
             responses=yaml_utils.dump_obj_as_yaml_to_string(responses),
             force=False,
             save_to_default_model_directory=False,
         )
-
         async with self._session() as session:
             response = await session.post(
                 self._request_url(url),
                 params=self._query_parameters(),
-                json=payload,
+                data=self._training_request_body(
+                    payload, md_formatted_data, project_id
+                ),
+                headers={"Content-Type": "application/json"},
                 timeout=24 * 60 * 60,  # 24 hours
             )
             return await response.read()
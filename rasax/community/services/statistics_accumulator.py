@@ -0,0 +1,258 @@
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional, Text, Type
+
+import sqlalchemy as sa
+import sqlalchemy.exc
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert, Update
+from sqlalchemy.sql.elements import ColumnElement
+
+import rasax.community.config as rasa_x_config
+import rasax.community.tracker_utils as tracker_utils
+from rasax.community.database.analytics import (
+    ConversationActionStatistic,
+    ConversationEntityStatistic,
+    ConversationIntentStatistic,
+    ConversationPolicyStatistic,
+    ConversationStatistic,
+)
+from rasax.community.database.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+class StatisticDeltas:
+    """Changes of the conversation statistics caused by a number of events."""
+
+    def __init__(self) -> None:
+        self.number_of_events = 0
+        self.user_messages = 0
+        self.bot_messages = 0
+        self.latest_event_timestamp: Optional[float] = None
+        self.latest_event_id: Optional[int] = None
+        self.intents: Counter = Counter()
+        self.actions: Counter = Counter()
+        self.entities: Counter = Counter()
+        self.policies: Counter = Counter()
+
+    def is_empty(self) -> bool:
+        """Determine whether any event was added.
+
+        Returns:
+            `True` if no event was added.
+        """
+        return self.number_of_events == 0
+
+    def add_event(self, event: Dict[Text, Any], event_number: Optional[int]) -> None:
+        """Add the statistic deltas caused by `event`.
+
+        Args:
+            event: Event as a Rasa event dictionary.
+            event_number: Number of the event in the event broker.
+        """
+        from rasax.community.services.event_service import EventService
+
+        event_name = event.get("event")
+
+        self.number_of_events += 1
+        self.latest_event_timestamp = _maximum(
+            self.latest_event_timestamp, event["timestamp"]
+        )
+        self.latest_event_id = _maximum(self.latest_event_id, event_number)
+
+        if tracker_utils.is_user_event(event_name):
+            self.user_messages += 1
+
+            parse_data = event.get("parse_data", {})
+            intent = parse_data.get("intent", {}).get("name")
+            if intent:
+                self.intents[intent] += 1
+
+            for entity in parse_data.get("entities", []):
+                self.entities[entity.get("entity")] += 1
+        elif tracker_utils.is_bot_event(event_name):
+            self.bot_messages += 1
+        elif tracker_utils.is_action_event(
+            event_name
+        ) and not tracker_utils.is_action_listen(event_name):
+            self.actions[event["name"]] += 1
+
+            policy = EventService.extract_policy_base_from_event(event)
+            if policy:
+                self.policies[policy] += 1
+
+
+class ConversationStatisticsAccumulator:
+    """Accumulates conversation statistics in memory and writes them in bulk.
+
+    The event consumer updates the same `ConversationStatistic` rows for every
+    event. Instead of reading and updating these rows per event, the deltas are
+    collected in memory and applied with `UPDATE ... SET count = count + :delta`
+    statements. Since only deltas are written, multiple event service shards can
+    update the same rows concurrently.
+
+    The deltas are written as part of the same transaction as the events they were
+    computed from, so the counts stay exact as long as the accumulator is flushed
+    before every commit and discarded after every rollback: If the consumer is
+    killed, the events and their statistics are either both committed or both
+    missing. Missing events are consumed again since the broker only considers
+    them as processed once they were committed. Batching the consumed events (see
+    `EVENT_CONSUMER_BATCH_SIZE`) therefore also reduces the number of statistics
+    updates.
+    """
+
+    def __init__(self, project_id: Optional[Text] = None) -> None:
+        """Create an empty accumulator.
+
+        Args:
+            project_id: Project the statistics belong to. Defaults to the project
+                configured for this Rasa X instance.
+        """
+        self.project_id = project_id or rasa_x_config.project_name
+        # deltas of the events of the current transaction
+        self._deltas = StatisticDeltas()
+
+    def add_event(self, event: Dict[Text, Any], event_number: Optional[int]) -> None:
+        """Accumulate the statistic deltas caused by `event`.
+
+        Args:
+            event: Event as a Rasa event dictionary.
+            event_number: Number of the event in the event broker.
+        """
+        self._deltas.add_event(event, event_number)
+
+    def flush(self, session: Session) -> None:
+        """Write the accumulated deltas within the current transaction of `session`.
+
+        Args:
+            session: Session whose transaction the deltas should be written in.
+        """
+        deltas, self._deltas = self._deltas, StatisticDeltas()
+        if deltas.is_empty():
+            return
+
+        self._update_conversation_statistic(session, deltas)
+        self._update_counts(
+            session, ConversationIntentStatistic, "intent", deltas.intents
+        )
+        self._update_counts(
+            session, ConversationActionStatistic, "action", deltas.actions
+        )
+        self._update_counts(
+            session, ConversationEntityStatistic, "entity", deltas.entities
+        )
+        self._update_counts(
+            session, ConversationPolicyStatistic, "policy", deltas.policies
+        )
+
+        logger.debug(
+            f"Flushed conversation statistics of {deltas.number_of_events} events "
+            f"({deltas.user_messages} user messages, {deltas.bot_messages} bot "
+            f"messages)."
+        )
+
+    def discard(self) -> None:
+        """Discard the deltas of the transaction after it was rolled back."""
+        self._deltas = StatisticDeltas()
+
+    def _update_conversation_statistic(
+        self, session: Session, deltas: StatisticDeltas
+    ) -> None:
+        # noinspection PyUnresolvedReferences
+        table = ConversationStatistic.__table__
+
+        latest_event_id = (
+            _greatest(table.c.latest_event_id, deltas.latest_event_id)
+            if deltas.latest_event_id is not None
+            else table.c.latest_event_id
+        )
+        update = (
+            sa.update(table)
+            .where(table.c.project_id == self.project_id)
+            .values(
+                total_user_messages=table.c.total_user_messages + deltas.user_messages,
+                total_bot_messages=table.c.total_bot_messages + deltas.bot_messages,
+                latest_event_timestamp=_greatest(
+                    table.c.latest_event_timestamp, deltas.latest_event_timestamp
+                ),
+                latest_event_id=latest_event_id,
+            )
+        )
+        insert = sa.insert(table).values(
+            project_id=self.project_id,
+            total_user_messages=deltas.user_messages,
+            total_bot_messages=deltas.bot_messages,
+            latest_event_timestamp=deltas.latest_event_timestamp,
+            latest_event_id=deltas.latest_event_id,
+        )
+
+        _update_or_insert(session, update, insert)
+
+    def _update_counts(
+        self,
+        session: Session,
+        statistic_type: Type[Base],
+        key_column: Text,
+        counts: Counter,
+    ) -> None:
+        # noinspection PyUnresolvedReferences
+        table = statistic_type.__table__
+
+        for key, delta in counts.items():
+            update = (
+                sa.update(table)
+                .where(
+                    sa.and_(
+                        table.c.project_id == self.project_id,
+                        table.c[key_column] == key,
+                    )
+                )
+                .values(count=table.c.count + delta)
+            )
+            insert = sa.insert(table).values(
+                {"project_id": self.project_id, key_column: key, "count": delta}
+            )
+
+            _update_or_insert(session, update, insert)
+
+
+def _maximum(value: Optional[Any], other: Optional[Any]) -> Optional[Any]:
+    """Get the larger of two values which might be `None`."""
+    if value is None:
+        return other
+    if other is None:
+        return value
+
+    return max(value, other)
+
+
+def _greatest(column: sa.Column, value: Any) -> ColumnElement:
+    """Keep the larger value of `column` and `value` (`NULL` counts as smallest)."""
+    return sa.case([(column > value, column)], else_=value)
+
+
+def _update_or_insert(session: Session, update: Update, insert: Insert) -> None:
+    """Run `update`, and `insert` in case the updated row doesn't exist yet.
+
+    Another event service shard might insert the same row concurrently. In this case
+    the insert fails and the row is updated instead. SQLite databases can't be
+    written concurrently, hence the savepoint is only required for other databases.
+
+    Args:
+        session: Session whose transaction the statements are run in.
+        update: Statement which updates the row.
+        insert: Statement which inserts the row.
+    """
+    if session.execute(update).rowcount:
+        return
+
+    if session.get_bind().dialect.name == "sqlite":
+        session.execute(insert)
+        return
+
+    try:
+        with session.begin_nested():
+            session.execute(insert)
+    except sa.exc.IntegrityError:
+        session.execute(update)
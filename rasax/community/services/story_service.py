@@ -1,4 +1,5 @@
 import copy
+import json
 import logging
 import re
 import time
@@ -6,7 +7,8 @@ import typing
 from pathlib import Path
 from typing import Any, Text, Dict, List, Optional, Tuple, Set, Union
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm.attributes import set_committed_value
 
 import rasa.shared.constants
 import rasa.shared.core.constants
@@ -34,6 +36,7 @@ import rasax.community.utils.io as io_utils
 from rasax.community.database.admin import User
 from rasax.community.database.data import Story
 from rasax.community.database.service import DbService
+from rasax.community.database import text_search
 from rasax.community.services import background_dump_service
 
 if typing:
@@ -42,6 +45,9 @@ if typing:
 
 logger = logging.getLogger(__name__)
 
+# actions, intents, slots and entities which are used in a story
+StoryDomainItems = Tuple[Set[Text], Set[Text], Set[Text], Set[Text]]
+
 
 class StoryService(DbService):
     @staticmethod
@@ -343,45 +349,72 @@ class StoryService(DbService):
         else:
             filename = self.assign_filename(team, file_format)
 
-        inserted = []
+        processed_stories = await self._extract_stories(
+            story_string, filename, file_format, domain
+        )
 
-        if file_format == data.FileFormat.MARKDOWN:
-            processed_stories = await self._extract_stories_markdown(
-                story_string, filename, domain
-            )
-        elif file_format == data.FileFormat.YAML:
-            processed_stories = await self._extract_stories_yaml(
-                story_string, filename, domain
+        new_stories = [
+            Story(
+                **self._story_mapping(
+                    story_text, steps, username, filename, file_format, time.time()
+                )
             )
-        else:
-            raise ValueError(f"Unknown file format: '{file_format}'.")
-
-        for story_text, steps in processed_stories:
-            new_story = Story(
-                name=steps.block_name,
-                story=story_text,
-                annotated_at=time.time(),
-                user=username,
-                filename=filename,
-                is_rule=isinstance(steps, RuleStep),
+            for story_text, steps in processed_stories
+        ]
+
+        if not new_stories:
+            return []
+
+        self.add_all(new_stories)
+        self.flush()  # flush to get inserted story ids
+
+        if add_story_items_to_domain:
+            domain_items = self._domain_items_from_story_steps(
+                [steps for _, steps in processed_stories]
             )
+            await self._add_story_items_to_domain(project_id, username, domain_items)
 
-            self.add(new_story)
+        if dump_stories:
+            background_dump_service.add_story_change(filename)
 
-            self.flush()  # flush to get inserted story id
-            if add_story_items_to_domain:
-                await self.add_domain_items_for_story(
-                    new_story.id, project_id, username, file_format
-                )
+        return [story.as_dict() for story in new_stories]
 
-            inserted.append(new_story.as_dict())
+    async def _extract_stories(
+        self,
+        story_string: Text,
+        filename: Text,
+        file_format: data.FileFormat,
+        domain: Optional[Dict[Text, Any]],
+    ) -> List[Tuple[Text, StoryStep]]:
+        if file_format == data.FileFormat.MARKDOWN:
+            return await self._extract_stories_markdown(story_string, filename, domain)
+        elif file_format == data.FileFormat.YAML:
+            return await self._extract_stories_yaml(story_string, filename, domain)
 
-        if inserted:
-            if dump_stories:
-                background_dump_service.add_story_change(filename)
-            return inserted
-        else:
-            return []
+        raise ValueError(f"Unknown file format: '{file_format}'.")
+
+    def _story_mapping(
+        self,
+        story_text: Text,
+        steps: StoryStep,
+        username: Text,
+        filename: Text,
+        file_format: data.FileFormat,
+        annotated_at: float,
+    ) -> Dict[Text, Any]:
+        """Create the column values of a new `Story` from its parsed `steps`."""
+        return {
+            "name": steps.block_name,
+            "story": story_text,
+            "annotated_at": annotated_at,
+            "user": username,
+            "filename": filename,
+            "is_rule": isinstance(steps, RuleStep),
+            "content_hash": self._story_content_hash(story_text, file_format),
+            "domain_items": self._serialise_domain_items(
+                self._domain_items_from_story_steps([steps])
+            ),
+        }
 
     def get_filenames(self, team: Text) -> List[Text]:
         """Return a list of all values of `filename`."""
@@ -427,28 +460,69 @@ class StoryService(DbService):
         project_id: Text,
         username: Text,
     ) -> List[Dict[Text, Any]]:
-        """Save stories from `story_files` to database."""
+        """Save stories from `story_files` to database.
+
+        All stories are inserted with a single bulk insert and the items which they
+        use are added to the domain at once. Bulk inserts bypass the session, hence
+        the injected stories are not tracked as changes of the training data.
+
+        Args:
+            story_files: Files containing stories or rules.
+            team: User's team.
+            project_id: Project ID to assign to new data.
+            username: User name.
+
+        Returns:
+            List of stored stories or rules.
+        """
 
         from rasax.community.initialise import _read_data  # pytype: disable=pyi-error
+        from rasax.community.services.domain_service import DomainService
+
+        domain = DomainService(self.session).get_domain(project_id)
+        annotated_at = time.time()
 
-        story_blocks = []
+        mappings = []
+        story_steps = []
+        filenames = set()
 
         for text_data, path in _read_data(list(story_files)):
             logger.debug(f"Injecting stories from file '{path}' to database.")
-            additional_blocks = await self.save_stories(
-                text_data,
-                team,
-                project_id,
-                username,
-                path,
-                dump_stories=False,
-                add_story_items_to_domain=False,
+            file_format = data.format_from_filename(path)
+            processed_stories = await self._extract_stories(
+                text_data, path, file_format, domain
             )
-            story_blocks.extend(additional_blocks)
 
-        await self.add_domain_items_for_stories(project_id, username)
+            for story_text, steps in processed_stories:
+                mappings.append(
+                    self._story_mapping(
+                        story_text, steps, username, path, file_format, annotated_at
+                    )
+                )
+                story_steps.append(steps)
+            filenames.add(path)
 
-        return story_blocks
+        if not mappings:
+            return []
+
+        self.session.bulk_insert_mappings(Story, mappings)
+
+        await self._add_story_items_to_domain(
+            project_id, username, self._domain_items_from_story_steps(story_steps)
+        )
+
+        # bulk inserts don't return the IDs of the inserted rows
+        inserted = (
+            self.query(Story)
+            .filter(
+                Story.filename.in_(filenames),
+                Story.annotated_at == annotated_at,
+                Story.user == username,
+            )
+            .order_by(Story.id.asc())
+            .all()
+        )
+        return [story.as_dict() for story in inserted]
 
     async def replace_stories(
         self,
@@ -517,7 +591,7 @@ class StoryService(DbService):
             List of stories or rules in their dictionary representation.
         """
         if text_query:
-            query = Story.story.like(f"%{text_query}%")
+            query = text_search.matches(self.session, Story.story, text_query)
         else:
             query = True
 
@@ -634,20 +708,83 @@ class StoryService(DbService):
 
         return delete_result
 
+    @staticmethod
+    def _story_content_hash(story_string: Text, file_format: data.FileFormat) -> Text:
+        return common_utils.get_text_hash(f"{file_format.value}\n{story_string}")
+
+    @staticmethod
+    def _serialise_domain_items(domain_items: StoryDomainItems) -> Text:
+        return json.dumps([sorted(items) for items in domain_items])
+
+    @staticmethod
+    def _deserialise_domain_items(serialised: Text) -> StoryDomainItems:
+        actions, intents, slots, entities = json.loads(serialised)
+        return set(actions), set(intents), set(slots), set(entities)
+
+    def _domain_items_for_story(
+        self,
+        story: Story,
+        file_format: data.FileFormat,
+        domain: Optional[Dict[Text, Any]],
+    ) -> StoryDomainItems:
+        """Get the domain items of `story`.
+
+        The story is only parsed if it changed since its domain items were cached.
+
+        Args:
+            story: The story.
+            file_format: Format of the story.
+            domain: Domain to parse the story with.
+
+        Returns:
+            Actions, intents, slots and entities which are used in the story.
+        """
+        if self._has_cached_domain_items(story, file_format):
+            return self._deserialise_domain_items(story.domain_items)
+
+        content_hash = self._story_content_hash(story.story, file_format)
+        steps = self.get_story_steps(story.story, file_format, domain)
+        domain_items = self._domain_items_from_story_steps(steps)
+        serialised = self._serialise_domain_items(domain_items)
+
+        # Use a SQL statement instead of changing the ORM object, since updating the
+        # cache isn't a change of the training data (see `AnnotationDumpLogger`).
+        self.session.execute(
+            update(Story.__table__)
+            .where(Story.__table__.c.id == story.id)
+            .values(content_hash=content_hash, domain_items=serialised)
+        )
+        set_committed_value(story, "content_hash", content_hash)
+        set_committed_value(story, "domain_items", serialised)
+
+        return domain_items
+
     async def _fetch_domain_items_from_story(
         self, story_id: Text, project_id: Text, file_format: data.FileFormat
-    ) -> Optional[Tuple[Set[Text], Set[Text], Set[Text], Set[Text]]]:
+    ) -> Optional[StoryDomainItems]:
         from rasax.community.services.domain_service import DomainService
 
-        domain_service = DomainService(self.session)
-        domain = domain_service.get_domain(project_id)
-
-        story = self.fetch_story(story_id)
+        story = self.query(Story).filter(Story.id == story_id).first()
 
         if not story:
             return None
 
-        steps = self.get_story_steps(story["story"], file_format, domain)
+        domain = None
+        if not self._has_cached_domain_items(story, file_format):
+            domain = DomainService(self.session).get_domain(project_id)
+
+        return self._domain_items_for_story(story, file_format, domain)
+
+    def _has_cached_domain_items(
+        self, story: Story, file_format: data.FileFormat
+    ) -> bool:
+        return bool(
+            story.domain_items
+            and story.content_hash == self._story_content_hash(story.story, file_format)
+        )
+
+    @staticmethod
+    def _domain_items_from_story_steps(steps: List[StoryStep]) -> StoryDomainItems:
         story_actions = set()
         story_intents = set()
         story_entities = set()
@@ -679,24 +816,37 @@ class StoryService(DbService):
 
     async def fetch_domain_items_from_stories(
         self, project_id: Text
-    ) -> Optional[Tuple[Set[Text], Set[Text], Set[Text], Set[Text]]]:
+    ) -> Optional[StoryDomainItems]:
         """Fetch set of actions, intents, slots and entities from all stories.
 
+        Only stories which changed since their domain items were extracted the last
+        time are parsed.
+
         Returns a tuple of four sets.
         """
-        stories = self.fetch_stories()
+        from rasax.community.services.domain_service import DomainService
+
+        stories = self.query(Story).order_by(Story.id.asc()).all()
 
         if not stories:
             return None
 
+        # the domain is only needed if a story has to be parsed
+        domain = None
+        is_domain_loaded = False
         actions = set()
         intents = set()
         slots = set()
         entities = set()
         for story in stories:
-            story_events = await self._fetch_domain_items_from_story(
-                story["id"], project_id, data.format_from_filename(story["filename"])
-            )
+            file_format = data.format_from_filename(story.filename)
+            if not is_domain_loaded and not self._has_cached_domain_items(
+                story, file_format
+            ):
+                domain = DomainService(self.session).get_domain(project_id)
+                is_domain_loaded = True
+
+            story_events = self._domain_items_for_story(story, file_format, domain)
             actions.update(story_events[0])
             intents.update(story_events[1])
             slots.update(story_events[2])
@@ -806,6 +956,10 @@ class StoryService(DbService):
         story.annotated_at = time.time()
         story.name = story_steps[0].block_name
         story.story = story_string.strip()
+        story.content_hash = self._story_content_hash(story.story, file_format)
+        story.domain_items = self._serialise_domain_items(
+            self._domain_items_from_story_steps(story_steps)
+        )
 
         # Change filename extension, but keep name the same.
         story.filename = str(Path(story.filename).with_suffix(file_format.value))
@@ -1,12 +1,19 @@
+import copy
+import ctypes
 import hashlib
 import json
 import logging
 import random
+import threading
 import time
-from typing import Optional, Text, Dict, List, Any, Union
+from collections import OrderedDict
+from multiprocessing.context import BaseContext  # type: ignore
+from typing import Optional, Text, Dict, List, Any, Tuple, Union
 
+import sqlalchemy.event
 from sanic_jwt import exceptions
 from sqlalchemy import and_
+from sqlalchemy.orm import Session
 
 import rasax.community.config as rasa_x_config
 import rasax.community.constants as constants
@@ -57,6 +64,138 @@ class RoleException(Exception):
         return self.message
 
 
+# Version of the users, roles and permissions which is shared by all Rasa X
+# processes. It's incremented whenever they change, which invalidates the cached
+# users of every `ApiTokenCache`.
+api_token_cache_version: Optional[BaseContext.Value] = None
+
+
+def initialize_global_state(mp_context: BaseContext) -> None:
+    """Initialize the global state of the module.
+
+    Args:
+        mp_context: The current multiprocessing context.
+    """
+    global api_token_cache_version
+    api_token_cache_version = mp_context.Value(ctypes.c_long, 0)
+
+
+def _current_api_token_cache_version() -> int:
+    return api_token_cache_version.value if api_token_cache_version else 0
+
+
+class ApiTokenCache:
+    """Bounded cache of the users which authenticated with an API token.
+
+    Entries expire after `ttl_in_seconds`, and are invalid as soon as the
+    `api_token_cache_version` changes.
+    """
+
+    def __init__(self, ttl_in_seconds: float, maximum_size: int = 1000) -> None:
+        """Create an empty cache.
+
+        Args:
+            ttl_in_seconds: Time after which cached users expire. A value of `0`
+                disables the cache.
+            maximum_size: Maximum number of cached users. The least recently cached
+                user is evicted once this size is exceeded.
+        """
+        self.ttl_in_seconds = ttl_in_seconds
+        self.maximum_size = maximum_size
+        self._entries: "OrderedDict[Text, Tuple[int, float, Dict[Text, Any]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, api_token: Text) -> Optional[Dict[Text, Any]]:
+        """Get the cached user for `api_token`.
+
+        Args:
+            api_token: The API token.
+
+        Returns:
+            A copy of the user or `None` if the user isn't cached, expired or was
+            cached before users, roles or permissions changed.
+        """
+        with self._lock:
+            entry = self._entries.get(api_token)
+            if entry is None:
+                return None
+
+            version, expires_at, user = entry
+            if (
+                version != _current_api_token_cache_version()
+                or expires_at <= time.monotonic()
+            ):
+                del self._entries[api_token]
+                return None
+
+        return copy.deepcopy(user)
+
+    @staticmethod
+    def current_version() -> int:
+        """Get the current version of the users, roles and permissions.
+
+        Returns:
+            Version which has to be passed to `put`.
+        """
+        return _current_api_token_cache_version()
+
+    def put(self, api_token: Text, user: Dict[Text, Any], version: int) -> None:
+        """Cache `user` for `api_token`.
+
+        Args:
+            api_token: The API token.
+            user: The user which authenticated with `api_token`.
+            version: Result of `current_version` before `user` was read from the
+                database. The user isn't cached if the version changed since.
+        """
+        if self.ttl_in_seconds <= 0 or version != self.current_version():
+            return
+
+        with self._lock:
+            self._entries[api_token] = (
+                version,
+                time.monotonic() + self.ttl_in_seconds,
+                copy.deepcopy(user),
+            )
+            self._entries.move_to_end(api_token)
+
+            while len(self._entries) > self.maximum_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached users."""
+        with self._lock:
+            self._entries.clear()
+
+
+api_token_cache = ApiTokenCache(rasa_x_config.api_token_cache_ttl_in_seconds)
+
+
+def invalidate_api_token_cache(session: Optional[Session] = None) -> None:
+    """Invalidate the cached users of all processes.
+
+    Has to be called whenever users, roles or permissions change.
+
+    Args:
+        session: Session of the transaction which changes them. The caches are
+            invalidated once the transaction was committed, so that no process
+            caches users which are about to change. If `None`, the caches are
+            invalidated right away.
+    """
+    if session is not None:
+        sqlalchemy.event.listen(
+            session, "after_commit", lambda _: invalidate_api_token_cache(), once=True,
+        )
+        return
+
+    if api_token_cache_version is not None:
+        with api_token_cache_version.get_lock():
+            api_token_cache_version.value += 1
+    api_token_cache.clear()
+
+
 class UserService(DbService):
     def fetch_user(
         self, username: Text, return_api_token: bool = False
@@ -212,6 +351,7 @@ class UserService(DbService):
 
         deleted_user = existing_user.as_dict()
         self.delete(existing_user)
+        invalidate_api_token_cache(self.session)
 
         return deleted_user
 
@@ -225,6 +365,7 @@ class UserService(DbService):
 
         if not any([r.role == _role.role for r in existing_user.roles]):
             existing_user.roles.append(_role)
+            invalidate_api_token_cache(self.session)
         else:
             logger.debug(
                 f"User '{existing_user.username or existing_user.name_id}' already "
@@ -289,6 +430,7 @@ class UserService(DbService):
 
         # remove all roles
         existing_user.roles = []
+        invalidate_api_token_cache(self.session)
 
         # add new set of roles
         if roles and roles[0]:
@@ -315,6 +457,8 @@ class UserService(DbService):
         for role in roles_to_delete:
             existing_user.roles.remove(role)
 
+        invalidate_api_token_cache(self.session)
+
     def create_saml_user(
         self,
         name_id: Text,
@@ -512,6 +656,7 @@ class UserService(DbService):
             raise UserException(username)
 
         user.data = json.dumps(values["data"])
+        invalidate_api_token_cache(self.session)
 
     def admin_change_password(self, username: Text, password: Text) -> Dict:
         existing_user = self._fetch_user(username)
@@ -532,10 +677,21 @@ class UserService(DbService):
             SettingsService(self.session).save_community_user_password(password)
 
     def api_token_auth(self, api_token: Text, return_api_token: bool = False) -> Dict:
-        user = self.query(User).filter(User.api_token == api_token).first()
+        user = api_token_cache.get(api_token)
+
         if user is None:
-            raise exceptions.AuthenticationFailed("Incorrect api_token.")
-        return user.as_dict(return_api_token=return_api_token)
+            version = api_token_cache.current_version()
+            existing_user = self.query(User).filter(User.api_token == api_token).first()
+            if existing_user is None:
+                raise exceptions.AuthenticationFailed("Incorrect api_token.")
+
+            user = existing_user.as_dict()
+            api_token_cache.put(api_token, user, version)
+
+        if return_api_token:
+            user["api_token"] = api_token
+
+        return user
 
     def assign_project_to_user(self, user: Dict, project_id: Text) -> None:
         """Update user's project_id."""
@@ -545,6 +701,7 @@ class UserService(DbService):
             return
         owner.project = project_id
         owner.role_name = ADMIN
+        invalidate_api_token_cache(self.session)
 
 
 def has_role(user: Dict[Text, Any], role: Text) -> bool:
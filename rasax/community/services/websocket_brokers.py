@@ -0,0 +1,268 @@
+import asyncio  # pytype: disable=pyi-error
+import logging
+import multiprocessing  # type: ignore
+import time
+from asyncio import AbstractEventLoop  # pytype: disable=pyi-error
+from multiprocessing.context import BaseContext  # type: ignore
+from threading import Thread
+from typing import Any, Callable, Dict, List, Optional, Text, Tuple
+
+import rasax.community.utils.json as json_utils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REDIS_CHANNEL = "rasa_x_websocket_messages"
+REDIS_RECONNECT_INTERVAL_IN_SECONDS = 1
+
+MessageHandler = Callable[[Dict[Text, Any]], None]
+
+
+class MessageBroker:
+    """Distributes WebSocket messages to every Sanic worker which holds connections.
+
+    Messages can be published from any Sanic worker (or any process which received
+    the global state). Each Sanic worker subscribes once and then receives every
+    published message on its event loop.
+    """
+
+    def publish(self, message: Dict[Text, Any]) -> None:
+        """Publish a message to all subscribed Sanic workers.
+
+        Args:
+            message: The message as JSON serializable dictionary.
+        """
+        raise NotImplementedError
+
+    def subscribe(
+        self, worker_index: int, loop: AbstractEventLoop, on_message: MessageHandler
+    ) -> None:
+        """Subscribe a Sanic worker to the published messages.
+
+        Args:
+            worker_index: Index of the Sanic worker among all Sanic workers of this
+                Rasa X server.
+            loop: Event loop of the Sanic worker. `on_message` is called within this
+                event loop.
+            on_message: Callback which is called with every published message.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Stop receiving messages in this process."""
+        pass
+
+
+class LocalMessageBroker(MessageBroker):
+    """Message broker for a single process, e.g. Rasa X in local mode.
+
+    Messages are handed directly to the event loops of the subscribers without any
+    inter-process communication.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: List[Tuple[AbstractEventLoop, MessageHandler]] = []
+
+    def publish(self, message: Dict[Text, Any]) -> None:
+        for loop, on_message in self._subscribers:
+            loop.call_soon_threadsafe(on_message, message)
+
+    def subscribe(
+        self, worker_index: int, loop: AbstractEventLoop, on_message: MessageHandler
+    ) -> None:
+        self._subscribers.append((loop, on_message))
+
+    def close(self) -> None:
+        self._subscribers.clear()
+
+    def __getstate__(self) -> Dict[Text, Any]:
+        # Event loops can't be shared with other processes, hence other processes
+        # start without subscribers.
+        return {"_subscribers": []}
+
+
+class QueueMessageBroker(MessageBroker):
+    """Message broker for the Sanic workers of a single Rasa X server.
+
+    Every Sanic worker has its own process safe `Queue`. Published messages are put
+    into the `Queue` of every worker, and each worker reads its `Queue` in a
+    separate thread.
+    """
+
+    def __init__(self, queues: List[multiprocessing.Queue]) -> None:
+        self.queues = queues
+
+    @classmethod
+    def for_workers(
+        cls, number_of_sanic_workers: int, mp_context: BaseContext
+    ) -> "QueueMessageBroker":
+        """Create a broker with one `Queue` for each Sanic worker.
+
+        Args:
+            number_of_sanic_workers: Number of Sanic workers.
+            mp_context: The current multiprocessing context.
+
+        Returns:
+            The message broker.
+        """
+        return cls([mp_context.Queue() for _ in range(number_of_sanic_workers)])
+
+    def publish(self, message: Dict[Text, Any]) -> None:
+        for queue in self.queues:
+            queue.put(message)
+
+    def subscribe(
+        self, worker_index: int, loop: AbstractEventLoop, on_message: MessageHandler
+    ) -> None:
+        # Read in a `Thread` to not block the event loop. The thread will be killed
+        # on exit due to `daemon=True`.
+        Thread(
+            target=self._forward_queued_messages,
+            args=(self.queues[worker_index], loop, on_message),
+            daemon=True,
+        ).start()
+
+    @staticmethod
+    def _forward_queued_messages(
+        queue: multiprocessing.Queue,
+        loop: AbstractEventLoop,
+        on_message: MessageHandler,
+    ) -> None:
+        asyncio.set_event_loop(loop)
+
+        try:
+            while True:
+                loop.call_soon_threadsafe(on_message, queue.get())
+        except EOFError:
+            # Will most likely happen when shutting down Rasa X.
+            logger.debug(
+                "WebSocket message queue of worker was closed. Stopping to listen for "
+                "more messages on this worker."
+            )
+
+
+class RedisMessageBroker(MessageBroker):
+    """Message broker which uses Redis Pub/Sub to share messages among Rasa X servers.
+
+    Every Sanic worker of every Rasa X server subscribes to the same Redis channel,
+    hence multiple replicas of the Rasa X server can notify each others' WebSocket
+    connections.
+    """
+
+    def __init__(self, url: Text, channel: Text = DEFAULT_REDIS_CHANNEL) -> None:
+        """Create a message broker which uses Redis Pub/Sub.
+
+        Args:
+            url: URL of the Redis server, e.g. `redis://localhost:6379/0`.
+            channel: Redis channel which the messages are published to.
+        """
+        self.url = url
+        self.channel = channel
+        self._client: Optional[Any] = None
+        self._pubsub: Optional[Any] = None
+        self._is_closed = False
+
+    def _redis_client(self) -> Any:
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+
+        return self._client
+
+    def publish(self, message: Dict[Text, Any]) -> None:
+        try:
+            self._redis_client().publish(self.channel, json_utils.dumps(message))
+        except Exception as e:
+            logger.error(
+                f"Failed to publish WebSocket message to Redis channel "
+                f"'{self.channel}'. Error: {e}"
+            )
+
+    def subscribe(
+        self, worker_index: int, loop: AbstractEventLoop, on_message: MessageHandler
+    ) -> None:
+        self._pubsub = self._redis_client().pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+
+        # `redis` is a blocking client, hence it's read in a separate `Thread`.
+        Thread(
+            target=self._forward_published_messages,
+            args=(self._pubsub, loop, on_message),
+            daemon=True,
+        ).start()
+
+    def _forward_published_messages(
+        self, pubsub: Any, loop: AbstractEventLoop, on_message: MessageHandler
+    ) -> None:
+        while not self._is_closed:
+            try:
+                for published in pubsub.listen():
+                    self._forward_published_message(published, loop, on_message)
+            except Exception as e:
+                if self._is_closed:
+                    break
+
+                # The subscription is renewed when the connection is re-established
+                logger.warning(
+                    f"Lost connection to Redis channel '{self.channel}'. Retrying in "
+                    f"{REDIS_RECONNECT_INTERVAL_IN_SECONDS} second(s). Error: {e}"
+                )
+                time.sleep(REDIS_RECONNECT_INTERVAL_IN_SECONDS)
+
+    @staticmethod
+    def _forward_published_message(
+        published: Dict[Text, Any], loop: AbstractEventLoop, on_message: MessageHandler,
+    ) -> None:
+        if published.get("type") != "message":
+            return
+
+        try:
+            message = json_utils.loads(published["data"])
+        except ValueError as e:
+            logger.warning(f"Received invalid WebSocket message from Redis: {e}")
+            return
+
+        loop.call_soon_threadsafe(on_message, message)
+
+    def close(self) -> None:
+        self._is_closed = True
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def __getstate__(self) -> Dict[Text, Any]:
+        # Connections can't be shared with other processes, hence each process
+        # connects to Redis on its own.
+        return {
+            "url": self.url,
+            "channel": self.channel,
+            "_client": None,
+            "_pubsub": None,
+            "_is_closed": False,
+        }
+
+
+def create_message_broker(
+    number_of_sanic_workers: int,
+    mp_context: BaseContext,
+    redis_url: Optional[Text] = None,
+) -> MessageBroker:
+    """Create the message broker which fits the deployment of Rasa X.
+
+    Args:
+        number_of_sanic_workers: Number of Sanic workers of this Rasa X server.
+        mp_context: The current multiprocessing context.
+        redis_url: URL of a Redis server which is shared by multiple Rasa X servers.
+
+    Returns:
+        A `RedisMessageBroker` if a Redis URL was given, a `QueueMessageBroker` if
+        the Rasa X server runs multiple Sanic workers, and a `LocalMessageBroker`
+        otherwise.
+    """
+    if redis_url:
+        return RedisMessageBroker(redis_url)
+
+    if number_of_sanic_workers > 1:
+        return QueueMessageBroker.for_workers(number_of_sanic_workers, mp_context)
+
+    return LocalMessageBroker()
@@ -1,24 +1,24 @@
 import asyncio  # pytype: disable=pyi-error
-import multiprocessing  # type: ignore
+from collections import OrderedDict
 from enum import Enum
-from asyncio import BaseEventLoop  # pytype: disable=pyi-error
-import json
+from asyncio import AbstractEventLoop  # pytype: disable=pyi-error
 import logging
 from typing import (
     Dict,
     Text,
     Any,
     List,
-    Union,
     Iterable,
     NamedTuple,
-    NoReturn,
     Optional,
+    Set,
 )
 from multiprocessing.context import BaseContext  # type: ignore
 
 from websockets import WebSocketCommonProtocol  # type: ignore
-import rasax.community.utils.common as common_utils
+import rasax.community.utils.json as json_utils
+from rasax.community import config
+from rasax.community.services import websocket_brokers
 
 logger = logging.getLogger(__name__)
 
@@ -85,18 +85,41 @@ class Message:
         }
 
 
+# Message topics whose notifications are coalesced. Identical messages of these
+# topics which are received within `config.websocket_coalescing_window_in_ms` are only
+# forwarded once.
+COALESCED_TOPICS = {
+    str(MessageTopic.MODELS),
+    str(MessageTopic.NLU),
+    str(MessageTopic.IVC),
+}
+
+# Maximum number of messages which wait to be sent to a single WebSocket connection.
+# Connections of clients which don't keep up are closed once this is exceeded.
+MAXIMUM_PENDING_MESSAGES_PER_CONNECTION = 100
+SEND_TIMEOUT_IN_SECONDS = 10
+
 # Currently connected WebSockets. This is not synchronized among the Sanic workers.
 # As each Sanic worker is a separate process this means that every Sanic worker has a
 # different dictionary of connected websockets.
 _websockets: Dict[WebSocketCommonProtocol, "ConnectionDetails"] = {}
 
-# After the `websocket` blueprint is created this will contain one `Queue` per Sanic
-# worker so we can communicate with each of worker individually.
-_queues: List[multiprocessing.Queue] = []
+# Indices of the connected WebSockets by the name and the frontend scopes of their
+# users
+_websockets_by_username: Dict[Text, Set[WebSocketCommonProtocol]] = {}
+_websockets_by_scope: Dict[Text, Set[WebSocketCommonProtocol]] = {}
+
+# Messages which wait for the end of the coalescing window by their JSON document
+_coalesced_messages: "OrderedDict[Text, Dict[Text, Any]]" = OrderedDict()
+_coalescing_timer: Optional[asyncio.TimerHandle] = None
+
+# Distributes the messages to the Sanic workers. The broker is replaced when the
+# global state is initialized.
+_message_broker: websocket_brokers.MessageBroker = websocket_brokers.LocalMessageBroker()
 
 
 def send_message(message: Message) -> None:
-    """Send message to every Sanic worker by putting it in their `Queue`.
+    """Publish a message to every Sanic worker.
 
     Each Sanic worker will separately check if they have matching WebSocket connections
     and then forward the message to these or skip the message.
@@ -105,161 +128,165 @@ def send_message(message: Message) -> None:
         message: The message including recipient / scopes which have to be matched.
     """
 
-    for queue in _queues:
-        queue.put(message.as_dict())
+    _message_broker.publish(message.as_dict())
 
 
-def loop_for_messages_to_broadcast(queue_index: int, loop: BaseEventLoop) -> NoReturn:
-    """Forward messages from the worker `Queue` to the connected WebSockets.
+def subscribe_to_messages(worker_index: int, loop: AbstractEventLoop) -> None:
+    """Forward the published messages to the WebSockets connected to this worker.
 
     Args:
-        queue_index: The index of the `Queue` which belongs to this Sanic worker.
+        worker_index: The index of this Sanic worker among all Sanic workers.
         loop: The event loop which will send the messages to the user.
     """
-    queue_of_current_worker = _queues[queue_index]
-    asyncio.set_event_loop(loop)
-
-    try:
-        while True:
-            message = queue_of_current_worker.get()
-            # Use the passed in, existing event loop of the Sanic worker to forward the
-            # message instead of having a new event loop for within this thread.
-            asyncio.run_coroutine_threadsafe(_forward_message(message), loop)
-    except EOFError:
-        # Will most likely happen when shutting down Rasa X.
-        logger.debug(
-            "WebSocket message queue of worker was closed. Stopping to listen for more "
-            "messages on this worker."
-        )
-
+    _message_broker.subscribe(worker_index, loop, _receive_message)
 
-async def _forward_message(message: Dict[Text, Any]) -> None:
-    """Forward a message to matching WebSocket connections.
-
-    Args:
-        message: The message.
-    """
-    recipient_id = message.get(RECIPIENT_KEY)
-    message_scope = message.get(SCOPES_KEY)
-
-    if recipient_id == BROADCAST_RECIPIENT_ID:
-        return await _forward_message_to_connected_websockets(message)
-    if recipient_id and not message_scope:
-        return await _forward_message_to(recipient_id, message)
-    if message_scope:
-        return await _forward_message_to_authorized_users(
-            recipient_id, message_scope, message
-        )
 
-    logger.warning(
-        f"Message '{message}' could not be forwarded as it "
-        f"does not contain all required fields."
-    )
+def unsubscribe_from_messages() -> None:
+    """Stop forwarding published messages to this worker."""
+    _message_broker.close()
 
 
-async def _forward_message_to(recipient_id: Text, message: Dict[Text, Any]) -> None:
-    """Forward a message to a single user if they have one or multiple WebSockets
-       which are handled by this Sanic worker.
+def _receive_message(message: Dict[Text, Any]) -> None:
+    """Forward a received message or coalesce it with identical messages.
 
     Args:
-        recipient_id: The name of the user.
         message: The message.
     """
-    matching_websockets = _get_websockets_of_user(recipient_id)
+    coalescing_window = config.websocket_coalescing_window_in_ms / 1000
+    if coalescing_window <= 0 or message.get("topic") not in COALESCED_TOPICS:
+        return _forward_message(message)
 
-    if not matching_websockets:
+    serialized = json_utils.dumps(message)
+    if serialized in _coalesced_messages:
+        logger.debug(f"Coalescing message with identical message: {message}")
         return
 
-    logger.debug(f"Send notification to recipient '{recipient_id}'.")
-    await _send_to_websockets(matching_websockets, message)
-
+    _coalesced_messages[serialized] = message
 
-def _get_websockets_of_user(recipient_id: Text) -> List[WebSocketCommonProtocol]:
-    return [
-        websocket
-        for websocket, details in _websockets.items()
-        if details.username == recipient_id
-    ]
+    global _coalescing_timer
+    if _coalescing_timer is None:
+        _coalescing_timer = asyncio.get_event_loop().call_later(
+            coalescing_window, _forward_coalesced_messages
+        )
 
 
-async def _forward_message_to_connected_websockets(message: Dict[Text, Any]) -> None:
-    """Send a message to all WebSocket connections which are handled by this Sanic
-       worker.
+def _forward_coalesced_messages() -> None:
+    """Forward the messages which were coalesced in the current window."""
+    global _coalescing_timer
+    _coalescing_timer = None
 
-    Args:
-        message: The message.
-    """
-    logger.debug(f"Broadcasting message: {message}")
-    await _send_to_websockets(_websockets.keys(), message)
+    while _coalesced_messages:
+        _, message = _coalesced_messages.popitem(last=False)
+        _forward_message(message)
 
 
-async def _forward_message_to_authorized_users(
-    recipient_id: Optional[Text], scopes: List[Text], message: Dict[Text, Any]
-) -> None:
-    """Forward message to WebSockets of users who have at least one matching permission
-       scope and which are handled by this Sanic worker.
+def _forward_message(message: Dict[Text, Any]) -> None:
+    """Forward a message to matching WebSocket connections.
 
     Args:
-        recipient_id: Optional name of user who should get the message anyhow (
-            ignores their scopes).
-        scopes: The Rasa X frontend scope which the users must have at least one of.
         message: The message.
     """
-    logger.debug(f"Sending message to users with the following scopes: {scopes}")
+    recipient_id = message.get(RECIPIENT_KEY)
+    message_scope = message.get(SCOPES_KEY)
 
-    selected_websockets = _get_websockets_of_users_with_matching_scopes(scopes)
+    if recipient_id == BROADCAST_RECIPIENT_ID:
+        logger.debug(f"Broadcasting message: {message}")
+        return _send_to_websockets(_websockets.keys(), message)
+    if recipient_id and not message_scope:
+        logger.debug(f"Send notification to recipient '{recipient_id}'.")
+        return _send_to_websockets(_get_websockets_of_user(recipient_id), message)
+    if message_scope:
+        logger.debug(
+            f"Sending message to users with the following scopes: {message_scope}"
+        )
+        return _send_to_websockets(
+            _get_websockets_of_authorized_users(recipient_id, message_scope), message
+        )
+
+    logger.warning(
+        f"Message '{message}' could not be forwarded as it "
+        f"does not contain all required fields."
+    )
 
-    if recipient_id:
-        selected_websockets += _get_websockets_of_user(recipient_id)
 
-    await _send_to_websockets(selected_websockets, message)
+def _get_websockets_of_user(recipient_id: Text) -> Set[WebSocketCommonProtocol]:
+    return _websockets_by_username.get(recipient_id, set())
 
 
-def _get_websockets_of_users_with_matching_scopes(
-    scopes: List[Text],
-) -> List[WebSocketCommonProtocol]:
+def _get_websockets_of_authorized_users(
+    recipient_id: Optional[Text], scopes: List[Text]
+) -> Set[WebSocketCommonProtocol]:
     """Find connected WebSockets of users who have at least one of the required scopes.
 
     Args:
+        recipient_id: Optional name of user who should get the message anyhow (
+            ignores their scopes).
         scopes: Scopes which each user has to match at least one of.
 
     Returns:
         The websockets of users with matching scopes.
     """
-    return [
-        websocket
-        for websocket, connection in _websockets.items()
-        if any(user_scope in scopes for user_scope in connection.user_scopes)
-    ]
+    selected_websockets = set()
+    for scope in scopes:
+        selected_websockets.update(_websockets_by_scope.get(scope, ()))
+
+    if recipient_id:
+        selected_websockets.update(_get_websockets_of_user(recipient_id))
+
+    return selected_websockets
 
 
-async def _send_to_websockets(
+def _send_to_websockets(
     selected_websockets: Iterable[WebSocketCommonProtocol], message: Dict[Text, Any]
 ) -> None:
-    """Send the message to each of the selected WebSockets.
+    """Queue the message to be sent to each of the selected WebSockets.
+
+    The messages are sent concurrently by the sender of each WebSocket connection.
+    Connections which have too many pending messages are closed.
 
     Args:
         selected_websockets: WebSocket connections to send the message to.
         message: The message.
     """
-    message_as_text = json.dumps(message)
-    send_message_coroutines = [
-        _send_to_socket(web_socket, message_as_text)
-        for web_socket in selected_websockets
-    ]
-    await asyncio.gather(*send_message_coroutines)
-
-
-async def _send_to_socket(websocket: WebSocketCommonProtocol, message: Text) -> None:
-    try:
-        await websocket.send(message)
-    except Exception:
-        # Most likely the closed the message.
-        logger.debug(
-            "Error when sending message to WebSocket. Removing connection "
-            "from the authenticated users."
-        )
-        remove_websocket_connection(websocket)
+    message_as_text = json_utils.dumps(message)
+
+    # copy the selection as slow connections are removed while iterating
+    for websocket in list(selected_websockets):
+        try:
+            _websockets[websocket].pending_messages.put_nowait(message_as_text)
+        except asyncio.QueueFull:
+            logger.debug(
+                f"WebSocket connection of user '{_websockets[websocket].username}' "
+                f"has more than {MAXIMUM_PENDING_MESSAGES_PER_CONNECTION} pending "
+                f"messages. Closing the connection."
+            )
+            remove_websocket_connection(websocket)
+            asyncio.ensure_future(websocket.close())
+
+
+async def _send_pending_messages(
+    websocket: WebSocketCommonProtocol, pending_messages: asyncio.Queue
+) -> None:
+    """Send the pending messages of a WebSocket connection one after another.
+
+    Args:
+        websocket: The WebSocket connection.
+        pending_messages: Messages which wait to be sent to the connection.
+    """
+    while True:
+        message = await pending_messages.get()
+        try:
+            await asyncio.wait_for(websocket.send(message), SEND_TIMEOUT_IN_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Most likely the user closed the connection.
+            logger.debug(
+                "Error when sending message to WebSocket. Removing connection "
+                "from the authenticated users."
+            )
+            remove_websocket_connection(websocket)
+            return
 
 
 def add_websocket_connection(
@@ -273,7 +300,24 @@ def add_websocket_connection(
         websocket: The WebSocket connection.
     """
     logger.debug(f"Authenticated websocket connection with user '{username}'.")
-    _websockets[websocket] = ConnectionDetails(username, scopes)
+
+    existing = _websockets.get(websocket)
+    if existing:
+        # The user authenticated again, e.g. with a refreshed token
+        _remove_from_indices(websocket, existing)
+        pending_messages, sender = existing.pending_messages, existing.sender
+    else:
+        pending_messages = asyncio.Queue(MAXIMUM_PENDING_MESSAGES_PER_CONNECTION)
+        sender = asyncio.ensure_future(
+            _send_pending_messages(websocket, pending_messages)
+        )
+
+    details = ConnectionDetails(username, scopes, pending_messages, sender)
+    _websockets[websocket] = details
+
+    _websockets_by_username.setdefault(username, set()).add(websocket)
+    for scope in scopes or []:
+        _websockets_by_scope.setdefault(scope, set()).add(websocket)
 
 
 def remove_websocket_connection(websocket: WebSocketCommonProtocol) -> None:
@@ -285,7 +329,34 @@ def remove_websocket_connection(websocket: WebSocketCommonProtocol) -> None:
     Args:
         websocket: WebSocket connection which should be removed.
     """
-    _websockets.pop(websocket, None)
+    details = _websockets.pop(websocket, None)
+    if not details:
+        return
+
+    _remove_from_indices(websocket, details)
+    details.sender.cancel()
+
+
+def _remove_from_indices(
+    websocket: WebSocketCommonProtocol, details: "ConnectionDetails"
+) -> None:
+    _discard_from_index(_websockets_by_username, details.username, websocket)
+    for scope in details.user_scopes or []:
+        _discard_from_index(_websockets_by_scope, scope, websocket)
+
+
+def _discard_from_index(
+    index: Dict[Text, Set[WebSocketCommonProtocol]],
+    key: Text,
+    websocket: WebSocketCommonProtocol,
+) -> None:
+    websockets = index.get(key)
+    if websockets is None:
+        return
+
+    websockets.discard(websocket)
+    if not websockets:
+        del index[key]
 
 
 class ConnectionDetails(NamedTuple):
@@ -295,35 +366,42 @@ class ConnectionDetails(NamedTuple):
     username: Text
     # These scopes were extracted from the JWT, hence they are in frontend format!
     user_scopes: Optional[List[Text]]
+    # Messages which wait to be sent by `sender`
+    pending_messages: asyncio.Queue
+    sender: asyncio.Future
 
 
-def initialize_websocket_queues(
+def initialize_message_broker(
     number_of_sanic_workers: int, mp_context: BaseContext
 ) -> None:
-    """Initializes process safe `Queue`s for every worker.
+    """Initializes the broker which distributes the messages to the Sanic workers.
 
     Args:
-        number_of_sanic_workers: Number of Sanic workers which each will get assigned to
-        one `Queue`.
+        number_of_sanic_workers: Number of Sanic workers which subscribe to the
+            messages.
         mp_context: The current multiprocessing context.
     """
-    set_message_queues([mp_context.Queue() for _ in range(number_of_sanic_workers)])
+    set_message_broker(
+        websocket_brokers.create_message_broker(
+            number_of_sanic_workers, mp_context, config.websocket_pubsub_url
+        )
+    )
 
 
-def get_message_queues() -> List[multiprocessing.Queue]:
-    """Get the queues which are used send WebSocket messages to each Sanic worker.
+def get_message_broker() -> websocket_brokers.MessageBroker:
+    """Get the broker which is used to send WebSocket messages to each Sanic worker.
 
     Returns:
-        The queues for the WebSocket messaging.
+        The message broker.
     """
-    return _queues
+    return _message_broker
 
 
-def set_message_queues(queues: List[multiprocessing.Queue]) -> None:
-    """Set the queues which are used send WebSocket messages to each Sanic worker.
+def set_message_broker(message_broker: websocket_brokers.MessageBroker) -> None:
+    """Set the broker which is used to send WebSocket messages to each Sanic worker.
 
     Args:
-        queues: The queues.
+        message_broker: The message broker.
     """
-    global _queues
-    _queues = queues
+    global _message_broker
+    _message_broker = message_broker
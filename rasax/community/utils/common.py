@@ -7,6 +7,7 @@ import os
 import random
 import re
 import string
+import threading
 import typing
 from contextlib import contextmanager
 from hashlib import md5
@@ -28,6 +29,7 @@ from typing import (
     Awaitable,
     Type,
     Iterator,
+    AsyncIterator,
     Coroutine,
     TYPE_CHECKING,
 )
@@ -48,6 +50,7 @@ from sqlalchemy.ext.declarative import DeclarativeMeta
 import rasax.community
 import rasax.community.constants as constants
 import rasax.community.utils.cli as cli_utils
+import rasax.community.utils.http as http_utils
 from rasax.community.api import json_schema
 
 if TYPE_CHECKING:
@@ -452,6 +455,23 @@ def get_text_hash(text: Union[str, bytes, None]) -> str:
     return md5(text).hexdigest()
 
 
+def chunks(items: Sequence[Any], chunk_size: int) -> Iterator[Sequence[Any]]:
+    """Split a sequence into consecutive chunks.
+
+    This is e.g. used to keep the number of bound parameters of `IN` clauses below
+    the limits of the database.
+
+    Args:
+        items: The sequence to split.
+        chunk_size: Maximum number of items per chunk.
+
+    Returns:
+        The chunks of `items`.
+    """
+    for start in range(0, len(items), chunk_size):
+        yield items[start : start + chunk_size]
+
+
 def secure_filename(filename: str) -> str:
     """Pass it a filename and it will return a secure version of it.
 
@@ -872,9 +892,73 @@ def run_in_loop(coro: Coroutine[Any, Any, Any]) -> Any:
     try:
         return loop.run_until_complete(coro)
     finally:
+        # the connections of the shared client session can't be used after the
+        # loop was closed
+        loop.run_until_complete(http_utils.close_client_session())
         loop.close()
 
 
+async def iterate_in_thread(
+    create_iterator: Callable[[], Iterator[Any]], max_buffered_items: int
+) -> AsyncIterator[Any]:
+    """Iterate over a blocking iterator without blocking the event loop.
+
+    The iterator is consumed in a thread of the default executor. At most
+    `max_buffered_items` items are buffered, so that the thread doesn't read ahead
+    of the consumer.
+
+    Args:
+        create_iterator: Creates the iterator. Called in the thread, which also
+            closes the iterator once it's done.
+        max_buffered_items: Maximum number of items which are read ahead.
+
+    Returns:
+        The items of the iterator.
+    """
+    loop = asyncio.get_event_loop()
+    queue = asyncio.Queue(maxsize=max_buffered_items)
+    is_cancelled = threading.Event()
+    end_of_iterator = object()
+
+    def _put(item: Any) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def _produce() -> None:
+        iterator = None
+        try:
+            iterator = create_iterator()
+            for item in iterator:
+                _put(item)
+                if is_cancelled.is_set():
+                    return
+        except Exception as e:
+            _put(e)
+        finally:
+            # release the resources of generators (e.g. database sessions) in this
+            # thread
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+            if not is_cancelled.is_set():
+                _put(end_of_iterator)
+
+    producer = loop.run_in_executor(None, _produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is end_of_iterator:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # unblock the thread if it waits for space in the queue
+        is_cancelled.set()
+        while not queue.empty():
+            queue.get_nowait()
+        await producer
+
+
 def get_uptime() -> float:
     """Return the process uptime in seconds.
 
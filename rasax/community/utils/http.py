@@ -1,8 +1,73 @@
+import asyncio  # pytype: disable=pyi-error
 import logging
-from typing import Optional, Text
+import weakref
+from typing import Any, Optional, Text
+
+import aiohttp
+
+import rasax.community.config as rasa_x_config
+import rasax.community.constants as constants
 
 logger = logging.getLogger(__name__)
 
+# shared client sessions by event loop, since a session can only be used within
+# the event loop it was created in
+_client_sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+class SharedClientSession:
+    """Provides the shared client session of the current event loop.
+
+    Can be used like a `aiohttp.ClientSession` in an `async with` statement, but
+    doesn't close the session on exit so that its connections can be reused.
+    """
+
+    async def __aenter__(self) -> aiohttp.ClientSession:
+        return _get_or_create_client_session()
+
+    async def __aexit__(self, *_: Any) -> None:
+        pass
+
+
+def _get_or_create_client_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_event_loop()
+    session = _client_sessions.get(loop)
+
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            # the number of connections is only limited per host, which means per
+            # Rasa Open Source environment
+            limit=0,
+            limit_per_host=rasa_x_config.rasa_connection_pool_size,
+            keepalive_timeout=rasa_x_config.rasa_connection_keepalive_timeout_in_seconds,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=constants.DEFAULT_REQUEST_TIMEOUT),
+            raise_for_status=True,
+        )
+        _client_sessions[loop] = session
+
+    return session
+
+
+def client_session() -> SharedClientSession:
+    """Get the client session for requests to Rasa Open Source instances.
+
+    Returns:
+        Context manager which provides the pooled client session of the current
+        event loop.
+    """
+    return SharedClientSession()
+
+
+async def close_client_session() -> None:
+    """Close the shared client session of the current event loop."""
+    session = _client_sessions.pop(asyncio.get_event_loop(), None)
+
+    if session is not None and not session.closed:
+        await session.close()
+
 
 def concat_url(base: Text, subpath: Optional[Text]) -> Text:
     """Append a subpath to a base url.
@@ -1,12 +1,26 @@
 import glob
 import errno
+import hashlib
 import json
 import os
 import logging
 import tarfile
 import tempfile
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, List, Text, Union, Optional
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Text,
+    TextIO,
+    Tuple,
+    Union,
+    Optional,
+)
 from sanic.request import File
 
 import rasax.community.config as rasa_x_config
@@ -14,6 +28,11 @@ import rasax.community.config as rasa_x_config
 logger = logging.getLogger(__name__)
 DEFAULT_ENCODING = "utf-8"
 
+# Content hashes of the files written by `write_file_if_changed` by path. Each hash is
+# stored with the modification time and size of the file so that files which were
+# changed by someone else are read again.
+_written_file_hashes: Dict[Text, Tuple[int, int, Text]] = {}
+
 
 def set_project_directory(directory: Union[Path, Text]) -> None:
     """Sets the path to the current project directory."""
@@ -139,6 +158,112 @@ def write_file(
         file.write(content)
 
 
+@contextmanager
+def _open_atomically(
+    file_path: Union[Text, Path], encoding: Text = DEFAULT_ENCODING
+) -> Iterator[TextIO]:
+    create_path(file_path)
+
+    directory, filename = os.path.split(os.path.abspath(file_path))
+    temporary_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temporary_path, "x", encoding=encoding) as file:
+            yield file
+        os.replace(temporary_path, file_path)
+    except Exception:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def write_file_atomically(
+    file_path: Union[Text, Path], content: Text, encoding: Text = DEFAULT_ENCODING
+) -> None:
+    """Writes text to a file so that readers never see a partially written file.
+
+    The content is written to a temporary file in the same directory, which then
+    replaces `file_path`.
+
+    Args:
+        file_path: The path to which the content should be written.
+        content: The content to write.
+        encoding: The encoding which should be used.
+    """
+    with _open_atomically(file_path, encoding) as file:
+        file.write(content)
+
+
+def write_lines_atomically(
+    file_path: Union[Text, Path],
+    lines: Iterable[Text],
+    encoding: Text = DEFAULT_ENCODING,
+) -> None:
+    """Writes lines to a file without joining them into a single string first.
+
+    The lines are separated by newlines. Like `write_file_atomically`, readers never
+    see a partially written file.
+
+    Args:
+        file_path: The path to which the lines should be written.
+        lines: The lines to write.
+        encoding: The encoding which should be used.
+    """
+    with _open_atomically(file_path, encoding) as file:
+        for index, line in enumerate(lines):
+            if index:
+                file.write("\n")
+            file.write(line)
+
+
+def write_file_if_changed(
+    file_path: Union[Text, Path], content: Text, encoding: Text = DEFAULT_ENCODING
+) -> bool:
+    """Atomically writes text to a file unless the file already has this content.
+
+    Args:
+        file_path: The path to which the content should be written.
+        content: The content to write.
+        encoding: The encoding which should be used.
+
+    Returns:
+        `True` if the file was written, `False` if its content was unchanged.
+    """
+    encoded = content.encode(encoding)
+    content_hash = hashlib.sha256(encoded).hexdigest()
+    if _content_hash_of_file(file_path) == content_hash:
+        return False
+
+    write_file_atomically(file_path, content, encoding)
+    _remember_content_hash(file_path, content_hash)
+
+    return True
+
+
+def _content_hash_of_file(file_path: Union[Text, Path]) -> Optional[Text]:
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+    remembered = _written_file_hashes.get(os.path.abspath(file_path))
+    if remembered and remembered[:2] == (stat.st_mtime_ns, stat.st_size):
+        return remembered[2]
+
+    content_hash = hashlib.sha256(read_file_as_bytes(str(file_path))).hexdigest()
+    _remember_content_hash(file_path, content_hash)
+
+    return content_hash
+
+
+def _remember_content_hash(file_path: Union[Text, Path], content_hash: Text) -> None:
+    stat = os.stat(file_path)
+    _written_file_hashes[os.path.abspath(file_path)] = (
+        stat.st_mtime_ns,
+        stat.st_size,
+        content_hash,
+    )
+
+
 def read_file(filename: Union[Text, Path], encoding: Text = DEFAULT_ENCODING) -> Any:
     """Read text from a file."""
 
@@ -0,0 +1,84 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, Text, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    # `orjson` is optional. It decodes and encodes JSON several times faster than
+    # the `json` module of the standard library.
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[Text, bytes]) -> Any:
+    """Decode a JSON document.
+
+    Uses `orjson` if it's installed. Documents which `orjson` rejects but the `json`
+    module accepts (e.g. containing `NaN`) are decoded with the `json` module.
+
+    Args:
+        data: JSON document.
+
+    Returns:
+        The decoded document.
+
+    Raises:
+        ValueError: If `data` is not a valid JSON document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> Text:
+    """Encode an object as JSON document.
+
+    Uses `orjson` if it's installed. Objects which `orjson` can't encode (e.g.
+    integers which don't fit into 64 bits) are encoded with the `json` module.
+
+    Args:
+        obj: Object to encode.
+
+    Returns:
+        The JSON document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except (orjson.JSONEncodeError, TypeError) as e:
+            logger.debug(f"Falling back to the `json` module to encode JSON: {e}")
+
+    return json.dumps(obj)
+
+
+def iter_dumps_with_streamed_text(
+    obj: Dict[Text, Any], key: Text, text_chunks: Iterable[Text]
+) -> Iterator[Text]:
+    """Encode a JSON object with a string value which is given in chunks.
+
+    This allows to encode JSON documents which contain large strings (e.g. training
+    data) without having to build the string first.
+
+    Args:
+        obj: JSON object without `key`.
+        key: Key of the string value.
+        text_chunks: Chunks of the string value.
+
+    Returns:
+        Consecutive parts of the JSON document.
+    """
+    encoded = dumps(obj)
+    separator = ", " if obj else ""
+    yield f'{encoded[:-1]}{separator}{dumps(key)}: "'
+
+    for chunk in text_chunks:
+        # strip the quotes of the encoded string
+        yield dumps(chunk)[1:-1]
+
+    yield '"}'